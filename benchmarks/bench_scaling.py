@@ -0,0 +1,166 @@
+"""
+Scaling benchmarks on synthetic campuses (see synthetic_campus.py).
+
+    python benchmarks/bench_scaling.py --sizes small medium --output results.json
+    python benchmarks/bench_scaling.py --sizes small medium --compare results.json
+
+For every size the scenarios are timed over several rounds after a warm-up round:
+    cold_start     CampusIndex.from_json on the written data directory, and from a compiled snapshot
+    single_hop     find_alternative_classrooms over random course pairs, uncached
+    full_chain     reschedule over random five-course chains, uncached
+    dynamic_chain  dynamic_reschedule with random selection indices, uncached
+    batch          batch_reschedule over students' own course lists, sharing one cache
+Results are JSON (seconds per round and per operation), and --compare prints the median ratio
+against an earlier results file.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from course_timetabling import (  # noqa: E402
+    AlternativesCache,
+    CampusIndex,
+    batch_reschedule,
+    compile_campus_snapshot,
+    dynamic_reschedule,
+    find_alternative_classrooms,
+    reschedule,
+)
+from synthetic_campus import CAMPUS_CENTER, generate_campus, write_campus  # noqa: E402
+
+# (buildings, rooms, meetings, students, days); "small" matches the bundled dataset
+SIZES = {
+    "small": (13, 56, 185, 2279, 1),
+    "medium": (50, 500, 2000, 10000, 5),
+    "large": (150, 2000, 10000, 40000, 5),
+    "xlarge": (400, 8000, 40000, 150000, 5),
+}
+
+ORIGIN = {"lat": CAMPUS_CENTER[0], "lon": CAMPUS_CENTER[1]}
+
+
+def bench(func, rounds=5, warmup=1, ops=1):
+    """
+    Time `func` (which performs `ops` operations) over `rounds` rounds after `warmup` untimed calls.
+    """
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return {
+        "rounds": rounds,
+        "ops": ops,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "stddev": statistics.stdev(times) if rounds > 1 else 0.0,
+        "max": max(times),
+        "median_per_op": statistics.median(times) / ops
+    }
+
+
+def run_size(name, rounds=5, ops=20, seed=0):
+    """
+    Generate the campus for size `name` and time every scenario on it.
+    """
+    num_buildings, num_rooms, num_meetings, num_students, days = SIZES[name]
+    campus_data = generate_campus(num_buildings, num_rooms, num_meetings, num_students, days, seed)
+    rng = np.random.default_rng(seed)
+    results = {
+        "campus": {
+            "buildings": num_buildings,
+            "rooms": num_rooms,
+            "meetings": len(campus_data["courses_info"]["courses"]),
+            "students": num_students
+        },
+        "scenarios": {}
+    }
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_campus(campus_data, data_dir)
+        compile_campus_snapshot(data_dir)
+        results["scenarios"]["cold_start_json"] = bench(lambda: CampusIndex.from_json(data_dir), rounds)
+        results["scenarios"]["cold_start_snapshot"] = bench(
+            lambda: CampusIndex.from_snapshot(os.path.join(data_dir, "snapshot")), rounds
+        )
+        campus = CampusIndex.from_json(data_dir)
+
+    course_ids = sorted(campus.courses)
+    pairs = [tuple(rng.choice(course_ids, 2)) for _ in range(ops)]
+    chains = [list(rng.choice(course_ids, 5)) for _ in range(ops)]
+    selections = [list(rng.integers(0, 10, 5)) for _ in range(ops)]
+    jobs = [
+        {"course_list": [int(m['CourseNumb']) for m in meetings]}
+        for meetings in list(campus_data["students_info"].values())[:ops * 10]
+    ]
+
+    results["scenarios"]["single_hop"] = bench(
+        lambda: [find_alternative_classrooms(int(c1), int(c2), campus, 10) for c1, c2 in pairs], rounds, ops=len(pairs)
+    )
+    results["scenarios"]["full_chain"] = bench(
+        lambda: [reschedule([int(c) for c in chain], campus, ORIGIN, "Origin", topk=10) for chain in chains],
+        rounds, ops=len(chains)
+    )
+    results["scenarios"]["dynamic_chain"] = bench(
+        lambda: [
+            dynamic_reschedule([int(c) for c in chain], campus, ORIGIN, "Origin", [int(i) for i in selection], topk=10)
+            for chain, selection in zip(chains, selections)
+        ],
+        rounds, ops=len(chains)
+    )
+    # A fresh cache per round, so every round pays for the same misses
+    results["scenarios"]["batch"] = bench(
+        lambda: list(batch_reschedule(jobs, campus, 10, ORIGIN, "Origin", cache=AlternativesCache(campus.availability))),
+        rounds, ops=len(jobs)
+    )
+    return results
+
+
+def compare(results, baseline):
+    """
+    Print the median time ratio (current / baseline) of every scenario present in both.
+    """
+    for size, size_results in results["sizes"].items():
+        baseline_scenarios = baseline.get("sizes", {}).get(size, {}).get("scenarios", {})
+        for scenario, timing in size_results["scenarios"].items():
+            if scenario in baseline_scenarios:
+                ratio = timing["median"] / baseline_scenarios[scenario]["median"]
+                print(f"{size:>8} {scenario:<20} {ratio:6.2f}x", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time the rescheduling scenarios on synthetic campuses of several sizes.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"], help="Campus sizes to run.")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per scenario.")
+    parser.add_argument("--ops", type=int, default=20, help="Operations per round (batch runs ten times as many jobs).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the campus and the workload.")
+    parser.add_argument("--output", type=str, default=None, help="Write the JSON results here as well as to stdout.")
+    parser.add_argument("--compare", type=str, default=None, help="Earlier results file to compare medians against.")
+    args = parser.parse_args()
+
+    results = {
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "rounds": args.rounds,
+        "sizes": {size: run_size(size, args.rounds, args.ops, args.seed) for size in args.sizes}
+    }
+    output = json.dumps(results, indent=4)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(results, json.load(f))
@@ -0,0 +1,97 @@
+"""
+Cold-start benchmark: import time of the package modules (from `python -X importtime`) and wall time
+of fresh interpreter runs, each the median of several runs.
+
+    python benchmarks/bench_startup.py --repeat 5 --budget_ms 300
+
+Exits with status 1 if `course_timetabling` takes longer than `--budget_ms` to import, or if
+importing it pulls in any of the `--forbid` modules (matplotlib by default).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module):
+    """
+    {imported module: cumulative import time in ms} for a fresh `import module`.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative_us) / 1000
+    return times
+
+
+def wall_time(args):
+    """
+    Wall time in ms of a fresh interpreter running `args`.
+    """
+    started = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, check=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def main(repeat=5, top=10, forbid=("matplotlib",)):
+    """
+    Returns the benchmark results as a JSON-serializable dict.
+    """
+    results = {"python": sys.version.split()[0], "repeat": repeat, "imports": {}, "wall_ms": {}}
+
+    for module in ("course_timetabling", "campus_solver", "reschedule_service"):
+        runs = [import_times(module) for _ in range(repeat)]
+        heaviest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)
+        results["imports"][module] = {
+            "total_ms": statistics.median(run[module] for run in runs),
+            "heaviest_ms": {name: round(ms, 3) for name, ms in heaviest[1:top + 1]},
+            "forbidden": sorted({name for name in runs[-1] if name.split(".")[0] in forbid})
+        }
+
+    commands = {
+        "python": ["-c", "pass"],
+        "import": ["-c", "import course_timetabling"],
+        "cli_help": ["course_timetabling.py", "--help"],
+    }
+    for name, args in commands.items():
+        results["wall_ms"][name] = statistics.median(wall_time(args) for _ in range(repeat))
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure import and cold-start times.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (the median is reported).")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest imports listed per module.")
+    parser.add_argument("--budget_ms", type=float, default=None, help="Fail if importing course_timetabling takes longer.")
+    parser.add_argument("--forbid", nargs="*", default=["matplotlib"], help="Top-level packages course_timetabling must not import.")
+    parser.add_argument("--output", type=str, default=None, help="Write the JSON results here as well as to stdout.")
+    args = parser.parse_args()
+
+    results = main(args.repeat, args.top, tuple(args.forbid))
+    output = json.dumps(results, indent=4)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+    core = results["imports"]["course_timetabling"]
+    failures = []
+    if core["forbidden"]:
+        failures.append(f"course_timetabling imports {', '.join(core['forbidden'])}")
+    if args.budget_ms is not None and core["total_ms"] > args.budget_ms:
+        failures.append(f"course_timetabling import took {core['total_ms']:.1f} ms (budget {args.budget_ms} ms)")
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,177 @@
+"""
+Synthetic campuses shaped like data/*.json, for scaling studies.
+
+    python benchmarks/synthetic_campus.py --buildings 50 --rooms 500 --meetings 2000 --students 10000 --output /tmp/campus
+
+generate_campus returns the four JSON documents (courses_info, room_timetable, building_loc, students_info)
+with the same keys and value types as the bundled data; write_campus saves them as a data directory
+that CampusIndex.from_json can load.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+# Around the bundled campus, so distances are of the same magnitude
+CAMPUS_CENTER = (30.6150, -96.3400)
+CAMPUS_RADIUS_DEG = 0.012
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri"]
+REGIONS = ["East Campus", "West Campus", "Main Campus"]
+ROOM_CAPACITIES = [20, 30, 45, 60, 100, 200]
+DURATIONS_MIN = [50, 75, 110, 145]
+
+
+def _time_str(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def generate_campus(num_buildings=13, num_rooms=56, num_meetings=185, num_students=2279, days=1, seed=0):
+    """
+    Random campus with `num_buildings` buildings, `num_rooms` rooms, `num_meetings` course meetings
+    spread over the first `days` weekdays without overlapping bookings, and `num_students` students
+    whose meetings follow each other within 20 minutes where possible.
+    Meetings that find no free room are dropped, so slightly fewer than `num_meetings` may be returned.
+    """
+    rng = np.random.default_rng(seed)
+
+    building_loc = {}
+    for i in range(num_buildings):
+        building_id = str(100 + i)
+        building_loc[building_id] = {
+            "lon": float(CAMPUS_CENTER[1] + rng.uniform(-CAMPUS_RADIUS_DEG, CAMPUS_RADIUS_DEG)),
+            "lat": float(CAMPUS_CENTER[0] + rng.uniform(-CAMPUS_RADIUS_DEG, CAMPUS_RADIUS_DEG)),
+            "abbr": f"B{i:03d}",
+            "name": f"Building {i:03d}"
+        }
+    building_ids = list(building_loc)
+
+    # Rooms: (building id, room number, capacity), with the floor as the first digit like the real data
+    rooms = []
+    for i in range(num_rooms):
+        building_id = building_ids[i % num_buildings] if i < num_buildings else building_ids[rng.integers(num_buildings)]
+        room_number = f"{rng.integers(1, 5)}{i:04d}"
+        rooms.append((building_id, room_number, int(rng.choice(ROOM_CAPACITIES))))
+    capacities = np.array([room[2] for room in rooms])
+
+    # Meetings placed into free rooms large enough for them; bookings[room][day] = [(start, end)]
+    bookings = [{} for _ in rooms]
+    courses = []
+    num_course_numbers = max(1, num_meetings // 3)
+    for meeting_id in range(num_meetings):
+        day = DAYS[rng.integers(days)]
+        duration = int(rng.choice(DURATIONS_MIN))
+        start = int(rng.integers(48, (21 * 60 - duration) // 10)) * 10  # 08:00 onwards on a 10-minute grid
+        end = start + duration
+        headcount = int(rng.integers(10, 120))
+
+        room_index = None
+        for candidate in rng.permutation(np.flatnonzero(capacities >= headcount))[:50]:
+            if all(e <= start or end <= s for s, e in bookings[candidate].get(day, [])):
+                room_index = int(candidate)
+                break
+        if room_index is None:
+            continue
+        bookings[room_index].setdefault(day, []).append((start, end))
+        building_id, room_number, capacity = rooms[room_index]
+        building = building_loc[building_id]
+        courses.append({
+            "CourseNumb": 100 + int(rng.integers(num_course_numbers)),
+            "SectionNumb": 500 + meeting_id % 100,
+            "SectionID": 50000 + meeting_id,
+            "MeetingType": "LAB" if duration > 100 else "LEC",
+            "MeetingID": 900000 + meeting_id,
+            "DayOfWeek": day,
+            "RoomNumber": room_number,
+            "BuildingName": building["name"],
+            "BuildingNumber": float(building_id),
+            "BldgAbbr": building["abbr"],
+            "Region": REGIONS[int(building_id) % len(REGIONS)],
+            "NumStudents": headcount,
+            "StartTimeStr": _time_str(start),
+            "EndTimeStr": _time_str(end),
+            "RoomCapacity": capacity
+        })
+
+    room_timetable = {}
+    for building_id, room_number, _ in rooms:
+        room_timetable.setdefault(building_loc[building_id]["name"], {})[room_number] = []
+    for course in courses:
+        room_timetable[course['BuildingName']][course['RoomNumber']].append({
+            "CourseNumber": course['CourseNumb'],
+            "DayOfWeek": course['DayOfWeek'],
+            "StartTime": course['StartTimeStr'],
+            "EndTime": course['EndTimeStr'],
+            "MeetingType": course['MeetingType'],
+            "NumStudents": course['NumStudents']
+        })
+
+    # Students: a first meeting, then up to three more each starting 10-20 minutes after the previous one ends
+    by_day_start = {}
+    for course in courses:
+        by_day_start.setdefault((course['DayOfWeek'], course['StartTimeStr']), []).append(course)
+    students_info = {}
+    for i in range(num_students):
+        course = courses[rng.integers(len(courses))]
+        meetings = [course]
+        for _ in range(rng.integers(0, 4)):
+            end = int(course['EndTimeStr'][:2]) * 60 + int(course['EndTimeStr'][3:])
+            following = by_day_start.get((course['DayOfWeek'], _time_str(end + int(rng.integers(1, 3)) * 10)))
+            if not following:
+                break
+            course = following[rng.integers(len(following))]
+            meetings.append(course)
+        students_info[str(100000 + i)] = [
+            {
+                "CourseNumb": str(m['CourseNumb']),
+                "MeetingType": m['MeetingType'],
+                "DayOfWeek": m['DayOfWeek'],
+                "StartTime": m['StartTimeStr'],
+                "EndTime": m['EndTimeStr'],
+                "RoomNumber": m['RoomNumber'],
+                "BuildingName": m['BuildingName'],
+                "BuildingNumber": str(int(m['BuildingNumber'])),
+                "BldgAbbr": m['BldgAbbr'],
+                "Region": m['Region']
+            }
+            for m in meetings
+        ]
+
+    return {
+        "courses_info": {"courses": courses},
+        "room_timetable": room_timetable,
+        "building_loc": building_loc,
+        "students_info": students_info
+    }
+
+
+def write_campus(campus, data_dir):
+    """
+    Save a generated campus as <data_dir>/{courses_info,room_timetable,building_loc,students_info}.json.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    for name, document in campus.items():
+        with open(os.path.join(data_dir, f"{name}.json"), "w") as f:
+            json.dump(document, f)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate a synthetic campus data directory.")
+    parser.add_argument("--buildings", type=int, default=13, help="Number of buildings.")
+    parser.add_argument("--rooms", type=int, default=56, help="Number of rooms.")
+    parser.add_argument("--meetings", type=int, default=185, help="Number of course meetings.")
+    parser.add_argument("--students", type=int, default=2279, help="Number of students.")
+    parser.add_argument("--days", type=int, default=1, help="Weekdays the meetings are spread over.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument("--output", type=str, required=True, help="Data directory to write.")
+    args = parser.parse_args()
+
+    campus = generate_campus(args.buildings, args.rooms, args.meetings, args.students, args.days, args.seed)
+    write_campus(campus, args.output)
+    print(json.dumps({
+        "buildings": len(campus["building_loc"]),
+        "rooms": sum(len(rooms) for rooms in campus["room_timetable"].values()),
+        "meetings": len(campus["courses_info"]["courses"]),
+        "students": len(campus["students_info"])
+    }))
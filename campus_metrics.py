@@ -0,0 +1,184 @@
+"""
+Opt-in instrumentation for the rescheduling hot paths.
+
+METRICS collects per-stage timers and counters once enabled (`--metrics` on the command line);
+while disabled, `stage` hands back a shared no-op context manager and `incr` returns immediately.
+snapshot() and prometheus() export what was collected. start_profiling wraps a run in cProfile
+(pstats output) or a sampling profiler writing flamegraph-compatible collapsed stacks.
+"""
+import atexit
+import cProfile
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+_NULL_STAGE = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    """
+    Thread-safe stage timers ({name: [count, total seconds, max seconds]}) and counters.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.timers = {}
+        self.counters = Counter()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def stage(self, name):
+        """
+        Context manager timing the enclosed block as stage `name` (a no-op while disabled).
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                self.timers[name] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                timer[2] = max(timer[2], seconds)
+
+    def incr(self, name, value=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] += value
+
+    def reset(self):
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+
+    def snapshot(self, gauges=None):
+        """
+        JSON-serializable view: stage timers in seconds, counters and any extra `gauges`.
+        """
+        with self._lock:
+            return {
+                "stages": {
+                    name: {"count": count, "total_s": total, "mean_s": total / count, "max_s": longest}
+                    for name, (count, total, longest) in sorted(self.timers.items())
+                },
+                "counters": dict(sorted(self.counters.items())),
+                "gauges": dict(gauges or {})
+            }
+
+    def prometheus(self, gauges=None, prefix="campus"):
+        """
+        Prometheus text exposition of the same data: a summary per stage, a counter per counter.
+        """
+        snapshot = self.snapshot(gauges)
+        lines = []
+        for name, timer in snapshot["stages"].items():
+            metric = _metric_name(prefix, name, "seconds")
+            lines.append(f"# TYPE {metric} summary")
+            lines.append(f"{metric}_count {timer['count']}")
+            lines.append(f"{metric}_sum {timer['total_s']:.9f}")
+            lines.append(f"# TYPE {metric}_max gauge")
+            lines.append(f"{metric}_max {timer['max_s']:.9f}")
+        for name, value in snapshot["counters"].items():
+            metric = _metric_name(prefix, name, "total")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        for name, value in snapshot["gauges"].items():
+            metric = _metric_name(prefix, name)
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _metric_name(prefix, name, suffix=None):
+    parts = [prefix, "".join(c if c.isalnum() else "_" for c in name)]
+    if suffix:
+        parts.append(suffix)
+    return "_".join(parts)
+
+
+# Process-wide metrics used by course_timetabling, campus_solver and reschedule_service
+METRICS = Metrics()
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread every `interval` seconds from a background thread and counts
+    the stacks in collapsed form ("outer;inner;leaf count"), ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, interval=0.001, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def start_profiling(path, interval=0.001):
+    """
+    Profile the rest of the process run and write the result to `path` at exit: collapsed stacks
+    from a StackSampler if `path` ends in .collapsed or .folded, otherwise a cProfile pstats dump.
+    """
+    if path.endswith((".collapsed", ".folded")):
+        sampler = StackSampler(interval)
+        sampler.start()
+
+        def finish():
+            sampler.stop()
+            sampler.write(path)
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+        def finish():
+            profiler.disable()
+            profiler.dump_stats(path)
+
+    atexit.register(finish)
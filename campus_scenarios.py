@@ -0,0 +1,259 @@
+"""
+What-if scenarios evaluated against one loaded campus and compared side by side.
+
+    python campus_scenarios.py --scenarios scenarios.json --workers 4 --output comparison.json
+
+A scenarios file is a JSON list of {"name", "edits", "anneal_iterations"} (the last one optional), each edit being
+    {"op": "close_building", "building": "<building name>"}
+    {"op": "close_room", "building": "<building name>", "room": "<room>"}
+    {"op": "scale_capacity", "factor": 0.8}                  (every room, or only those of "building")
+    {"op": "move_course", "course": 661, "building": "<building name>", "room": "<room>"}
+Every scenario runs on a CampusOverlay of the shared campus holding copies of only the room columns its
+edits change, and on a fork of one RoomReassignmentSolver sharing the student flows. Meetings left in a
+closed room or in one now too small for them move to their cheapest free room (then, with
+anneal_iterations, the whole timetable is annealed), and the resulting timetable is measured: student
+travel between consecutive meetings, floors climbed and room occupancy. A baseline without edits always
+comes first. With --workers, every process loads the campus and flows once and evaluates its share.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from campus_solver import RoomReassignmentSolver, meeting_columns, snapshot_meeting_columns
+from course_timetabling import CampusIndex, CampusOverlay, CampusSnapshot
+
+BASELINE = {"name": "baseline", "edits": []}
+
+# Columns of the comparison table: (metric, heading, format)
+TABLE_COLUMNS = [
+    ("student_km", "student km", "{:.1f}"),
+    ("student_km_change", "change", "{:+.1%}"),
+    ("student_walking_min", "walking min", "{:.0f}"),
+    ("student_floors", "floors", "{:.0f}"),
+    ("mean_occupancy", "occupancy", "{:.1%}"),
+    ("over_capacity", "over cap", "{}"),
+    ("unplaced", "unplaced", "{}"),
+    ("moved_bookings", "moved", "{}"),
+    ("wall_time_s", "seconds", "{:.2f}"),
+]
+
+
+def _writable(campus, name):
+    # Copy-on-write: the first edit of a room column gives the scenario its own copy
+    if name not in campus.__dict__:
+        setattr(campus, name, getattr(campus.campus, name).copy())
+    return getattr(campus, name)
+
+
+def _building_rooms(campus, building):
+    rooms = [position for position, (name, _) in enumerate(campus.availability.room_keys) if name == building]
+    if not rooms:
+        raise ValueError(f"Building {building!r} not found in room_timetable")
+    return rooms
+
+
+def timetable_metrics(solver):
+    """
+    Aggregate travel, floor and occupancy figures of the solver's current assignment on its campus.
+    Travel counts students x (km, walking minutes, floors down to and up from the ground floor) over
+    the transitions between consecutive meetings; occupancy is the mean students / capacity per booking.
+    """
+    campus = solver.campus
+    assignment = solver.assignment
+    # Bookings in a room missing from the campus (-1) count as unplaced, with no travel, floors or capacity
+    placed = assignment >= 0
+    rooms = np.where(placed, assignment, 0)
+    buildings = solver.booking_buildings()
+    floors = np.where(placed, np.abs(campus.room_floor[rooms] - 1), 0)
+    source, target, weight = solver.flow_src, solver.flow_dst, solver.flow_weight
+    located = (buildings[source] >= 0) & (buildings[target] >= 0)
+    source, target, weight = source[located], target[located], weight[located]
+    capacity = np.where(placed, campus.room_capacity[rooms], 0)
+    eligible = placed & campus.room_eligible[rooms]
+    occupancy = np.divide(solver.num_students, capacity, out=np.zeros(len(capacity)), where=capacity > 0)
+    return {
+        "student_km": float(np.sum(weight * campus.distances.distance_km[buildings[source], buildings[target]])),
+        "student_walking_min": float(np.sum(weight * campus.distances.walking_time_min[buildings[source], buildings[target]])),
+        "student_floors": float(np.sum(weight * (floors[source] + floors[target]))),
+        "mean_occupancy": float(occupancy.mean()) if len(occupancy) else 0.0,
+        "over_capacity": int(np.count_nonzero(eligible & (capacity < solver.num_students))),  # Sections sharing a room included
+        "unplaced": int(np.count_nonzero(~eligible)),
+        "rooms_used": len(set(assignment.tolist())),
+        "moved_bookings": int(np.count_nonzero(assignment != solver.initial_assignment))
+    }
+
+
+class ScenarioRunner:
+    """
+    Evaluates scenarios against one campus and one RoomReassignmentSolver built from its students,
+    neither of which a scenario modifies.
+    """
+
+    def __init__(self, campus, columns):
+        self.campus = campus
+        self.solver = RoomReassignmentSolver(campus, None, columns=columns)
+
+    def apply_edit(self, campus, solver, edit):
+        """
+        Apply one edit to the scenario's overlay and solver fork. Returns the bookings a move_course
+        edit could not place (too small or already taken at that time), otherwise 0.
+        """
+        op = edit["op"]
+        if op == "close_building":
+            _writable(campus, "room_eligible")[_building_rooms(campus, edit["building"])] = False
+        elif op == "close_room":
+            _writable(campus, "room_eligible")[campus.availability.room_positions[(edit["building"], edit["room"])]] = False
+        elif op == "scale_capacity":
+            rooms = _building_rooms(campus, edit["building"]) if "building" in edit else slice(None)
+            room_capacity = _writable(campus, "room_capacity")
+            # Rounded, so a factor close to 1 leaves every room as it is
+            room_capacity[rooms] = np.round(room_capacity[rooms] * edit["factor"])
+        elif op == "move_course":
+            room = campus.availability.room_positions[(edit["building"], edit["room"])]
+            bookings = [i for i, booking in enumerate(solver.bookings) if booking["course_number"] == int(edit["course"])]
+            if not bookings:
+                raise ValueError(f"Course {edit['course']} not found in courses_info")
+            skipped = 0
+            # A moved course stays put through the rest of the scenario
+            solver.movable = solver.movable.copy()
+            for booking in bookings:
+                if solver.fits(booking, room):
+                    solver._assign(booking, room)
+                    solver.movable[booking] = False
+                else:
+                    skipped += 1
+            return skipped
+        else:
+            raise ValueError(f"Unknown scenario edit op {op!r}")
+        solver.target_rooms = np.flatnonzero(campus.room_eligible)
+        return 0
+
+    def evaluate(self, scenario):
+        """
+        {"name", "edits", **timetable_metrics, "relocated", "skipped_moves", "wall_time_s"} for one scenario,
+        or {"name", "error"} if one of its edits is invalid.
+        """
+        started = time.perf_counter()
+        campus = CampusOverlay(self.campus)
+        solver = self.solver.fork(campus)
+        try:
+            skipped_moves = sum(self.apply_edit(campus, solver, edit) for edit in scenario.get("edits", []))
+        except (KeyError, ValueError, TypeError) as e:
+            return {"name": scenario.get("name"), "error": f"{type(e).__name__}: {e}"}
+
+        # Bookings left in a room the edits closed or made too small move to their cheapest free room,
+        # largest first; bookings already over capacity in the base timetable, and unplaced ones, stay put
+        rooms = np.where(solver.assignment >= 0, solver.assignment, 0)  # No -1 wrapping around to the last room
+        closed = self.campus.room_eligible[rooms] & ~campus.room_eligible[rooms]
+        shrunk = (campus.room_capacity[rooms] < solver.num_students) & (self.campus.room_capacity[rooms] >= solver.num_students)
+        displaced = np.flatnonzero(solver.movable & (closed | shrunk))
+        relocated = 0
+        for booking in sorted(displaced.tolist(), key=lambda booking: -solver.num_students[booking]):
+            move = solver.best_move(booking)
+            if move is not None:
+                solver._assign(booking, move[0])
+                relocated += 1
+
+        iterations = scenario.get("anneal_iterations", 0)
+        if iterations:
+            solver.anneal(iterations=iterations, seed=scenario.get("seed", 0), log_every=iterations)
+
+        return {
+            "name": scenario.get("name"),
+            "edits": scenario.get("edits", []),
+            **timetable_metrics(solver),
+            "relocated": relocated,
+            "skipped_moves": skipped_moves,
+            "wall_time_s": time.perf_counter() - started
+        }
+
+
+def load_runner(data_dir="./data", snapshot_dir=None):
+    """
+    A ScenarioRunner on the campus and students in `data_dir`, or in the compiled `snapshot_dir`.
+    """
+    if snapshot_dir:
+        snapshot = CampusSnapshot(snapshot_dir)
+        return ScenarioRunner(CampusIndex.from_snapshot(snapshot), snapshot_meeting_columns(snapshot))
+    with open(f"{data_dir}/students_info.json", "r") as f:
+        columns = meeting_columns(json.load(f))
+    return ScenarioRunner(CampusIndex.from_json(data_dir), columns)
+
+
+# Per-process runner of evaluate_scenarios workers, set once by the pool initializer
+_worker_runner = None
+
+
+def _init_scenario_worker(data_dir, snapshot_dir):
+    global _worker_runner
+    _worker_runner = load_runner(data_dir, snapshot_dir)
+
+
+def _scenario_worker_job(scenario):
+    return _worker_runner.evaluate(scenario)
+
+
+def evaluate_scenarios(scenarios, data_dir="./data", snapshot_dir=None, workers=1):
+    """
+    Evaluate the baseline followed by `scenarios`, in one process or over a pool of `workers`
+    processes (None: one per CPU), and return their results in that order, each with its
+    student_km_change relative to the baseline.
+    """
+    scenarios = [BASELINE] + list(scenarios)
+    if workers == 1:
+        runner = load_runner(data_dir, snapshot_dir)
+        results = [runner.evaluate(scenario) for scenario in scenarios]
+    else:
+        # Imported here: the process pool machinery is only needed for multi-worker runs
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_scenario_worker, initargs=(data_dir, snapshot_dir)
+        ) as executor:
+            results = list(executor.map(_scenario_worker_job, scenarios))
+
+    baseline_km = results[0]["student_km"]
+    for result in results:
+        if "error" not in result:
+            result["student_km_change"] = result["student_km"] / baseline_km - 1 if baseline_km else 0.0
+    return results
+
+
+def comparison_table(results):
+    """
+    The results as an aligned plain-text table, one row per scenario.
+    """
+    rows = [["scenario"] + [heading for _, heading, _ in TABLE_COLUMNS]]
+    for result in results:
+        if "error" in result:
+            rows.append([str(result["name"]), result["error"]])
+        else:
+            rows.append([str(result["name"])] + [fmt.format(result[metric]) for metric, _, fmt in TABLE_COLUMNS])
+    widths = [max(len(row[i]) for row in rows if len(row) == len(rows[0])) for i in range(len(rows[0]))]
+    widths[0] = max(len(row[0]) for row in rows)
+    # Error rows keep their message unpadded after the name
+    return "\n".join(
+        "  ".join([row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])])
+        if len(row) == len(rows[0]) else f"{row[0].ljust(widths[0])}  {row[1]}"
+        for row in rows
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Evaluate what-if scenarios and compare travel, floors and occupancy.")
+    parser.add_argument("--scenarios", type=str, required=True, help="JSON list of scenarios.")
+    parser.add_argument("--data_dir", type=str, default="./data", help="Directory with the campus JSON files.")
+    parser.add_argument("--snapshot", type=str, default=None, help="Compiled campus snapshot to load instead of the JSON files.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (0 for one per CPU).")
+    parser.add_argument("--output", type=str, default=None, help="Also write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    with open(args.scenarios, "r") as f:
+        scenarios = json.load(f)
+    results = evaluate_scenarios(scenarios, args.data_dir, args.snapshot, args.workers or None)
+    print(comparison_table(results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
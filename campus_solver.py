@@ -0,0 +1,604 @@
+"""
+Campus-wide room reassignment driven by the student transitions in students_info.json.
+
+Every course meeting is moved between rooms at once to minimize the total students x walking
+distance between consecutive meetings, subject to room capacity and no overlapping bookings
+in a room on the same day. The search is simulated annealing: each proposed move or swap is
+priced from the flows touching the moved meetings only, never by re-scoring the whole campus.
+"""
+import argparse
+import copy
+import json
+import math
+import sys
+import time
+
+import numpy as np
+
+from course_timetabling import CampusIndex, CampusSnapshot, time_to_minutes
+
+# Consecutive meetings at most this many minutes apart count as a walk between them
+TRANSITION_WINDOW_MIN = 20
+
+
+def student_transitions(students_info, window=TRANSITION_WINDOW_MIN):
+    """
+    Yield (student_id, meeting, next_meeting) for every pair of consecutive meetings of a student
+    on the same day where the next one starts after the first ends, within `window` minutes.
+    """
+    for student_id, meetings in students_info.items():
+        meetings = sorted(meetings, key=lambda m: (m['DayOfWeek'], time_to_minutes(m['StartTime'])))
+        for current, following in zip(meetings, meetings[1:]):
+            if current['DayOfWeek'] != following['DayOfWeek']:
+                continue
+            gap = time_to_minutes(following['StartTime']) - time_to_minutes(current['EndTime'])
+            if 0 < gap <= window:
+                yield student_id, current, following
+
+
+def meeting_columns(students_info):
+    """
+    Flatten students_info into parallel arrays, one entry per meeting: "student" (position in
+    students_info), "course", "day", "building" and "room" (strings as in the JSON), "start" and "end" (minutes).
+    """
+    meetings = [meeting for student_meetings in students_info.values() for meeting in student_meetings]
+    return {
+        "student": np.repeat(np.arange(len(students_info)), [len(m) for m in students_info.values()]),
+        "course": np.array([m['CourseNumb'] for m in meetings], dtype=str),
+        "day": np.array([m['DayOfWeek'] for m in meetings], dtype=str),
+        "building": np.array([m['BuildingNumber'] for m in meetings], dtype=str),
+        "room": np.array([m['RoomNumber'] for m in meetings], dtype=str),
+        "start": np.array([time_to_minutes(m['StartTime']) for m in meetings], dtype=np.int64),
+        "end": np.array([time_to_minutes(m['EndTime']) for m in meetings], dtype=np.int64)
+    }
+
+
+def snapshot_meeting_columns(snapshot):
+    """
+    meeting_columns read straight from a CampusSnapshot's student tables, without decoding records.
+    """
+    strings = np.array(snapshot.strings.tobytes().decode().split("\0"))
+    meetings = snapshot.table("student_meetings")
+    return {
+        "student": np.repeat(np.arange(len(snapshot.table("students"))), snapshot.table("students")["num_meetings"]),
+        "course": strings[meetings["CourseNumb"]],
+        "day": strings[meetings["DayOfWeek"]],
+        "building": strings[meetings["BuildingNumber"]],
+        "room": strings[meetings["RoomNumber"]],
+        "start": meetings["StartTime"].astype(np.int64),
+        "end": meetings["EndTime"].astype(np.int64)
+    }
+
+
+def transition_pairs(columns, window=TRANSITION_WINDOW_MIN):
+    """
+    The transitions of student_transitions as two arrays of meeting positions in `columns`
+    (current, following), found with one sort by (student, day, start) instead of a loop per student.
+    """
+    _, day_codes = np.unique(columns["day"], return_inverse=True)
+    order = np.lexsort((columns["start"], day_codes, columns["student"]))
+    current, following = order[:-1], order[1:]
+    gap = columns["start"][following] - columns["end"][current]
+    walks = (
+        (columns["student"][current] == columns["student"][following])
+        & (day_codes[current] == day_codes[following])
+        & (gap > 0) & (gap <= window)
+    )
+    return current[walks], following[walks]
+
+
+class FlowStore:
+    """
+    Student flows between labelled nodes (courses, bookings, buildings) as scipy.sparse CSR matrices:
+    "flow" (number of students) plus any number of same-shape value matrices such as summed distances.
+    Memory grows with the number of pairs that carry students, not with the square of the node count.
+    Matrices are indexed by node position; `positions` maps labels to positions.
+    """
+
+    def __init__(self, labels, **matrices):
+        self.labels = list(labels)
+        self.positions = {label: i for i, label in enumerate(self.labels)}
+        self.matrices = {name: matrix.tocsr() for name, matrix in matrices.items()}
+        self._columns = {}
+
+    @classmethod
+    def from_pairs(cls, labels, sources, targets, **values):
+        """
+        Accumulate one student per (sources[i], targets[i]) position pair into "flow", and values[name][i]
+        into the matrix `name`; repeated pairs are summed and pairs summing to 0 are not stored.
+        """
+        from scipy import sparse
+
+        shape = (len(labels), len(labels))
+        matrices = {}
+        for name, data in (("flow", np.ones(len(sources), dtype=np.int64)), *values.items()):
+            matrix = sparse.coo_matrix((data, (sources, targets)), shape=shape).tocsr()
+            matrix.eliminate_zeros()
+            matrices[name] = matrix
+        return cls(labels, **matrices)
+
+    def __getitem__(self, name):
+        return self.matrices[name]
+
+    @property
+    def nbytes(self):
+        """
+        Bytes held by the stored matrices (data and index arrays).
+        """
+        return sum(m.data.nbytes + m.indices.nbytes + m.indptr.nbytes for m in self.matrices.values())
+
+    def row(self, label, name="flow"):
+        """
+        {target label: value} of the flows leaving `label`.
+        """
+        matrix = self.matrices[name]
+        i = self.positions[label]
+        start, end = matrix.indptr[i], matrix.indptr[i + 1]
+        return {self.labels[j]: value for j, value in zip(matrix.indices[start:end].tolist(), matrix.data[start:end].tolist())}
+
+    def column(self, label, name="flow"):
+        """
+        {source label: value} of the flows arriving at `label`, from a CSC copy made on first use.
+        """
+        if name not in self._columns:
+            self._columns[name] = self.matrices[name].tocsc()
+        matrix = self._columns[name]
+        j = self.positions[label]
+        start, end = matrix.indptr[j], matrix.indptr[j + 1]
+        return {self.labels[i]: value for i, value in zip(matrix.indices[start:end].tolist(), matrix.data[start:end].tolist())}
+
+    def top(self, n=10, name="flow"):
+        """
+        The `n` largest stored entries as (source label, target label, value), largest first.
+        """
+        matrix = self.matrices[name]
+        n = min(n, matrix.nnz)
+        if n == 0:
+            return []
+        largest = np.argpartition(-matrix.data, n - 1)[:n]
+        largest = largest[np.argsort(-matrix.data[largest], kind="stable")]
+        rows = np.searchsorted(matrix.indptr, largest, side="right") - 1
+        return [
+            (self.labels[i], self.labels[j], value)
+            for i, j, value in zip(rows.tolist(), matrix.indices[largest].tolist(), matrix.data[largest].tolist())
+        ]
+
+    def aggregate(self, groups):
+        """
+        FlowStore over groups (e.g. buildings): `groups[i]` is the group label of node i, and every
+        matrix is summed over the nodes of each group (G = P^T M P with P the node-to-group indicator).
+        """
+        from scipy import sparse
+
+        group_labels, group_codes = np.unique(np.asarray(groups), return_inverse=True)
+        indicator = sparse.csr_matrix(
+            (np.ones(len(group_codes), dtype=np.int64), (np.arange(len(group_codes)), group_codes)),
+            shape=(len(self.labels), len(group_labels))
+        )
+        return FlowStore(
+            group_labels.tolist(),
+            **{name: indicator.T @ matrix @ indicator for name, matrix in self.matrices.items()}
+        )
+
+
+def transition_matrices(columns, distances, window=TRANSITION_WINDOW_MIN, courses=None):
+    """
+    Course-to-course flows over the student transitions of student_transitions, in one vectorized pass
+    over `columns` (from meeting_columns or snapshot_meeting_columns), as a FlowStore with the matrices
+        flow          number of students walking from the row course to the column course
+        distance_km   summed building distance of those walks (students x km)
+        walking_min   summed walking time of those walks (students x minutes)
+    Divide distance_km or walking_min by flow for the mean per student. Walks within a building, or
+    from or to a building missing from `distances` (a BuildingDistanceMatrix), count in flow only.
+    Nodes are `courses` (CourseNumb strings; default: every course with a meeting, sorted);
+    transitions involving other courses are left out.
+    """
+    if courses is None:
+        courses, course_codes = np.unique(columns["course"], return_inverse=True)
+    else:
+        courses = np.asarray(courses, dtype=str)
+        order = np.argsort(courses)
+        positions = np.searchsorted(courses, columns["course"], sorter=order).clip(max=len(courses) - 1)
+        course_codes = np.where(courses[order[positions]] == columns["course"], order[positions], -1)
+    buildings, building_codes = np.unique(columns["building"], return_inverse=True)
+    building_rows = np.array([distances.index.get(building, -1) for building in buildings], dtype=np.int64)[building_codes]
+
+    current, following = transition_pairs(columns, window)
+    known = (course_codes[current] >= 0) & (course_codes[following] >= 0)
+    current, following = current[known], following[known]
+    from_building, to_building = building_rows[current], building_rows[following]
+
+    # Distances and times of walks between two different known buildings; 0 otherwise
+    located = (from_building >= 0) & (to_building >= 0)
+    return FlowStore.from_pairs(
+        courses.tolist(),
+        course_codes[current],
+        course_codes[following],
+        distance_km=np.where(located, distances.distance_km[from_building, to_building], 0.0),
+        walking_min=np.where(located, distances.walking_time_min[from_building, to_building], 0.0)
+    )
+
+
+class RoomReassignmentSolver:
+    """
+    Bookings (course records sharing course, day, time and room) and their rooms, with the
+    student flows between bookings in a FlowStore (`flows`) and as weighted neighbour lists.
+    The objective is sum(students x building distance in km) over all flows.
+    Meeting `columns` (meeting_columns / snapshot_meeting_columns) may be given instead of students_info.
+    """
+
+    def __init__(self, campus, students_info, window=TRANSITION_WINDOW_MIN, columns=None):
+        self.campus = campus
+        room_positions = {room_key: i for i, room_key in enumerate(campus.availability.room_keys)}
+
+        # Sections meeting together in one room are indistinguishable in students_info and move as one booking
+        self.bookings = []
+        booking_index = {}
+        for course in campus.courses_info['courses']:
+            key = (
+                str(course['CourseNumb']), course['DayOfWeek'], time_to_minutes(course['StartTimeStr']),
+                time_to_minutes(course['EndTimeStr']), str(int(course['BuildingNumber'])), course['RoomNumber']
+            )
+            if key not in booking_index:
+                booking_index[key] = len(self.bookings)
+                self.bookings.append({
+                    "course_number": course['CourseNumb'],
+                    "day": course['DayOfWeek'],
+                    "start": key[2],
+                    "end": key[3],
+                    "num_students": 0,
+                    "records": []
+                })
+            booking = self.bookings[booking_index[key]]
+            booking["num_students"] += course['NumStudents']
+            booking["records"].append(course)
+
+        num_bookings = len(self.bookings)
+        self.num_students = np.array([booking["num_students"] for booking in self.bookings])
+        self.assignment = np.full(num_bookings, -1, dtype=np.int64)
+        for i, booking in enumerate(self.bookings):
+            course = booking["records"][0]
+            self.assignment[i] = room_positions.get((course['BuildingName'], course['RoomNumber']), -1)
+        # Bookings in a room missing from the campus (-1) are unplaced: they never move and their flows
+        # have no length, like those of bookings in a room without a known location, which stay where they are
+        placed = self.assignment >= 0
+        self.movable = placed & campus.room_eligible[np.where(placed, self.assignment, 0)]
+        self.target_rooms = np.flatnonzero(campus.room_eligible)
+        self.initial_assignment = self.assignment.copy()
+
+        # Room position -> set of booking indices currently held there
+        self.room_bookings = [set() for _ in campus.availability.room_keys]
+        for i in np.flatnonzero(placed).tolist():
+            self.room_bookings[self.assignment[i]].add(i)
+
+        # Student flows between bookings, from students_info unless its meeting columns are given
+        if columns is None:
+            columns = meeting_columns(students_info)
+        current, following = transition_pairs(columns, window)
+        meeting_bookings = np.array([
+            booking_index.get(key, -1)
+            for key in zip(
+                columns["course"].tolist(), columns["day"].tolist(), columns["start"].tolist(),
+                columns["end"].tolist(), columns["building"].tolist(), columns["room"].tolist()
+            )
+        ], dtype=np.int64)
+        sources, targets = meeting_bookings[current], meeting_bookings[following]
+        matched = (sources >= 0) & (targets >= 0) & (sources != targets)
+        self.unmatched_transitions = int(np.count_nonzero(~matched))
+        self.flows = FlowStore.from_pairs(range(num_bookings), sources[matched], targets[matched])
+
+        # Directed edge weights for the objective, and symmetric neighbour lists for move deltas
+        flow = self.flows["flow"].tocoo()
+        self.flow_src = flow.row.astype(np.int64)
+        self.flow_dst = flow.col.astype(np.int64)
+        self.flow_weight = flow.data.astype(float)
+        neighbours = (self.flows["flow"] + self.flows["flow"].T).tocsr()
+        self.neighbour_index = np.split(neighbours.indices.astype(np.int64), neighbours.indptr[1:-1])
+        self.neighbour_weight = np.split(neighbours.data.astype(float), neighbours.indptr[1:-1])
+
+    def objective(self, assignment=None):
+        """
+        Total students x km over all flows for `assignment` (default: the current one).
+        """
+        buildings = self.booking_buildings(assignment)
+        source, target = buildings[self.flow_src], buildings[self.flow_dst]
+        located = (source >= 0) & (target >= 0)
+        return float(np.sum(self.flow_weight[located] * self.campus.distances.distance_km[source[located], target[located]]))
+
+    def booking_buildings(self, assignment=None):
+        """
+        Row in `distances` of each booking's building for `assignment` (default: the current one);
+        -1 for unplaced bookings and for rooms without a known location.
+        """
+        assignment = self.assignment if assignment is None else assignment
+        return self._room_buildings(assignment)
+
+    def _room_buildings(self, rooms):
+        # Room position -1 (no room) must not wrap around to the last room
+        return np.where(rooms >= 0, self.campus.room_building[rooms], -1)
+
+    def _building(self, booking):
+        building = int(self._room_buildings(self.assignment[booking]))
+        if building < 0:
+            raise ValueError(f"Booking {booking} is not held in a room with a known location")
+        return building
+
+    def _neighbours(self, booking):
+        # (index, weight, building) of the booking's neighbours held in a located room
+        index = self.neighbour_index[booking]
+        buildings = self._room_buildings(self.assignment[index])
+        located = buildings >= 0
+        return index[located], self.neighbour_weight[booking][located], buildings[located]
+
+    def building_flows(self, assignment=None):
+        """
+        The booking flows summed per building pair for `assignment` (default: the current one).
+        """
+        building_ids = np.array(self.campus.distances.building_ids + ["unknown"])
+        return self.flows.aggregate(building_ids[self.booking_buildings(assignment)])
+
+    def fits(self, booking, room, ignore=None):
+        """
+        True if `booking` may be held in `room`: big enough and no overlapping booking there
+        on the same day, other than `booking` itself and `ignore`.
+        """
+        if not self.campus.room_eligible[room] or self.campus.room_capacity[room] < self.num_students[booking]:
+            return False
+        b = self.bookings[booking]
+        for other in self.room_bookings[room]:
+            if other == booking or other == ignore:
+                continue
+            o = self.bookings[other]
+            if o["day"] == b["day"] and o["start"] < b["end"] and b["start"] < o["end"]:
+                return False
+        return True
+
+    def move_delta(self, booking, room):
+        """
+        Objective change from moving `booking` to `room`, from its own flows only.
+        Both rooms must have a known location.
+        """
+        distance_km = self.campus.distances.distance_km
+        old_building = self._building(booking)
+        new_building = self.campus.room_building[room]
+        if new_building < 0:
+            raise ValueError(f"Room {room} has no known location")
+        if old_building == new_building:
+            return 0.0
+        _, weights, neighbour_buildings = self._neighbours(booking)
+        return float(np.dot(
+            weights, distance_km[new_building, neighbour_buildings] - distance_km[old_building, neighbour_buildings]
+        ))
+
+    def swap_delta(self, booking1, booking2):
+        """
+        Objective change from exchanging the rooms of two bookings. A flow between the two keeps its
+        length (distances are symmetric), so only their other neighbours are priced.
+        """
+        distance_km = self.campus.distances.distance_km
+        building1, building2 = self._building(booking1), self._building(booking2)
+        if building1 == building2:
+            return 0.0
+        delta = 0.0
+        for booking, old_building, new_building, other in (
+            (booking1, building1, building2, booking2),
+            (booking2, building2, building1, booking1)
+        ):
+            index, weights, neighbour_buildings = self._neighbours(booking)
+            keep = index != other
+            delta += float(np.dot(
+                weights[keep],
+                distance_km[new_building, neighbour_buildings[keep]] - distance_km[old_building, neighbour_buildings[keep]]
+            ))
+        return delta
+
+    def best_move(self, booking):
+        """
+        (room, objective change) of the cheapest room `booking` fits in other than its own, ties going
+        to the first room in room order, or None if it fits nowhere else.
+        """
+        rooms = self.target_rooms[self.campus.room_capacity[self.target_rooms] >= self.num_students[booking]]
+        rooms = np.array([
+            room for room in rooms.tolist() if room != self.assignment[booking] and self.fits(booking, room)
+        ], dtype=np.int64)
+        if len(rooms) == 0:
+            return None
+        distance_km = self.campus.distances.distance_km
+        old_building = self._building(booking)
+        _, weights, neighbour_buildings = self._neighbours(booking)
+        deltas = (
+            distance_km[self.campus.room_building[rooms]][:, neighbour_buildings] - distance_km[old_building, neighbour_buildings]
+        ) @ weights
+        best = int(np.argmin(deltas))
+        return int(rooms[best]), float(deltas[best])
+
+    def fork(self, campus=None):
+        """
+        A solver over `campus` (default: the same one, e.g. a CampusOverlay with its own room columns)
+        that shares this one's bookings, flows and initial assignment, which are never modified, and
+        copies only the current assignment and room occupancy, so forks can move bookings independently.
+        """
+        fork = copy.copy(self)
+        fork.campus = self.campus if campus is None else campus
+        fork.assignment = self.assignment.copy()
+        fork.room_bookings = [set(bookings) for bookings in self.room_bookings]
+        fork.target_rooms = np.flatnonzero(fork.campus.room_eligible)
+        return fork
+
+    def _assign(self, booking, room):
+        if self.assignment[booking] >= 0:
+            self.room_bookings[self.assignment[booking]].discard(booking)
+        self.room_bookings[room].add(booking)
+        self.assignment[booking] = room
+
+    def _propose(self, rng, swap_rate):
+        # Returns (delta, apply) for a feasible random move or swap, or None
+        movable = np.flatnonzero(self.movable)
+        booking = int(movable[rng.integers(len(movable))])
+        if rng.random() < swap_rate:
+            other = int(movable[rng.integers(len(movable))])
+            room, other_room = self.assignment[booking], self.assignment[other]
+            if room == other_room or not self.fits(booking, other_room, ignore=other) or not self.fits(other, room, ignore=booking):
+                return None
+
+            def apply():
+                self._assign(booking, other_room)
+                self._assign(other, room)
+            return self.swap_delta(booking, other), apply
+
+        room = int(self.target_rooms[rng.integers(len(self.target_rooms))])
+        if room == self.assignment[booking] or not self.fits(booking, room):
+            return None
+        return self.move_delta(booking, room), lambda: self._assign(booking, room)
+
+    def anneal(
+        self,
+        iterations=20000,
+        seed=0,
+        t_start=None,
+        t_end_ratio=1e-3,
+        swap_rate=0.5,
+        log_every=1000,
+        callback=None
+    ):
+        """
+        Simulated annealing from the current assignment with geometric cooling from `t_start`
+        (default: the mean |delta| of a sample of feasible proposals) down to `t_start * t_end_ratio`.
+        Every `log_every` iterations a history entry with the wall time and objective is recorded
+        and passed to `callback`. Ends on the best assignment found.
+        Returns {"objective_before", "objective", "iterations", "wall_time_s", "history"}.
+        """
+        rng = np.random.default_rng(seed)
+        started = time.perf_counter()
+        objective = self.objective()
+        objective_before = objective
+        best_objective, best_assignment = objective, self.assignment.copy()
+        history = []
+
+        if t_start is None:
+            sample = [p[0] for p in (self._propose(rng, swap_rate) for _ in range(500)) if p is not None and p[0] != 0]
+            t_start = float(np.mean(np.abs(sample))) if sample else 1.0
+        temperature = t_start
+        cooling = t_end_ratio ** (1.0 / max(iterations, 1))
+        accepted = proposed = 0
+
+        for iteration in range(1, iterations + 1):
+            proposal = self._propose(rng, swap_rate)
+            if proposal is not None:
+                proposed += 1
+                delta, apply = proposal
+                if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+                    apply()
+                    accepted += 1
+                    objective += delta
+                    if objective < best_objective - 1e-12:
+                        best_objective, best_assignment = objective, self.assignment.copy()
+            temperature *= cooling
+
+            if iteration % log_every == 0 or iteration == iterations:
+                entry = {
+                    "iteration": iteration,
+                    "wall_time_s": time.perf_counter() - started,
+                    "objective": objective,
+                    "best_objective": best_objective,
+                    "temperature": temperature,
+                    "proposed": proposed,
+                    "accepted": accepted
+                }
+                history.append(entry)
+                if callback is not None:
+                    callback(entry)
+
+        for booking, room in enumerate(best_assignment):
+            if room != self.assignment[booking]:
+                self._assign(booking, room)
+
+        return {
+            "objective_before": objective_before,
+            # Recomputed in full so accumulated deltas cannot drift
+            "objective": self.objective(),
+            "iterations": iterations,
+            "wall_time_s": time.perf_counter() - started,
+            "history": history
+        }
+
+    def changes(self):
+        """
+        One entry per booking whose room differs from the initial assignment.
+        """
+        room_keys = self.campus.availability.room_keys
+        changes = []
+        for booking in np.flatnonzero(self.assignment != self.initial_assignment):
+            b = self.bookings[booking]
+            changes.append({
+                "course_number": b["course_number"],
+                "sections": [course['SectionNumb'] for course in b["records"]],
+                "day": b["day"],
+                "start_time": b["records"][0]['StartTimeStr'],
+                "end_time": b["records"][0]['EndTimeStr'],
+                "num_students": int(b["num_students"]),
+                # Unplaced bookings had no room to move from
+                "from": dict(zip(("building", "room"), room_keys[self.initial_assignment[booking]])) if self.initial_assignment[booking] >= 0 else None,
+                "to": dict(zip(("building", "room"), room_keys[self.assignment[booking]]))
+            })
+        return changes
+
+    def reassigned_courses_info(self):
+        """
+        A copy of courses_info with every record placed in its booking's current room.
+        """
+        room_keys = self.campus.availability.room_keys
+        courses = []
+        for booking, room in zip(self.bookings, self.assignment):
+            if room < 0:
+                # Unplaced bookings keep the rooms they were given
+                courses.extend(booking["records"])
+                continue
+            building, room_number = room_keys[room]
+            building_id = self.campus.buildings[building][0]
+            for course in booking["records"]:
+                courses.append({
+                    **course,
+                    "BuildingName": building,
+                    "BuildingNumber": float(building_id),
+                    "RoomNumber": room_number,
+                    "RoomCapacity": self.campus.rooms[(building, room_number)]['room_capacity']
+                })
+        return {**self.campus.courses_info, "courses": courses}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Reassign all course meetings to rooms to minimize student walking.")
+    parser.add_argument("--data_dir", type=str, default="./data", help="Directory with the campus JSON files.")
+    parser.add_argument("--snapshot", type=str, default=None, help="Compiled campus snapshot to load instead of the JSON files.")
+    parser.add_argument("--iterations", type=int, default=20000, help="Annealing iterations.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument("--swap_rate", type=float, default=0.5, help="Share of proposals that swap two bookings.")
+    parser.add_argument("--log_every", type=int, default=1000, help="Iterations between progress lines.")
+    parser.add_argument("--output", type=str, default="./data/solver_output.json", help="Output file.")
+    args = parser.parse_args()
+
+    if args.snapshot:
+        snapshot = CampusSnapshot(args.snapshot)
+        campus = CampusIndex.from_snapshot(snapshot)
+        columns = snapshot_meeting_columns(snapshot)
+        students_info = None
+    else:
+        campus = CampusIndex.from_json(args.data_dir)
+        with open(f"{args.data_dir}/students_info.json", "r") as f:
+            students_info = json.load(f)
+        columns = None
+
+    solver = RoomReassignmentSolver(campus, students_info, columns=columns)
+    result = solver.anneal(
+        iterations=args.iterations,
+        seed=args.seed,
+        swap_rate=args.swap_rate,
+        log_every=args.log_every,
+        callback=lambda entry: print(json.dumps(entry), file=sys.stderr)
+    )
+    result["unmatched_transitions"] = solver.unmatched_transitions
+    result["changes"] = solver.changes()
+
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=4)
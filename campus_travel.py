@@ -0,0 +1,263 @@
+"""
+Offline travel times over a campus walkway graph, as a drop-in for the straight-line BuildingDistanceMatrix.
+
+A walkway file is JSON with the graph nodes, the undirected edges between them and, optionally, the
+building entrances and per-building stair/elevator data:
+
+    {
+        "nodes": {"n1": {"lat": 30.6151, "lon": -96.3405}, ...},
+        "edges": [{"from": "n1", "to": "n2", "length_m": 84.0, "modes": ["walk", "bicycle"]}, ...],
+        "entrances": {"<building id>": ["n1", ...]},
+        "floors": {"stairs_min": 0.25, "elevator_min": 0.1, "elevator_wait_min": 1.0},
+        "buildings": {"<building id>": {"elevator": true}}
+    }
+
+An edge's `length_m` defaults to the straight line between its nodes and its `modes` to ["walk"].
+A building without listed entrances is entered at the graph node nearest to its building_loc position.
+WalkwayGraph runs one multi-source Dijkstra per building and travel mode; TravelTimeTable keeps the
+results as (building x node) arrays, persisted next to the walkway file, so ranking only does array
+lookups and an ad-hoc origin is one nearest-node lookup away. No online routing service is used.
+"""
+import hashlib
+import heapq
+import json
+import os
+
+import numpy as np
+
+from course_timetabling import (
+    TRAVEL_MODE_MIX,
+    TRAVEL_SPEEDS_MPS,
+    WALKING_SPEED_MPS,
+    BuildingDistanceMatrix,
+    haversine_distance_array,
+)
+
+# Minutes per floor climbed by stairs or ridden by elevator, and the wait for an elevator
+FLOOR_DEFAULTS = {"stairs_min": 0.25, "elevator_min": 0.1, "elevator_wait_min": 1.0}
+
+
+def _dijkstra(adjacency, sources):
+    """
+    Cheapest cost from any of `sources` ([(node, starting cost), ...]) to every node of `adjacency`
+    ([[(neighbour, edge cost), ...] per node]); unreachable nodes cost inf.
+    """
+    costs = [float("inf")] * len(adjacency)
+    heap = []
+    for node, cost in sources:
+        if cost < costs[node]:
+            costs[node] = cost
+            heap.append((cost, node))
+    heapq.heapify(heap)
+    while heap:
+        cost, node = heapq.heappop(heap)
+        if cost > costs[node]:
+            continue  # Stale entry, the node was reached more cheaply since
+        for neighbour, weight in adjacency[node]:
+            candidate = cost + weight
+            if candidate < costs[neighbour]:
+                costs[neighbour] = candidate
+                heapq.heappush(heap, (candidate, neighbour))
+    return np.array(costs)
+
+
+class WalkwayGraph:
+    """
+    A parsed walkway file: node coordinates, one adjacency list per travel mode and the floor settings.
+    In the layer of a mode, an edge open to that mode is crossed at its speed, an edge open only to
+    walkers at walking speed (bicycles are pushed, bus riders walk to the stop), and other edges not at all.
+    The walk layer is weighted in kilometers, the others in minutes.
+    """
+
+    def __init__(self, walkways):
+        self.walkways = walkways
+        self.node_ids = list(walkways['nodes'])
+        self.node_index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self.lat = np.array([walkways['nodes'][node_id]['lat'] for node_id in self.node_ids], dtype=float)
+        self.lon = np.array([walkways['nodes'][node_id]['lon'] for node_id in self.node_ids], dtype=float)
+
+        self.layers = {mode: [[] for _ in self.node_ids] for mode in TRAVEL_SPEEDS_MPS}
+        for edge in walkways['edges']:
+            i, j = self.node_index[edge['from']], self.node_index[edge['to']]
+            length_km = edge['length_m'] / 1000 if 'length_m' in edge else float(
+                haversine_distance_array(self.lat[i], self.lon[i], self.lat[j], self.lon[j])
+            )
+            modes = edge.get('modes', ["walk"])
+            for mode, speed_mps in TRAVEL_SPEEDS_MPS.items():
+                if mode not in modes:
+                    if "walk" not in modes:
+                        continue
+                    speed_mps = WALKING_SPEED_MPS
+                cost = length_km if mode == "walk" else length_km * 1000 / speed_mps / 60
+                self.layers[mode][i].append((j, cost))
+                self.layers[mode][j].append((i, cost))
+
+        self.floors = {**FLOOR_DEFAULTS, **walkways.get('floors', {})}
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def nearest_node(self, lat, lon):
+        """
+        (node position, straight-line distance in km) of the graph node nearest to a location.
+        """
+        distances = haversine_distance_array(lat, lon, self.lat, self.lon)
+        node = int(distances.argmin())
+        return node, float(distances[node])
+
+    def entries(self, building_id, building_data):
+        """
+        [(node position, access distance in km), ...] through which a building is entered.
+        """
+        entrances = self.walkways.get('entrances', {}).get(building_id)
+        if entrances:
+            return [(self.node_index[node_id], 0.0) for node_id in entrances]
+        return [self.nearest_node(building_data['lat'], building_data['lon'])]
+
+    def building_tables(self, building_loc):
+        """
+        Everything a TravelTimeTable is built from, as a dict of arrays: per building, the network
+        distance (km) and every mode's travel time (minutes) to every node, the entries flattened
+        as (building row, node, access km), and the stair/elevator settings.
+        """
+        building_ids = list(building_loc)
+        entries = [self.entries(building_id, building_loc[building_id]) for building_id in building_ids]
+        tables = {
+            "entry_building": np.repeat(np.arange(len(building_ids)), [len(entry) for entry in entries]),
+            "entry_node": np.array([node for entry in entries for node, _ in entry], dtype=np.int64),
+            "entry_access_km": np.array([access_km for entry in entries for _, access_km in entry])
+        }
+        for mode, adjacency in self.layers.items():
+            # The access walk to an entrance is on foot in every layer
+            to_cost = (lambda km: km) if mode == "walk" else (lambda km: km * 1000 / WALKING_SPEED_MPS / 60)
+            tables[f"node_{mode}"] = np.array([
+                _dijkstra(adjacency, [(node, to_cost(access_km)) for node, access_km in entry]) for entry in entries
+            ]).reshape(len(building_ids), len(self.node_ids))
+
+        building_settings = [self.walkways.get('buildings', {}).get(building_id, {}) for building_id in building_ids]
+        for name, default in self.floors.items():
+            tables[name] = np.array([settings.get(name, default) for settings in building_settings], dtype=float)
+        tables["elevator"] = np.array([bool(settings.get('elevator', False)) for settings in building_settings])
+        tables["node_lat"], tables["node_lon"] = self.lat, self.lon
+        return tables
+
+
+class TravelTimeTable(BuildingDistanceMatrix):
+    """
+    BuildingDistanceMatrix over a walkway graph: `distance_km` holds network distances and
+    `walking_time_min` the travel times of one mode ("walk", "bicycle", "bus", or "mix" for the
+    TRAVEL_MODE_MIX weighted average), both between building entrances. Origin rows snap the origin
+    to its nearest graph node, and vertical_minutes adds the stair/elevator time to a room's floor.
+    """
+
+    def __init__(self, building_loc, tables, mode="walk", max_origins=4096):
+        self.tables = tables
+        self.mode = mode
+        self.node_lat, self.node_lon = tables["node_lat"], tables["node_lon"]
+
+        # Cost of reaching node n from building b, in the units of each layer
+        self.node_distance_km = tables["node_walk"]
+        if mode == "walk":
+            self.node_time_min = tables["node_walk"] * 1000 / WALKING_SPEED_MPS / 60
+        elif mode == "mix":
+            self.node_time_min = sum(
+                ratio * (tables["node_walk"] * 1000 / WALKING_SPEED_MPS / 60 if layer == "walk" else tables[f"node_{layer}"])
+                for layer, ratio in TRAVEL_MODE_MIX.items()
+            )
+        else:
+            self.node_time_min = tables[f"node_{mode}"]
+
+        distance_km = self._building_matrix(self.node_distance_km, tables["entry_access_km"])
+        if not np.isfinite(distance_km).all():
+            raise ValueError("The walkway graph does not connect every pair of buildings")
+        super().__init__(building_loc, distance_km=distance_km, max_origins=max_origins)
+        self.walking_time_min = self._building_matrix(
+            self.node_time_min, tables["entry_access_km"] * 1000 / WALKING_SPEED_MPS / 60
+        )
+
+    def _building_matrix(self, node_costs, access_costs):
+        # Building b -> building c is the cheapest way from b to any entry node of c plus its access walk
+        tables = self.tables
+        through_entries = node_costs[:, tables["entry_node"]] + access_costs
+        starts = np.flatnonzero(np.r_[True, tables["entry_building"][1:] != tables["entry_building"][:-1]])
+        matrix = np.minimum.reduceat(through_entries, starts, axis=1)
+        np.fill_diagonal(matrix, 0.0)
+        return matrix
+
+    @staticmethod
+    def digest(building_loc, walkways_path):
+        """
+        Content hash of building_loc and the walkway file; persisted tables are only reused when this matches.
+        """
+        with open(walkways_path, 'rb') as f:
+            walkways = f.read()
+        return hashlib.sha256(json.dumps(building_loc, sort_keys=True).encode() + walkways).hexdigest()
+
+    @classmethod
+    def cached(cls, building_loc, walkways_path, mode="walk", cache_path=None):
+        """
+        Load the tables persisted at `cache_path` (default: cache/<walkway file name>.npz next to the
+        walkway file) if they were built from the same building_loc and walkway file contents,
+        otherwise run the shortest-path searches and persist their results there.
+        Every mode's layer is persisted, so switching `mode` never reruns the searches.
+        """
+        if cache_path is None:
+            walkways_dir, walkways_name = os.path.split(walkways_path)
+            cache_path = os.path.join(walkways_dir, "cache", f"{os.path.splitext(walkways_name)[0]}.npz")
+        digest = cls.digest(building_loc, walkways_path)
+        try:
+            with np.load(cache_path) as cached:
+                if str(cached['digest']) == digest and cached['building_ids'].tolist() == list(building_loc):
+                    return cls(building_loc, {name: cached[name] for name in cached.files}, mode)
+        except (OSError, KeyError, ValueError):
+            pass  # Missing, stale or unreadable cache: rebuild below
+
+        tables = WalkwayGraph.load(walkways_path).building_tables(building_loc)
+        try:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            # Write then rename so concurrent readers never see a partial file
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, digest=np.array(digest), building_ids=np.array(list(building_loc)), **tables)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass  # A read-only directory only costs a rebuild next time
+        return cls(building_loc, tables, mode)
+
+    def origin_row(self, lat, lon):
+        """
+        (network distances in km, travel times in minutes) from an arbitrary location to every building,
+        walking straight to the nearest graph node first.
+        """
+        key = (lat, lon)
+        row = self._origin_rows.get(key)
+        if row is None:
+            access_km = haversine_distance_array(lat, lon, self.node_lat, self.node_lon)
+            node = int(access_km.argmin())
+            access_km = float(access_km[node])
+            row = (
+                self.node_distance_km[:, node] + access_km,
+                self.node_time_min[:, node] + access_km * 1000 / WALKING_SPEED_MPS / 60
+            )
+            with self._origin_lock:
+                if len(self._origin_rows) >= self.max_origins:
+                    self._origin_rows.pop(next(iter(self._origin_rows)))  # Drop the oldest origin
+                self._origin_rows[key] = row
+        return row
+
+    def vertical_minutes(self, building_rows, floors):
+        """
+        Minutes between a building's entrance and a floor (the ground floor being 1), by stairs or,
+        where the building has one, by elevator when that is quicker.
+        """
+        levels = np.abs(np.asarray(floors) - 1)
+        tables = self.tables
+        stairs = tables["stairs_min"][building_rows] * levels
+        elevator = np.where(
+            tables["elevator"][building_rows] & (levels > 0),
+            tables["elevator_wait_min"][building_rows] + tables["elevator_min"][building_rows] * levels,
+            np.inf
+        )
+        return np.minimum(stairs, elevator)
@@ -1,11 +1,25 @@
 import numpy as np
 import json
-from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
 from math import radians, sin, cos, sqrt, atan2
-import copy
 import argparse
+import hashlib
+import os
+import shutil
+import sys
+import threading
+from bisect import bisect_left, insort
+from heapq import heappop, heappush
+from collections import OrderedDict
+from operator import attrgetter
+
+from campus_metrics import METRICS
+
+# Walking speed in m/s
+WALKING_SPEED_MPS = 1.4
+# Speeds (m/s) of the travel modes, and the share of students using each (the notebook's mode mix)
+TRAVEL_SPEEDS_MPS = {"walk": WALKING_SPEED_MPS, "bicycle": 5.0, "bus": 15.0}
+TRAVEL_MODE_MIX = {"walk": 0.7, "bicycle": 0.2, "bus": 0.1}
+TRAVEL_MODES = list(TRAVEL_SPEEDS_MPS) + ["mix"]
 
 
 def haversine_distance(coord1, coord2):
@@ -17,16 +31,1036 @@ def haversine_distance(coord1, coord2):
     c = 2 * atan2(sqrt(a), sqrt(1 - a))
     return R * c  # Distance in kilometers
 
-def find_alternative_classrooms(c1_id, c2_id, input_data, topk=10, origin_location=None):
+
+def haversine_distance_array(lat, lon, lats, lons):
+    """
+    Vectorized haversine_distance from one point to arrays of latitudes/longitudes, in kilometers.
+    """
+    R = 6371.0  # Earth radius in kilometers
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    dlat, dlon = lat2 - lat1, lon2 - lon1
+    a = np.sin(dlat / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return R * c
+
+
+def travel_speed_mps(mode):
+    """
+    Straight-line speed of a travel mode; for "mix", the speed giving the TRAVEL_MODE_MIX weighted travel time.
+    """
+    if mode == "mix":
+        return 1 / sum(ratio / TRAVEL_SPEEDS_MPS[layer] for layer, ratio in TRAVEL_MODE_MIX.items())
+    return TRAVEL_SPEEDS_MPS[mode]
+
+
+def room_floor(room_number):
+    """
+    Floor heuristic used throughout: the first digit of the room number, defaulting to 1.
+    """
+    return int(room_number[0]) if room_number[0].isdigit() else 1
+
+
+class BuildingDistanceMatrix:
+    """
+    Precomputed building-to-building haversine distances (km) and walking times (minutes),
+    indexed by building_loc id. Rows for ad-hoc origins are computed on demand and memoized.
+    """
+
+    def __init__(self, building_loc, distance_km=None, walking_speed_mps=WALKING_SPEED_MPS, max_origins=4096):
+        self.building_ids = list(building_loc.keys())
+        self.index = {building_id: i for i, building_id in enumerate(self.building_ids)}
+        self.lat = np.array([building_loc[building_id]['lat'] for building_id in self.building_ids], dtype=float)
+        self.lon = np.array([building_loc[building_id]['lon'] for building_id in self.building_ids], dtype=float)
+        self.walking_speed_mps = walking_speed_mps
+
+        if distance_km is None:
+            distance_km = np.array(
+                [haversine_distance_array(lat, lon, self.lat, self.lon) for lat, lon in zip(self.lat, self.lon)]
+            ).reshape(len(self.building_ids), len(self.building_ids))
+        self.distance_km = distance_km
+        self.walking_time_min = self.distance_km * 1000 / walking_speed_mps / 60
+
+        self.max_origins = max_origins
+        self._origin_rows = {}
+        self._origin_lock = threading.Lock()  # Rows may be requested from several threads (see reschedule_service)
+
+    @staticmethod
+    def digest(building_loc):
+        """
+        Content hash of building_loc; a persisted matrix is only reused when this matches.
+        """
+        return hashlib.sha256(json.dumps(building_loc, sort_keys=True).encode()).hexdigest()
+
+    @classmethod
+    def cached(cls, building_loc, cache_path, walking_speed_mps=WALKING_SPEED_MPS):
+        """
+        Load the matrix persisted at `cache_path` if it was built from the same building_loc contents,
+        otherwise rebuild it and persist it there.
+        """
+        digest = cls.digest(building_loc)
+        try:
+            with np.load(cache_path) as cached:
+                if str(cached['digest']) == digest and cached['building_ids'].tolist() == list(building_loc):
+                    return cls(building_loc, distance_km=cached['distance_km'], walking_speed_mps=walking_speed_mps)
+        except (OSError, KeyError, ValueError):
+            pass  # Missing, stale or unreadable cache: rebuild below
+
+        matrix = cls(building_loc, walking_speed_mps=walking_speed_mps)
+        try:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            # Write then rename so concurrent readers never see a partial file
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, digest=np.array(digest), building_ids=np.array(matrix.building_ids), distance_km=matrix.distance_km)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass  # A read-only data directory only costs a rebuild next time
+        return matrix
+
+    def distance(self, building_id1, building_id2):
+        """
+        Distance in kilometers between two buildings given by building_loc id.
+        """
+        return float(self.distance_km[self.index[building_id1], self.index[building_id2]])
+
+    def building_row(self, building_id):
+        """
+        (distances in km, walking times in minutes) from a building to every building.
+        """
+        i = self.index[building_id]
+        return self.distance_km[i], self.walking_time_min[i]
+
+    def origin_row(self, lat, lon):
+        """
+        (distances in km, walking times in minutes) from an arbitrary location to every building.
+        """
+        key = (lat, lon)
+        row = self._origin_rows.get(key)
+        if row is None:
+            distance_row = haversine_distance_array(lat, lon, self.lat, self.lon)
+            row = (distance_row, distance_row * 1000 / self.walking_speed_mps / 60)
+            with self._origin_lock:
+                if len(self._origin_rows) >= self.max_origins:
+                    self._origin_rows.pop(next(iter(self._origin_rows)))  # Drop the oldest origin
+                self._origin_rows[key] = row
+        return row
+
+    def vertical_minutes(self, building_rows, floors):
+        """
+        Minutes between a building's entrance and a floor; straight-line travel has no floor penalty
+        (see campus_travel.TravelTimeTable for one that does).
+        """
+        return np.zeros(np.shape(floors))
+
+
+class BuildingGrid:
+    """
+    Uniform grid of `cell_m`-metre cells over building locations, answering radius and nearest-first
+    queries by visiting rings of cells outward from the query point, so only nearby buildings are measured.
+    """
+
+    def __init__(self, lat, lon, cell_m=250.0):
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.cell_m = cell_m
+        # Projected at the latitude farthest from the equator, so grid distances never exceed true ones
+        self.cos_lat0 = float(np.cos(np.radians(np.abs(self.lat).max()))) if len(self.lat) else 1.0
+
+        # (cell x, cell y) -> building rows in that cell
+        self.cells = {}
+        cell_x, cell_y = self._cell(self.lat, self.lon)
+        for row, cell in enumerate(zip(cell_x.tolist(), cell_y.tolist())):
+            self.cells.setdefault(cell, []).append(row)
+        self.bounds = (cell_x.min(), cell_x.max(), cell_y.min(), cell_y.max()) if len(self.lat) else (0, -1, 0, -1)
+
+    def _cell(self, lat, lon):
+        x = np.radians(lon) * self.cos_lat0 * 6371000.0
+        y = np.radians(lat) * 6371000.0
+        return np.floor(x / self.cell_m).astype(np.int64), np.floor(y / self.cell_m).astype(np.int64)
+
+    def _ring(self, x, y, ring):
+        # Occupied cells at Chebyshev distance `ring` from (x, y), clipped to the grid bounds
+        min_x, max_x, min_y, max_y = self.bounds
+        cells = []
+        for cell_y in (y - ring, y + ring) if ring else (y,):
+            if min_y <= cell_y <= max_y:
+                cells.extend((cell_x, cell_y) for cell_x in range(max(x - ring, min_x), min(x + ring, max_x) + 1))
+        for cell_x in (x - ring, x + ring) if ring else ():
+            if min_x <= cell_x <= max_x:
+                cells.extend((cell_x, cell_y) for cell_y in range(max(y - ring + 1, min_y), min(y + ring - 1, max_y) + 1))
+        return [self.cells[cell] for cell in cells if cell in self.cells]
+
+    def nearest(self, lat, lon, max_distance_m=None):
+        """
+        Yield (building row, haversine distance in metres) nearest first, up to `max_distance_m` if given.
+        Rings are only searched as far as the caller keeps iterating, so stopping after k buildings
+        (or at the radius) leaves the rest of the grid untouched.
+        """
+        x, y = (int(value[0]) for value in self._cell(np.array([lat]), np.array([lon])))
+        min_x, max_x, min_y, max_y = self.bounds
+        first_ring = max(0, min_x - x, x - max_x, min_y - y, y - max_y)
+        last_ring = max(x - min_x, max_x - x, y - min_y, max_y - y)
+        # A query nearer the pole than every building sees east-west gaps shrink by this much
+        shrink = min(1.0, float(np.cos(np.radians(lat))) / self.cos_lat0)
+
+        heap = []
+        for ring in range(first_ring, last_ring + 1):
+            for rows in self._ring(x, y, ring):
+                distances = haversine_distance_array(lat, lon, self.lat[rows], self.lon[rows]) * 1000
+                for row, distance in zip(rows, distances.tolist()):
+                    heappush(heap, (distance, row))
+            # Buildings in later rings are at least this far away, so everything closer is final
+            bound = ring * self.cell_m * shrink
+            while heap and heap[0][0] <= bound:
+                distance, row = heappop(heap)
+                if max_distance_m is not None and distance > max_distance_m:
+                    return
+                yield row, distance
+            if max_distance_m is not None and bound > max_distance_m:
+                return
+        while heap:
+            distance, row = heappop(heap)
+            if max_distance_m is not None and distance > max_distance_m:
+                return
+            yield row, distance
+
+    def within(self, lat, lon, radius_m):
+        """
+        [(building row, distance in metres), ...] of the buildings within `radius_m` metres, nearest first.
+        """
+        return list(self.nearest(lat, lon, radius_m))
+
+
+def time_to_minutes(time_str):
+    """
+    Convert an "HH:MM" string to minutes after midnight.
+    """
+    hours, minutes = time_str.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def minutes_to_time(minutes):
+    """
+    Convert minutes after midnight to an "HH:MM" string (the inverse of time_to_minutes).
+    """
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _matching_schedules(schedules, day, start, end):
+    # Positions of the room_timetable schedules on `day` from `start` to `end` (minutes)
+    return (
+        i for i, schedule in enumerate(schedules)
+        if schedule['DayOfWeek'] == day
+        and (time_to_minutes(schedule['StartTime']), time_to_minutes(schedule['EndTime'])) == (start, end)
+    )
+
+
+class RoomAvailability:
+    """
+    Room bookings from room_timetable, stored per room and per day of the week as integer-minute
+    intervals sorted by start time. A running maximum of the end times lets a free/busy check
+    for any time window be answered with a single bisect per room.
+    """
+
+    def __init__(self, room_timetable):
+        # Bumped whenever bookings change, so derived caches know to drop stale results
+        self.version = 0
+        self.load(room_timetable)
+
+    def load(self, room_timetable):
+        """
+        (Re)build the index from a room_timetable mapping.
+        """
+        # Rooms in room_timetable order, so candidate lists keep their original ordering
+        self.room_keys = []
+        # (building, room) -> position in room_keys
+        self.room_positions = {}
+        # (building, room) -> {day: sorted [(start, end), ...]}
+        self.bookings = {}
+        # (building, room) -> {day: (starts, running max of ends)}
+        self._index = {}
+        self.version += 1
+
+        for building, rooms in room_timetable.items():
+            for room, schedules in rooms.items():
+                room_key = (building, room)
+                self.room_positions[room_key] = len(self.room_keys)
+                self.room_keys.append(room_key)
+                days = self.bookings.setdefault(room_key, {})
+                for schedule in schedules:
+                    days.setdefault(schedule['DayOfWeek'], []).append(
+                        (time_to_minutes(schedule['StartTime']), time_to_minutes(schedule['EndTime']))
+                    )
+                for day, intervals in days.items():
+                    intervals.sort()
+                    self._reindex(room_key, day)
+
+    def _reindex(self, room_key, day):
+        intervals = self.bookings[room_key][day]
+        starts, max_ends = [], []
+        max_end = -1
+        for start, end in intervals:
+            max_end = max(max_end, end)
+            starts.append(start)
+            max_ends.append(max_end)
+        self._index.setdefault(room_key, {})[day] = (starts, max_ends)
+
+    def add_booking(self, room_key, day, start, end):
+        """
+        Book the room on `day` from `start` to `end` (minutes after midnight), reindexing that day only.
+        Unlike load(), this leaves `version` alone: callers invalidate the affected cached rankings themselves.
+        """
+        insort(self.bookings[room_key].setdefault(day, []), (start, end))
+        self._reindex(room_key, day)
+
+    def remove_booking(self, room_key, day, start, end):
+        """
+        Remove one booking of the room on `day` from `start` to `end`; ValueError if there is none.
+        """
+        intervals = self.bookings[room_key].get(day, [])
+        i = bisect_left(intervals, (start, end))
+        if i == len(intervals) or intervals[i] != (start, end):
+            raise ValueError(f"No booking of {room_key} on {day} from {start} to {end}")
+        del intervals[i]
+        self._reindex(room_key, day)
+
+    def is_free(self, room_key, day, start, end):
+        """
+        True if the room has no booking on `day` overlapping [start, end) (minutes after midnight).
+        """
+        day_index = self._index.get(room_key, {}).get(day)
+        if not day_index:
+            return True
+        starts, max_ends = day_index
+        # Bookings starting before `end` are the only ones that can overlap; the latest end among them decides
+        i = bisect_left(starts, end)
+        return i == 0 or max_ends[i - 1] <= start
+
+    def free_rooms(self, day, start, end):
+        """
+        List the (building, room) keys free on `day` from `start` to `end`, in room_timetable order.
+        """
+        return [room_key for room_key in self.room_keys if self.is_free(room_key, day, start, end)]
+
+    def free_mask(self, day, start, end):
+        """
+        Boolean array over `room_keys`, True where the room is free on `day` from `start` to `end`.
+        """
+        return np.fromiter(
+            (self.is_free(room_key, day, start, end) for room_key in self.room_keys),
+            dtype=bool,
+            count=len(self.room_keys)
+        )
+
+
+class AlternativesCache:
+    """
+    Size-bounded LRU of find_alternative_classrooms rankings, keyed by the effective C1 placement,
+    the C2 course (with its placement and time) and topk. Entries are only valid for the availability
+    version they were computed against: the cache empties itself once room_timetable changes.
+    Safe to share between threads.
+    """
+
+    def __init__(self, availability, maxsize=4096):
+        self.availability = availability
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._version = availability.version
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self):
+        if self._version != self.availability.version:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._version = self.availability.version
+
+    def get(self, key, default=None):
+        with self._lock:
+            self._check_version()
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._check_version()
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def invalidate(self, predicate):
+        """
+        Drop the entries for which predicate(key, value) is true and return them as (key, value) pairs.
+        """
+        with self._lock:
+            self._check_version()
+            dropped = [(key, value) for key, value in self._entries.items() if predicate(key, value)]
+            for key, _ in dropped:
+                del self._entries[key]
+            self.invalidations += len(dropped)
+            return dropped
+
+    def stats(self):
+        """
+        Hit/miss/eviction/invalidation counters and current size.
+        """
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+# Version of the snapshot layout written by compile_campus_snapshot
+SNAPSHOT_FORMAT = 1
+
+# Columns of each snapshot table in record key order, with their storage kind:
+# "int" (int64), "float" (float64), "str" (int32 code into the shared string table) or "time" ("HH:MM" as int16 minutes)
+SNAPSHOT_SCHEMAS = {
+    "courses": {
+        "CourseNumb": "int", "SectionNumb": "int", "SectionID": "int", "MeetingType": "str", "MeetingID": "int",
+        "DayOfWeek": "str", "RoomNumber": "str", "BuildingName": "str", "BuildingNumber": "float", "BldgAbbr": "str",
+        "Region": "str", "NumStudents": "int", "StartTimeStr": "time", "EndTimeStr": "time", "RoomCapacity": "int"
+    },
+    "buildings": {"id": "str", "lon": "float", "lat": "float", "abbr": "str", "name": "str"},
+    "rooms": {"building": "str", "room": "str"},
+    "room_bookings": {
+        "room": "int", "CourseNumber": "int", "DayOfWeek": "str", "StartTime": "time", "EndTime": "time",
+        "MeetingType": "str", "NumStudents": "int"
+    },
+    "students": {"id": "str", "num_meetings": "int"},
+    "student_meetings": {
+        "CourseNumb": "str", "MeetingType": "str", "DayOfWeek": "str", "StartTime": "time", "EndTime": "time",
+        "RoomNumber": "str", "BuildingName": "str", "BuildingNumber": "str", "BldgAbbr": "str", "Region": "str"
+    },
+}
+
+
+def compile_campus_snapshot(data_dir="./data", snapshot_dir=None):
+    """
+    Convert courses_info, room_timetable, building_loc and students_info from `data_dir` into a columnar
+    snapshot directory (default `<data_dir>/snapshot`): one structured .npy file per table, with strings
+    interned into a single string table and times as minutes, plus the building distance matrix.
+    Returns the manifest, which records the hash, size and mtime of every JSON file it was compiled
+    from so CampusSnapshot can refuse a snapshot older than its sources.
+    """
+    snapshot_dir = snapshot_dir or os.path.join(data_dir, "snapshot")
+    sources = {}
+    source_stats = {}
+    data = {}
+    for name in ("courses_info", "room_timetable", "building_loc", "students_info"):
+        path = f"{data_dir}/{name}.json"
+        with open(path, 'rb') as f:
+            raw = f.read()
+        sources[name] = hashlib.sha256(raw).hexdigest()
+        stat = os.stat(path)
+        source_stats[name] = [stat.st_size, stat.st_mtime_ns]
+        data[name] = json.loads(raw)
+
+    room_timetable = data["room_timetable"]
+    room_keys = [(building, room) for building, rooms in room_timetable.items() for room in rooms]
+    tables = {
+        "courses": data["courses_info"]['courses'],
+        "buildings": [{"id": building_id, **building} for building_id, building in data["building_loc"].items()],
+        "rooms": [{"building": building, "room": room} for building, room in room_keys],
+        "room_bookings": [
+            {"room": i, **schedule}
+            for i, (building, room) in enumerate(room_keys) for schedule in room_timetable[building][room]
+        ],
+        "students": [
+            {"id": student_id, "num_meetings": len(meetings)} for student_id, meetings in data["students_info"].items()
+        ],
+        "student_meetings": [meeting for meetings in data["students_info"].values() for meeting in meetings],
+    }
+
+    # Write into a scratch directory and swap it in, so readers never see a half-written snapshot.
+    # Processes that already mapped the old files keep reading them until they reopen.
+    tmp_dir = f"{snapshot_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    # One structured array per table, so a table is a single file and a single mapping
+    kinds = {"int": np.int64, "float": np.float64, "str": np.int32, "time": np.int16}
+    strings = {}
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "data_dir": os.path.abspath(data_dir),
+        "sources": sources,
+        "source_stats": source_stats,
+        "tables": {}
+    }
+    for table, rows in tables.items():
+        schema = SNAPSHOT_SCHEMAS[table]
+        array = np.zeros(len(rows), dtype=[(column, kinds[kind]) for column, kind in schema.items()])
+        for column, kind in schema.items():
+            values = [row[column] for row in rows]
+            if kind == "str":
+                values = [strings.setdefault(value, len(strings)) for value in values]
+            elif kind == "time":
+                values = [time_to_minutes(value) for value in values]
+            array[column] = values
+        np.save(os.path.join(tmp_dir, f"{table}.npy"), array)
+        manifest["tables"][table] = {"rows": len(rows), "columns": schema}
+
+    # The string table is stored as NUL-separated UTF-8 rather than fixed-width unicode, which would pad every entry
+    if any("\0" in value for value in strings):
+        raise ValueError("Strings containing NUL cannot be stored in a campus snapshot")
+    np.save(os.path.join(tmp_dir, "strings.npy"), np.frombuffer("\0".join(strings).encode(), dtype=np.uint8))
+    np.save(os.path.join(tmp_dir, "distance_km.npy"), BuildingDistanceMatrix(data["building_loc"]).distance_km)
+    with open(os.path.join(tmp_dir, "manifest.json"), 'w') as f:
+        json.dump(manifest, f, indent=4)
+
+    old_dir = f"{snapshot_dir}.{os.getpid()}.old"
+    if os.path.exists(snapshot_dir):
+        os.rename(snapshot_dir, old_dir)
+    os.rename(tmp_dir, snapshot_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return manifest
+
+
+class CampusSnapshot:
+    """
+    A snapshot written by compile_campus_snapshot. Columns are memory-mapped read-only, so every
+    process opening the same snapshot shares its pages; JSON-shaped records are decoded on request.
+    Opening it raises ValueError if a JSON file it was compiled from has changed since.
+    """
+
+    def __init__(self, snapshot_dir):
+        self.snapshot_dir = snapshot_dir
+        with open(os.path.join(snapshot_dir, "manifest.json"), 'r') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"{snapshot_dir} has snapshot format {self.manifest.get('format')}, expected {SNAPSHOT_FORMAT}")
+        stale = self.stale_sources()
+        if stale:
+            raise ValueError(f"{snapshot_dir} is older than {', '.join(stale)} in {self.manifest['data_dir']}; recompile it with --compile_data")
+        self.strings = np.load(os.path.join(snapshot_dir, "strings.npy"), mmap_mode='r')
+        self.distance_km = np.load(os.path.join(snapshot_dir, "distance_km.npy"), mmap_mode='r')
+        self._string_list = None
+
+    def stale_sources(self, data_dir=None):
+        """
+        Names of the JSON files in `data_dir` (default: the directory the snapshot was compiled from)
+        whose contents differ from those compiled. Files that no longer exist are not checked.
+        """
+        data_dir = data_dir or self.manifest.get("data_dir")
+        if not data_dir:
+            return []  # Compiled before sources were recorded
+        stale = []
+        for name, digest in self.manifest.get("sources", {}).items():
+            path = os.path.join(data_dir, f"{name}.json")
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if self.manifest.get("source_stats", {}).get(name) == [stat.st_size, stat.st_mtime_ns]:
+                continue  # Untouched since compiling; only hash files that may have changed
+            with open(path, 'rb') as f:
+                if hashlib.sha256(f.read()).hexdigest() != digest:
+                    stale.append(name)
+        return stale
+
+    def table(self, table):
+        """
+        A table as a read-only memory-mapped structured array (string columns hold codes into `strings`).
+        """
+        return np.load(os.path.join(self.snapshot_dir, f"{table}.npy"), mmap_mode='r')
+
+    def records(self, table):
+        """
+        Decode a table into a list of dicts with the original JSON keys and values.
+        """
+        if self._string_list is None:
+            self._string_list = self.strings.tobytes().decode().split("\0")
+        array = self.table(table)
+        columns = self.manifest["tables"][table]["columns"]
+        decoded = []
+        for column, kind in columns.items():
+            values = array[column].tolist()
+            if kind == "str":
+                values = [self._string_list[code] for code in values]
+            elif kind == "time":
+                values = [f"{minutes // 60:02d}:{minutes % 60:02d}" for minutes in values]
+            decoded.append(values)
+        return [dict(zip(columns, row)) for row in zip(*decoded)]
+
+    def courses_info(self):
+        return {"courses": self.records("courses")}
+
+    def building_loc(self):
+        return {building.pop("id"): building for building in self.records("buildings")}
+
+    def room_timetable(self):
+        rooms = self.records("rooms")
+        room_timetable = {}
+        for room in rooms:
+            room_timetable.setdefault(room["building"], {})[room["room"]] = []
+        for booking in self.records("room_bookings"):
+            room = rooms[booking.pop("room")]
+            room_timetable[room["building"]][room["room"]].append(booking)
+        return room_timetable
+
+    def students_info(self):
+        meetings = iter(self.records("student_meetings"))
+        return {
+            student["id"]: [next(meetings) for _ in range(student["num_meetings"])]
+            for student in self.records("students")
+        }
+
+
+class CampusIndex:
+    """
+    Prebuilt lookup tables over courses_info, room_timetable and building_loc.
+    Built once per campus so that course, building and room lookups are O(1) dict hits
+    instead of scans over the whole catalogue on every call.
+    """
+
+    def __init__(
+        self,
+        courses_info,
+        room_timetable,
+        building_loc,
+        availability=None,
+        distances=None,
+        alternatives_cache_size=4096
+    ):
+        self.courses_info = courses_info
+        self.room_timetable = room_timetable
+        self.building_loc = building_loc
+        # Day-aware free/busy index over room_timetable; may be shared between indexes of the same timetable
+        self.availability = availability if availability is not None else RoomAvailability(room_timetable)
+        # Building-to-building distances/walking times; may be shared or loaded from a persisted cache
+        self.distances = distances if distances is not None else BuildingDistanceMatrix(building_loc)
+
+        # CourseNumb -> first matching course record (the record `next(...)` used to return)
+        self.courses = {}
+        for course in courses_info['courses']:
+            self.courses.setdefault(course['CourseNumb'], course)
+
+        # Building name -> (building id, location), and (lat, lon) -> building id
+        self.buildings = {}
+        self.building_ids_by_location = {}
+        for building_id, building_data in building_loc.items():
+            self.buildings.setdefault(building_data['name'], (building_id, building_data))
+            self.building_ids_by_location.setdefault((building_data['lat'], building_data['lon']), building_id)
+
+        # (building name, room) -> capacity and floor, taken from the first course held in the room
+        self.rooms = {}
+        for course in courses_info['courses']:
+            room_key = (course['BuildingName'], course['RoomNumber'])
+            if room_key not in self.rooms:
+                self.rooms[room_key] = {
+                    "room_capacity": course['RoomCapacity'],
+                    "floor": room_floor(course['RoomNumber'])
+                }
+
+        self._build_room_columns()
+        # Building locations indexed for radius and k-nearest candidate searches
+        self.spatial = BuildingGrid(self.distances.lat, self.distances.lon)
+        # Rankings shared across calls that use this campus (batch jobs, workers, services)
+        self.alternatives_cache = AlternativesCache(self.availability, maxsize=alternatives_cache_size)
+
+    def _build_room_columns(self):
+        # Columnar view of the rooms in `availability.room_keys` order for vectorized scoring.
+        # Rooms without a known building location or capacity are never candidates.
+        num_rooms = len(self.availability.room_keys)
+        self.room_lat = np.full(num_rooms, np.nan)
+        self.room_lon = np.full(num_rooms, np.nan)
+        self.room_building = np.full(num_rooms, -1, dtype=np.int64)  # Row in `distances`
+        self.room_floor = np.ones(num_rooms, dtype=np.int64)
+        self.room_capacity = np.zeros(num_rooms)
+        self.room_eligible = np.zeros(num_rooms, dtype=bool)
+        for i, (building, room) in enumerate(self.availability.room_keys):
+            building_data = self.buildings.get(building, (None, None))[1]
+            room_match = self.rooms.get((building, room))
+            if not building_data or not room_match:
+                continue
+            self.room_lat[i], self.room_lon[i] = building_data['lat'], building_data['lon']
+            self.room_building[i] = self.distances.index[self.buildings[building][0]]
+            self.room_floor[i] = room_match['floor']
+            self.room_capacity[i] = room_match['room_capacity']
+            self.room_eligible[i] = True
+        # Stair/elevator minutes from the entrance to each room (zero for straight-line distances)
+        self.room_vertical_min = self.distances.vertical_minutes(self.room_building, self.room_floor)
+        # Positions of the eligible rooms of each building row, in room order
+        eligible = np.flatnonzero(self.room_eligible)
+        self.building_rooms = np.split(
+            eligible[np.argsort(self.room_building[eligible], kind="stable")],
+            np.cumsum(np.bincount(self.room_building[eligible], minlength=len(self.distances.building_ids)))[:-1]
+        )
+
+    def update_timetable(self, room_timetable):
+        """
+        Replace room_timetable, rebuilding availability and the room columns.
+        Cached rankings are dropped on their next use because the availability version changes.
+        """
+        self.room_timetable = room_timetable
+        self.availability.load(room_timetable)
+        self._build_room_columns()
+
+    def apply_booking_deltas(self, deltas):
+        """
+        Apply booking changes to room_timetable and availability in place, without a rebuild.
+        Each delta is {"op": "add" | "remove", "building", "room", "DayOfWeek", "StartTime", "EndTime"}
+        plus, for "add", the optional room_timetable fields CourseNumber, MeetingType and NumStudents;
+        a room closure is an "add" over the closed hours ("00:00" to "24:00" for the whole day).
+        A delta with "timetable": false changes availability only and leaves room_timetable, the weekly
+        timetable, alone, for bookings that do not recur (the occupancy feed's sensed bookings).
+        Only cached rankings whose candidate set the change alters are dropped: those for a course on
+        the same day overlapping the booking, whose students fit the room, and for which the room was
+        free before an "add" or is free after a "remove". Returns {"applied", "invalidated"} where
+        `invalidated` lists one dict per dropped ranking with its C1 placement key, C2 course and
+        window, topk, and `conflicts`: the recommended rooms that are no longer free.
+        Every delta is checked before any is applied: a malformed delta, an unknown room or a
+        booking to remove that does not exist (at that point in the list) raises ValueError and
+        changes nothing.
+        """
+        changes = self._check_booking_deltas(deltas)
+        invalidated = []
+        for delta, (room_key, day, start, end, in_timetable) in zip(deltas, changes):
+            position = self.availability.room_positions[room_key]
+            schedules = self.room_timetable[room_key[0]][room_key[1]]
+
+            if delta["op"] == "add":
+                # Rankings that listed the room as a candidate must go before it stops being free
+                dropped = self._invalidate_window(position, day, start, end)
+                self.availability.add_booking(room_key, day, start, end)
+                if in_timetable:
+                    schedules.append({
+                        "CourseNumber": delta.get("CourseNumber"),
+                        "DayOfWeek": day,
+                        "StartTime": delta["StartTime"],
+                        "EndTime": delta["EndTime"],
+                        "MeetingType": delta.get("MeetingType"),
+                        "NumStudents": delta.get("NumStudents")
+                    })
+            else:
+                self.availability.remove_booking(room_key, day, start, end)
+                if in_timetable:
+                    schedules.pop(next(_matching_schedules(schedules, day, start, end)))
+                # Rankings that could now list the room as a candidate
+                dropped = self._invalidate_window(position, day, start, end)
+
+            for key, (c2_info, alternatives) in dropped:
+                conflicts = [
+                    {"rank": rank, "building": option.building, "room": option.room}
+                    for rank, option in enumerate(alternatives)
+                    if delta["op"] == "add" and (option.building, option.room) == room_key
+                ]
+                invalidated.append({
+                    "c1": key[0],
+                    "c2_id": key[1],
+                    "DayOfWeek": key[5],
+                    "StartTime": key[6],
+                    "EndTime": key[7],
+                    "topk": key[9],
+                    "conflicts": conflicts
+                })
+        METRICS.incr("bookings.deltas", len(deltas))
+        METRICS.incr("bookings.invalidated", len(invalidated))
+        return {"applied": len(deltas), "invalidated": invalidated}
+
+    def _check_booking_deltas(self, deltas):
+        # [(room key, day, start, end, in timetable), ...] of the deltas, or ValueError naming the first
+        # invalid one. Removals are checked against the bookings as the earlier deltas of the list leave them.
+        changes = []
+        # (room key, day, start, end, in timetable) -> bookings there once the deltas so far are applied
+        counts = {}
+        for i, delta in enumerate(deltas):
+            try:
+                room_key = (delta["building"], delta["room"])
+                if room_key not in self.availability.room_positions:
+                    raise KeyError(f"Unknown room {room_key}")
+                day = delta["DayOfWeek"]
+                start, end = time_to_minutes(delta["StartTime"]), time_to_minutes(delta["EndTime"])
+                if start >= end:
+                    raise ValueError(f"Booking ends at {delta['EndTime']}, not after it starts at {delta['StartTime']}")
+                change = (room_key, day, start, end, bool(delta.get("timetable", True)))
+                if change not in counts:
+                    schedules = self.room_timetable[room_key[0]][room_key[1]]
+                    in_timetable = sum(1 for _ in _matching_schedules(schedules, day, start, end))
+                    # Bookings only in availability are those beyond the timetabled ones
+                    counts[change] = in_timetable if change[4] else (
+                        self.availability.bookings[room_key].get(day, []).count((start, end)) - in_timetable
+                    )
+                if delta["op"] == "add":
+                    counts[change] += 1
+                elif delta["op"] == "remove":
+                    if not counts[change]:
+                        raise KeyError(f"No booking of {room_key} on {day} from {delta['StartTime']} to {delta['EndTime']}")
+                    counts[change] -= 1
+                else:
+                    raise ValueError(f"Unknown booking delta op {delta['op']!r}")
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                raise ValueError(f"Booking delta {i}: {type(e).__name__}: {e}") from e
+            changes.append(change)
+        return changes
+
+    def _invalidate_window(self, position, day, start, end):
+        # Cache keys are (c1 key, c2 id, building, room, capacity, day, start, end, students, topk[, radius,
+        # nearest buildings]), see _find_alternatives; the room can only be a candidate for a key if it fits
+        # and is free then
+        if not self.room_eligible[position]:
+            return []
+        room_key = self.availability.room_keys[position]
+        capacity = self.room_capacity[position]
+
+        def affected(key, value):
+            if key[5] != day or capacity < key[8]:
+                return False
+            key_start, key_end = time_to_minutes(key[6]), time_to_minutes(key[7])
+            return key_start < end and start < key_end and self.availability.is_free(room_key, day, key_start, key_end)
+
+        return self.alternatives_cache.invalidate(affected)
+
+    @classmethod
+    def from_json(cls, data_dir="./data", alternatives_cache_size=4096, walkways=None, travel_mode="walk"):
+        """
+        Load courses_info.json, room_timetable.json and building_loc.json from `data_dir`.
+        The building distance matrix is persisted under `<data_dir>/cache` and rebuilt when building_loc changes.
+        With `walkways` (a walkway graph file, see campus_travel.py), travel is routed over that graph
+        instead of straight lines; `travel_mode` picks the speeds ("walk", "bicycle", "bus" or "mix").
+        """
+        with open(f"{data_dir}/courses_info.json", 'r') as f:
+            courses_info = json.load(f)
+        with open(f"{data_dir}/building_loc.json", 'r') as f:
+            building_loc = json.load(f)
+        with open(f"{data_dir}/room_timetable.json", 'r') as f:
+            room_timetable = json.load(f)
+        if walkways:
+            distances = _travel_table(building_loc, walkways, travel_mode)
+        else:
+            distances = BuildingDistanceMatrix.cached(
+                building_loc, os.path.join(data_dir, "cache", "building_matrix.npz"), travel_speed_mps(travel_mode)
+            )
+        return cls(
+            courses_info, room_timetable, building_loc,
+            distances=distances, alternatives_cache_size=alternatives_cache_size
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot, alternatives_cache_size=4096, walkways=None, travel_mode="walk"):
+        """
+        Load from a compiled snapshot (a CampusSnapshot or its directory) instead of the JSON files.
+        The building distance matrix stays memory-mapped from the snapshot unless `walkways` is given.
+        """
+        if not isinstance(snapshot, CampusSnapshot):
+            snapshot = CampusSnapshot(snapshot)
+        building_loc = snapshot.building_loc()
+        if walkways:
+            distances = _travel_table(building_loc, walkways, travel_mode)
+        else:
+            distances = BuildingDistanceMatrix(
+                building_loc, distance_km=snapshot.distance_km, walking_speed_mps=travel_speed_mps(travel_mode)
+            )
+        return cls(
+            snapshot.courses_info(), snapshot.room_timetable(), building_loc,
+            distances=distances, alternatives_cache_size=alternatives_cache_size
+        )
+
+    @classmethod
+    def load(cls, data_dir="./data", snapshot_dir=None, alternatives_cache_size=4096, walkways=None, travel_mode="walk"):
+        """
+        from_snapshot when `snapshot_dir` is given, otherwise from_json on `data_dir`.
+        """
+        if snapshot_dir:
+            return cls.from_snapshot(snapshot_dir, alternatives_cache_size, walkways, travel_mode)
+        return cls.from_json(data_dir, alternatives_cache_size, walkways, travel_mode)
+
+    def nearby_buildings(self, lat, lon, radius_m=None, k=None):
+        """
+        [(building id, distance in metres), ...] nearest first: those within `radius_m` metres, at most `k`.
+        """
+        nearby = []
+        for row, distance in self.spatial.nearest(lat, lon, radius_m):
+            if k is not None and len(nearby) == k:
+                break
+            nearby.append((self.distances.building_ids[row], distance))
+        return nearby
+
+    def course(self, course_id):
+        """
+        Return the course record for `course_id`.
+        """
+        try:
+            return self.courses[course_id]
+        except KeyError:
+            raise ValueError(f"Course {course_id} not found in courses_info") from None
+
+    def building_location(self, building_number):
+        """
+        Return the building_loc entry for a (possibly float) building number.
+        """
+        return self.building_loc.get(str(int(building_number)))
+
+
+def _travel_table(building_loc, walkways, travel_mode):
+    # Imported here: the walkway graph engine is only needed when a walkway file is given
+    from campus_travel import TravelTimeTable
+
+    return TravelTimeTable.cached(building_loc, walkways, travel_mode)
+
+
+class CampusOverlay:
+    """
+    Copy-on-write view of a campus: a small dict of per-course field overrides layered over the
+    shared, never-modified base catalogue. Applying and reading overrides is O(1), and forking or
+    discarding a view only touches the overrides. Everything else (rooms, availability, distances)
+    is read straight from the base campus.
+    """
+
+    def __init__(self, campus, overrides=None):
+        self.campus = campus
+        # course_id -> {field: value}
+        self.overrides = {course_id: dict(fields) for course_id, fields in (overrides or {}).items()}
+
+    def __getattr__(self, name):
+        # Only reached for attributes the view does not define itself
+        campus = self.__dict__.get('campus')
+        if campus is None:
+            raise AttributeError(name)
+        return getattr(campus, name)
+
+    def course(self, course_id):
+        """
+        Return the course record for `course_id` with this view's overrides applied.
+        """
+        base = self.campus.course(course_id)
+        fields = self.overrides.get(course_id)
+        return {**base, **fields} if fields else base
+
+    def apply(self, course_id, fields):
+        """
+        Override `fields` of `course_id` in this view only.
+        """
+        self.campus.course(course_id)  # Fail early on unknown courses
+        self.overrides.setdefault(course_id, {}).update(fields)
+
+    def fork(self):
+        """
+        Independent copy of this view sharing the same base campus.
+        """
+        return CampusOverlay(self.campus, self.overrides)
+
+    def discard(self):
+        """
+        Drop all overrides, returning the view to the base catalogue.
+        """
+        self.overrides.clear()
+
+
+class Alternative:
+    """
+    One ranked room for C2, as kept by the engine and its caches: fixed fields in __slots__ instead
+    of a 21-key dict per candidate. to_dict() builds the public option dict (fields in __slots__ order)
+    at the output boundary.
+    """
+
+    __slots__ = (
+        "course_number", "room", "building", "building_id", "building_location", "start_time", "end_time",
+        "travel_distance", "travel_time", "total_floors", "room_capacity", "num_students",
+        "distance_saved", "time_saved", "floors_saved", "occupancy_improved",
+        "distance_saved_normalized", "time_saved_normalized", "floors_saved_normalized", "occupancy_improved_normalized",
+        "total_score"
+    )
+    _values = attrgetter(*__slots__)
+
+    def __init__(self, *values):
+        for field, value in zip(self.__slots__, values):
+            setattr(self, field, value)
+
+    def __repr__(self):
+        return f"Alternative({self.building!r}, {self.room!r}, total_score={self.total_score!r})"
+
+    def to_dict(self, nested_metrics=False):
+        """
+        The option as a dict; with `nested_metrics`, followed by its metrics again under `metrics`/`normalized`.
+        """
+        option = dict(zip(self.__slots__, self._values(self)))
+        if nested_metrics:
+            option["metrics"] = {
+                "distance_saved": self.distance_saved,
+                "time_saved": self.time_saved,
+                "floors_saved": self.floors_saved,
+                "occupancy_improved": self.occupancy_improved,
+                "normalized": {
+                    "distance_saved_normalized": self.distance_saved_normalized,
+                    "time_saved_normalized": self.time_saved_normalized,
+                    "floors_saved_normalized": self.floors_saved_normalized,
+                    "occupancy_improved_normalized": self.occupancy_improved_normalized
+                }
+            }
+        return option
+
+
+def _as_campus(input_data):
+    """
+    Accept a prebuilt CampusIndex or CampusOverlay, or the legacy (courses_info, room_timetable, building_loc) tuple.
+    """
+    if isinstance(input_data, (CampusIndex, CampusOverlay)):
+        return input_data
+    return CampusIndex(*input_data)
+
+
+def find_alternative_classrooms(
+    c1_id,
+    c2_id,
+    input_data,
+    topk=10,
+    origin_location=None,
+    cache=None,
+    radius_m=None,
+    nearest_buildings=None
+):
     """
     Find alternative classrooms and rank them using a combined metric based on normalized scores
     for distance_saved, time_saved, floors_saved, and occupancy_improved. 
     Handles negative values for occupancy_improved and includes support for origin as `c1_id`.
+    `input_data` is a CampusIndex, or a (courses_info, room_timetable, building_loc) tuple.
+    With a `cache` mapping, the ranking is shared by every call with the same effective C1 placement,
+    C2 course and topk; a cached c2_info is a shared object and must not be modified.
+    `radius_m` and `nearest_buildings` restrict the candidates to rooms in buildings within that many
+    metres of C1 and/or in the nearest buildings that have a free room fitting C2, searched outward
+    from C1 so rooms further away are never checked; scores are then normalized over those candidates.
     """
-    updated_courses_info, room_timetable, building_loc = input_data
+    c1_info, c2_info, alternatives = _find_alternatives(
+        c1_id, c2_id, _as_campus(input_data), topk, origin_location, cache, radius_m, nearest_buildings
+    )
+    return {
+        "c1_info": c1_info,
+        "c2_info": c2_info,
+        "alternatives": [alternative.to_dict() for alternative in alternatives],
+    }
 
-    # Walking speed in m/s
-    walking_speed_mps = 1.4
+
+def _find_alternatives(c1_id, c2_id, campus, topk, origin_location=None, cache=None, radius_m=None, nearest_buildings=None):
+    """
+    find_alternative_classrooms without the conversion to dicts: (c1_info, c2_info, Alternative records).
+    """
+    if nearest_buildings is not None and nearest_buildings < 1:
+        raise ValueError(f"nearest_buildings must be at least 1, got {nearest_buildings}")
 
     # Check if c1_id is the origin
     if c1_id == "Origin" and origin_location:
@@ -43,11 +1077,13 @@ def find_alternative_classrooms(c1_id, c2_id, input_data, topk=10, origin_locati
             "num_students": "N/A",
             "occupancy_rate": "N/A"
         }
-        c1_location = origin_location
+        distance_row, time_row = campus.distances.origin_row(origin_location['lat'], origin_location['lon'])
+        c1_key = ("Origin", origin_location['lat'], origin_location['lon'])
+        c1_lat_lon = (origin_location['lat'], origin_location['lon'])
     else:
         # Fetch C1 details
-        c1 = next(course for course in updated_courses_info['courses'] if course['CourseNumb'] == c1_id)
-        c1_location = building_loc.get(str(int(c1['BuildingNumber'])))
+        c1 = campus.course(c1_id)
+        c1_location = campus.building_location(c1['BuildingNumber'])
 
         c1_info = {
             "course_number": c1['CourseNumb'],
@@ -57,19 +1093,62 @@ def find_alternative_classrooms(c1_id, c2_id, input_data, topk=10, origin_locati
             "building_location": (c1_location['lat'], c1_location['lon']),
             "start_time": c1['StartTimeStr'],
             "end_time": c1['EndTimeStr'],
-            "floor": int(c1['RoomNumber'][0]) if c1['RoomNumber'][0].isdigit() else 1,
+            "floor": room_floor(c1['RoomNumber']),
             "room_capacity": c1['RoomCapacity'],
             "num_students": c1['NumStudents'],
             "occupancy_rate": c1['NumStudents'] / c1['RoomCapacity'] if c1['RoomCapacity'] > 0 else 0
         }
+        distance_row, time_row = campus.distances.building_row(str(int(c1['BuildingNumber'])))
+        # Getting down from C1's floor is part of every hop's travel time
+        c1_vertical = float(campus.distances.vertical_minutes(campus.distances.index[str(int(c1['BuildingNumber']))], c1_info["floor"]))
+        if c1_vertical:
+            time_row = time_row + c1_vertical
+        c1_key = (str(int(c1['BuildingNumber'])), c1_info["floor"])
+        c1_lat_lon = c1_info["building_location"]
+
+    # Where to search outward from, when the candidates are restricted to C1's surroundings
+    search = None if radius_m is None and nearest_buildings is None else (*c1_lat_lon, radius_m, nearest_buildings)
 
     # Fetch C2 details
-    c2 = next(course for course in updated_courses_info['courses'] if course['CourseNumb'] == c2_id)
-    c2_location = building_loc.get(str(int(c2['BuildingNumber'])))
+    c2 = campus.course(c2_id)
+
+    if cache is None:
+        METRICS.incr("alternatives.uncached")
+        with METRICS.stage("alternatives.rank"):
+            c2_info, alternatives = _rank_alternatives(campus, c1_id, c1_info, distance_row, time_row, c2, topk, search)
+    else:
+        key = (
+            c1_key, c2_id, str(int(c2['BuildingNumber'])), c2['RoomNumber'], c2['RoomCapacity'],
+            c2['DayOfWeek'], c2['StartTimeStr'], c2['EndTimeStr'], c2['NumStudents'], topk
+        )
+        if search is not None:
+            key += (radius_m, nearest_buildings)
+        ranked = cache.get(key)
+        if ranked is None:
+            METRICS.incr("alternatives.cache_misses")
+            with METRICS.stage("alternatives.rank"):
+                ranked = _rank_alternatives(campus, c1_id, c1_info, distance_row, time_row, c2, topk, search)
+            cache[key] = ranked
+        else:
+            METRICS.incr("alternatives.cache_hits")
+        c2_info, alternatives = ranked
+
+    return c1_info, c2_info, alternatives
+
+
+def _rank_alternatives(campus, c1_id, c1_info, distance_row, time_row, c2, topk, search=None):
+    """
+    Score every free room that fits C2 against C1's distance/time rows, or with `search`
+    ((lat, lon, radius_m, nearest_buildings), see _nearby_candidate_rooms) only those near C1.
+    Returns (c2_info, top-k Alternative records); `topk=None` keeps every candidate.
+    """
+    c2_location = campus.building_location(c2['BuildingNumber'])
 
-    c1_to_c2_distance = haversine_distance((c1_location['lat'], c1_location['lon']), (c2_location['lat'], c2_location['lon']))
-    c1_to_c2_time = (c1_to_c2_distance * 1000) / walking_speed_mps / 60  # Convert to minutes
-    c1_to_c2_floors = 0 if c1_id == "Origin" else abs(c1_info["floor"] - 1) + abs(int(c2['RoomNumber'][0]) if c2['RoomNumber'][0].isdigit() else 1 - 1)
+    c2_building = campus.distances.index[str(int(c2['BuildingNumber']))]
+    c1_to_c2_distance = float(distance_row[c2_building])
+    c2_vertical = float(campus.distances.vertical_minutes(c2_building, room_floor(c2['RoomNumber'])))
+    c1_to_c2_time = float(time_row[c2_building]) + c2_vertical  # In minutes
+    c1_to_c2_floors = 0 if c1_id == "Origin" else abs(c1_info["floor"] - 1) + _c2_floor_term(c2)
 
     c2_info = {
         "course_number": c2['CourseNumb'],
@@ -79,7 +1158,7 @@ def find_alternative_classrooms(c1_id, c2_id, input_data, topk=10, origin_locati
         "building_location": (c2_location['lat'], c2_location['lon']),
         "start_time": c2['StartTimeStr'],
         "end_time": c2['EndTimeStr'],
-        "floor": int(c2['RoomNumber'][0]) if c2['RoomNumber'][0].isdigit() else 1,
+        "floor": room_floor(c2['RoomNumber']),
         "travel_distance": c1_to_c2_distance,
         "travel_time": c1_to_c2_time,
         "total_floors": c1_to_c2_floors,
@@ -88,83 +1167,199 @@ def find_alternative_classrooms(c1_id, c2_id, input_data, topk=10, origin_locati
         "occupancy_rate": c2['NumStudents'] / c2['RoomCapacity'] if c2['RoomCapacity'] > 0 else 0
     }
 
-    # Available Classrooms During C2 Time
-    start_time, end_time = c2['StartTimeStr'], c2['EndTimeStr']
-    alternatives = []
-
-    for building, rooms in room_timetable.items():
-        for room, schedules in rooms.items():
-            if all(not (schedule['StartTime'] < end_time and schedule['EndTime'] > start_time) for schedule in schedules):
-                building_data = next((v for k, v in building_loc.items() if v['name'] == building), None)
-                if building_data:
-                    building_id = [k for k, v in building_loc.items() if v['name'] == building][0]
-                    course_match = next((course for course in updated_courses_info['courses']
-                                         if course['RoomNumber'] == room and course['BuildingName'] == building), None)
-                    if not course_match or course_match['RoomCapacity'] < c2_info['num_students']:
-                        continue  # Skip rooms that cannot accommodate the number of students
-
-                    travel_distance = haversine_distance((c1_location['lat'], c1_location['lon']), (building_data['lat'], building_data['lon']))
-                    travel_distance_m = travel_distance * 1000  # Convert to meters
-                    travel_time = travel_distance_m / walking_speed_mps / 60  # Time in minutes
-                    
-                    # Calculate total floors traveled
-                    alternative_floor = int(room[0]) if room[0].isdigit() else 1  # Default to 1st floor
-                    total_floors = abs(c1_info["floor"] - 1) + abs(alternative_floor - 1)
-                    
-                    # Calculate savings compared to C2
-                    distance_saved = c1_to_c2_distance - travel_distance
-                    time_saved = c1_to_c2_time - travel_time
-                    floors_saved = c1_to_c2_floors - total_floors
-                    
-                    # Add room capacity and calculate occupancy rate improvement
-                    room_capacity = course_match['RoomCapacity']
-                    num_students = c2_info['num_students']  # Use the number of students from C2
-                    occupancy_rate = num_students / room_capacity if room_capacity > 0 else 0
-                    occupancy_improved = occupancy_rate - c2_info['occupancy_rate']  # Improvement in occupancy rate
-
-                    alternatives.append({
-                        "course_number": c2['CourseNumb'],
-                        "room": room,
-                        "building": building,
-                        "building_id": building_id,
-                        "building_location": (building_data['lat'], building_data['lon']),
-                        "start_time": c2['StartTimeStr'],
-                        "end_time": c2['EndTimeStr'],
-                        "travel_distance": travel_distance,
-                        "travel_time": travel_time,
-                        "total_floors": total_floors,
-                        "room_capacity": room_capacity,
-                        "num_students": num_students,
-                        "distance_saved": distance_saved,
-                        "time_saved": time_saved,
-                        "floors_saved": floors_saved,
-                        "occupancy_improved": occupancy_improved
-                    })
+    with METRICS.stage("alternatives.candidates"):
+        if search is None:
+            candidates = _candidate_rooms(campus, c2)
+            scanned = len(campus.availability.room_keys)
+        else:
+            candidates, scanned = _nearby_candidate_rooms(campus, c2, *search)
+    METRICS.incr("alternatives.rooms_scanned", scanned)
+    METRICS.incr("alternatives.candidates_kept", len(candidates))
+    if len(candidates) == 0:
+        return c2_info, []
+
+    travel_distance, travel_time, total_floors, metrics, normalized, total_score = (
+        values[0] if not isinstance(values, dict) else {metric: row[0] for metric, row in values.items()}
+        for values in _score_candidates(
+            campus, candidates, c2, distance_row[None, :], time_row[None, :], c1_info["floor"],
+            c1_to_c2_distance, c1_to_c2_time, c1_to_c2_floors
+        )
+    )
+    num_students = c2_info['num_students']  # Use the number of students from C2
+
+    # Top-k without a full sort: keep every candidate scoring at least the k-th best, then order those
+    # by score with ties in room order (matching a stable descending sort)
+    with METRICS.stage("alternatives.sort"):
+        if topk is not None and topk < len(candidates):
+            kth_score = -np.partition(-total_score, topk - 1)[topk - 1]
+            winners = np.flatnonzero(total_score >= kth_score)
+        else:
+            winners = np.arange(len(candidates))
+        winners = winners[np.lexsort((winners, -total_score[winners]))][:topk]
+
+    # Only the winners are materialized as records, column by column
+    sorted_alternatives = []
+    with METRICS.stage("alternatives.materialize"):
+        columns = zip(
+            travel_distance[winners].tolist(),
+            travel_time[winners].tolist(),
+            total_floors[winners].astype(np.int64).tolist(),
+            metrics["distance_saved"][winners].tolist(),
+            metrics["time_saved"][winners].tolist(),
+            metrics["floors_saved"][winners].astype(np.int64).tolist(),
+            metrics["occupancy_improved"][winners].tolist(),
+            normalized["distance_saved"][winners].tolist(),
+            normalized["time_saved"][winners].tolist(),
+            normalized["floors_saved"][winners].tolist(),
+            normalized["occupancy_improved"][winners].tolist(),
+            total_score[winners].tolist()
+        )
+        for position, row in zip(candidates[winners].tolist(), columns):
+            building, room = campus.availability.room_keys[position]
+            building_id, building_data = campus.buildings[building]
+            sorted_alternatives.append(Alternative(
+                c2['CourseNumb'], room, building, building_id, (building_data['lat'], building_data['lon']),
+                c2['StartTimeStr'], c2['EndTimeStr'], row[0], row[1], row[2],
+                campus.rooms[(building, room)]['room_capacity'], num_students, *row[3:]
+            ))
+
+    return c2_info, sorted_alternatives
 
-    # Normalize and rank alternatives
-    for metric in ["distance_saved", "time_saved", "floors_saved", "occupancy_improved"]:
-        values = [alt[metric] for alt in alternatives]
-        max_value = max(values)
-        min_value = min(values)  # Handle negative values for occupancy_improved
-        range_value = max_value - min_value if max_value != min_value else 1
-        for alt in alternatives:
-            alt[f"{metric}_normalized"] = (alt[metric] - min_value) / range_value  # Normalize to 0-1 range
-
-    for alt in alternatives:
-        alt["total_score"] = (
-            alt["distance_saved_normalized"] +
-            alt["time_saved_normalized"] +
-            alt["floors_saved_normalized"] +
-            alt["occupancy_improved_normalized"]
+
+def _c2_floor_term(c2):
+    """
+    C2's share of the C1 -> C2 floor count, as originally written: `int(digit)` for a room number
+    starting with a digit, otherwise `1 - 1`.
+    """
+    return abs(int(c2['RoomNumber'][0]) if c2['RoomNumber'][0].isdigit() else 1 - 1)
+
+
+def _candidate_rooms(campus, c2):
+    """
+    Positions in the campus room columns of the rooms free during C2's time on C2's day
+    that can hold C2's students.
+    """
+    day_of_week = c2['DayOfWeek']
+    start_minutes, end_minutes = time_to_minutes(c2['StartTimeStr']), time_to_minutes(c2['EndTimeStr'])
+    candidate_mask = campus.availability.free_mask(day_of_week, start_minutes, end_minutes) & campus.room_eligible
+    candidate_mask &= campus.room_capacity >= c2['NumStudents']  # Skip rooms that cannot accommodate the number of students
+    return np.flatnonzero(candidate_mask)
+
+
+def _nearby_candidate_rooms(campus, c2, lat, lon, radius_m=None, nearest_buildings=None):
+    """
+    _candidate_rooms limited to buildings within `radius_m` metres of (lat, lon) and/or to the
+    `nearest_buildings` nearest buildings with at least one candidate room. Buildings are visited
+    nearest first and the search stops at the radius or once enough buildings have a free room,
+    so only the rooms of the visited buildings are checked. Returns (positions in room order, rooms checked).
+    """
+    day_of_week = c2['DayOfWeek']
+    start_minutes, end_minutes = time_to_minutes(c2['StartTimeStr']), time_to_minutes(c2['EndTimeStr'])
+    candidates = []
+    scanned = 0
+    buildings_found = 0
+    for building_row, _ in campus.spatial.nearest(lat, lon, radius_m):
+        rooms = campus.building_rooms[building_row]
+        rooms = rooms[campus.room_capacity[rooms] >= c2['NumStudents']].tolist()
+        scanned += len(rooms)
+        free = [
+            position for position in rooms
+            if campus.availability.is_free(campus.availability.room_keys[position], day_of_week, start_minutes, end_minutes)
+        ]
+        if free:
+            candidates.extend(free)
+            buildings_found += 1
+            if buildings_found == nearest_buildings:
+                break
+    return np.sort(np.array(candidates, dtype=np.int64)), scanned
+
+
+def _score_candidates(
+    campus,
+    candidates,
+    c2,
+    distance_rows,
+    time_rows,
+    c1_floors,
+    c1_to_c2_distance,
+    c1_to_c2_time,
+    c1_to_c2_floors
+):
+    """
+    Metrics, normalized metrics and total_score of the candidate rooms for C2, seen from P placements
+    of C1 at once. `distance_rows`/`time_rows` are (P, buildings) arrays, the C1 values broadcast as (P, 1),
+    and every result has shape (P, candidates); normalization runs over each row separately.
+    Returns (travel_distance, travel_time, total_floors, metrics, normalized, total_score).
+    """
+    with METRICS.stage("alternatives.distances"):
+        # Distances and walking times (minutes) are looked up from the precomputed building matrix
+        candidate_buildings = campus.room_building[candidates]
+        travel_distance = distance_rows[:, candidate_buildings]
+        travel_time = time_rows[:, candidate_buildings] + campus.room_vertical_min[candidates]
+
+        # Calculate total floors traveled
+        total_floors = np.broadcast_to(abs(c1_floors - 1) + np.abs(campus.room_floor[candidates] - 1), travel_distance.shape)
+
+        # Add room capacity and calculate occupancy rate improvement
+        num_students = c2['NumStudents']  # Use the number of students from C2
+        c2_occupancy_rate = num_students / c2['RoomCapacity'] if c2['RoomCapacity'] > 0 else 0
+        room_capacity = campus.room_capacity[candidates]
+        occupancy_rate = np.divide(num_students, room_capacity, out=np.zeros(len(candidates)), where=room_capacity > 0)
+
+    with METRICS.stage("alternatives.normalize"):
+        # Calculate savings compared to C2
+        metrics = {
+            "distance_saved": c1_to_c2_distance - travel_distance,
+            "time_saved": c1_to_c2_time - travel_time,
+            "floors_saved": c1_to_c2_floors - total_floors,
+            "occupancy_improved": np.broadcast_to(occupancy_rate - c2_occupancy_rate, travel_distance.shape),  # Improvement in occupancy rate
+        }
+
+        # Normalize each row of alternatives
+        normalized = {}
+        for metric, values in metrics.items():
+            max_value = values.max(axis=1, keepdims=True)
+            min_value = values.min(axis=1, keepdims=True)  # Handle negative values for occupancy_improved
+            range_value = np.where(max_value != min_value, max_value - min_value, 1)
+            normalized[metric] = (values - min_value) / range_value  # Normalize to 0-1 range
+
+        total_score = (
+            normalized["distance_saved"] +
+            normalized["time_saved"] +
+            normalized["floors_saved"] +
+            normalized["occupancy_improved"]
         )
 
-    sorted_alternatives = sorted(alternatives, key=lambda x: x["total_score"], reverse=True)[:topk]
+    return travel_distance, travel_time, total_floors, metrics, normalized, total_score
 
-    return {
-        "c1_info": c1_info,
-        "c2_info": c2_info,
-        "alternatives": sorted_alternatives,
-    }
+
+def update_course_info_dynamic(campus, course_id, new_building, new_room, new_location):
+    """
+    Update the course information dynamically as overrides in the CampusOverlay `campus`.
+    Ensure all necessary elements are updated, including building details, room details, and capacities.
+    """
+    # Find the building number matching the new location
+    building_number = campus.building_ids_by_location.get((new_location["lat"], new_location["lon"]))
+
+    if building_number is None:
+        raise ValueError(f"Building location {new_location} not found in building_loc")
+
+    course = campus.course(course_id)
+    building_data = campus.building_loc[building_number]
+
+    # Update the course information
+    campus.apply(course_id, {
+        'RoomNumber': new_room,
+        'BuildingName': new_building,
+        'BuildingNumber': building_number,
+        # Update related building attributes from `building_loc`
+        'BldgAbbr': building_data.get("abbr", "N/A"),  # Update building abbreviation
+        'Region': building_data.get("region", "N/A"),  # Update region if available
+        # Ensure capacity remains consistent
+        'RoomCapacity': building_data.get("room_capacity", course.get('RoomCapacity', "N/A"))
+    })
+
+    # No change to other static attributes like `NumStudents`
 
 
 def reschedule(
@@ -172,52 +1367,78 @@ def reschedule(
     input_data,
     origin_lat_lon,
     origin_building_name,
-    topk=3
+    topk=3,
+    cache=None
 ):
     """
     Dynamically reschedule courses starting from the origin, updating the alternatives
     for each subsequent course based on the top-1 alternative selected for the previous course.
     """
+    return dynamic_reschedule(
+        course_list,
+        input_data,
+        origin_lat_lon,
+        origin_building_name,
+        [0] * len(course_list),
+        topk=topk,
+        cache=cache
+    )
 
-    updated_courses_info, room_timetable, building_loc = input_data
-    # Create a copy to dynamically record changes
-    updated_courses_info_dynamic = copy.deepcopy(updated_courses_info)
-
-    def update_course_info_dynamic(course_id, new_building, new_room, new_location, updated_courses_info_dynamic, building_loc):
-        """
-        Update the course information dynamically in updated_courses_info_dynamic.
-        Ensure all necessary elements are updated, including building details, room details, and capacities.
-        """
-        building_number = None
 
-        # Find the building number matching the new location
-        for key, value in building_loc.items():
-            if value["lat"] == new_location["lat"] and value["lon"] == new_location["lon"]:
-                building_number = key
-                break
+def radar_charts(course_chain, subplots_per_row=5):
+    """
+    Plot radar charts of the normalized metrics for every hop's options (see timetable_plots.radar_charts).
+    Matplotlib is only imported on the first call, so the CLI and workers never pay for it.
+    """
+    from timetable_plots import radar_charts as plot_radar_charts
 
-        if building_number is None:
-            raise ValueError(f"Building location {new_location} not found in building_loc")
+    return plot_radar_charts(course_chain, subplots_per_row)
 
-        # Update the course information
-        for course in updated_courses_info_dynamic['courses']:
-            if course['CourseNumb'] == course_id:
-                course['RoomNumber'] = new_room
-                course['BuildingName'] = new_building
-                course['BuildingNumber'] = building_number
 
-                # Update related building attributes from `building_loc`
-                building_data = building_loc[building_number]
-                course['BldgAbbr'] = building_data.get("abbr", "N/A")  # Update building abbreviation
-                course['Region'] = building_data.get("region", "N/A")  # Update region if available
+def dynamic_reschedule(
+    course_list,
+    data,
+    origin_lat_lon,
+    origin_building_name,
+    selection_indices, 
+    topk=3,
+    cache=None,
+    nested_metrics=True
+):
+    """
+    Dynamically reschedule courses starting from the origin, using manual input for selection
+    from the alternatives for each course in the list.
+    Each entry of `selection_indices` is an index into the top-k options, a (building, room) pair
+    (which may rank below the top-k) or None to keep the course in its original room.
+    `cache` is passed to find_alternative_classrooms so repeated course pairs are ranked once.
+    With `nested_metrics=False`, options are listed without the copy of their metrics under `metrics`.
+    """
+    with METRICS.stage("reschedule.chain"):
+        return dict(iter_dynamic_reschedule(
+            course_list, data, origin_lat_lon, origin_building_name, selection_indices, topk, cache, nested_metrics
+        ))
 
-                # Ensure capacity remains consistent
-                course['RoomCapacity'] = building_data.get("room_capacity", course.get('RoomCapacity', "N/A"))
 
-                # No change to other static attributes like `NumStudents`
-                break
+def iter_dynamic_reschedule(
+    course_list,
+    data,
+    origin_lat_lon,
+    origin_building_name,
+    selection_indices,
+    topk=3,
+    cache=None,
+    nested_metrics=True
+):
+    """
+    dynamic_reschedule as a generator of (key, hop) pairs ("Origin", "Course_1", ...), each yielded
+    as soon as it is computed so callers can stream the chain out hop by hop.
+    """
+    campus = _as_campus(data)
+    METRICS.incr("reschedule.chains")
+    METRICS.incr("reschedule.hops", len(course_list) + 1)
 
-    course_chain = {}
+    # Record changes as overrides on top of the unmodified catalogue
+    campus_dynamic = CampusOverlay(campus)
 
     # Add origin to the chain
     origin_info = {
@@ -235,68 +1456,34 @@ def reschedule(
 
     # Fetch options for the first course (C1) from Origin
     first_course_id = course_list[0]
-    origin_result = find_alternative_classrooms(
-        "Origin", first_course_id, (updated_courses_info_dynamic, room_timetable, building_loc), topk, origin_location=origin_lat_lon
-    )
-    origin_options = origin_result["alternatives"]
+    origin_options = _find_alternatives(
+        "Origin", first_course_id, campus_dynamic, topk, origin_location=origin_lat_lon, cache=cache
+    )[2]
 
-    # Select the top-1 option for the first course (C1)
-    top_option_c1 = origin_options[0] if origin_options else None
+    # Select manually the option for the first course (C1)
+    selected_option_c1 = _selected_option(
+        "Origin", first_course_id, campus_dynamic, origin_options, selection_indices[0], origin_lat_lon, cache
+    )
 
-    # Add Origin information to the chain
-    course_chain["Origin"] = {
+    # Origin information for the chain
+    yield "Origin", {
         "id": 0,
         "original_current_course": origin_info,
-        "original_next_course": next(course for course in updated_courses_info["courses"] if course["CourseNumb"] == first_course_id),
-        "original_options_for_next_course": [
-            {
-                **opt,
-                "metrics": {
-                    "distance_saved": opt["distance_saved"],
-                    "time_saved": opt["time_saved"],
-                    "floors_saved": opt["floors_saved"],
-                    "occupancy_improved": opt["occupancy_improved"],
-                    "normalized": {
-                        "distance_saved_normalized": opt["distance_saved_normalized"],
-                        "time_saved_normalized": opt["time_saved_normalized"],
-                        "floors_saved_normalized": opt["floors_saved_normalized"],
-                        "occupancy_improved_normalized": opt["occupancy_improved_normalized"]
-                    }
-                },
-                "total_score": opt["total_score"]
-            } for opt in origin_options
-        ],
+        "original_next_course": campus.course(first_course_id),
+        "original_options_for_next_course": _chain_options(origin_options, nested_metrics),
         "updated_current_course": origin_info,
-        "updated_options_for_next_course": [
-            {
-                **opt,
-                "metrics": {
-                    "distance_saved": opt["distance_saved"],
-                    "time_saved": opt["time_saved"],
-                    "floors_saved": opt["floors_saved"],
-                    "occupancy_improved": opt["occupancy_improved"],
-                    "normalized": {
-                        "distance_saved_normalized": opt["distance_saved_normalized"],
-                        "time_saved_normalized": opt["time_saved_normalized"],
-                        "floors_saved_normalized": opt["floors_saved_normalized"],
-                        "occupancy_improved_normalized": opt["occupancy_improved_normalized"]
-                    }
-                },
-                "total_score": opt["total_score"]
-            } for opt in origin_options
-        ],
-        "updated_next_course": top_option_c1
+        "updated_options_for_next_course": _chain_options(origin_options, nested_metrics),
+        "updated_next_course": selected_option_c1.to_dict() if selected_option_c1 else None
     }
 
     # Update C1 in updated_courses_info_dynamic based on the selected option
-    if top_option_c1:
+    if selected_option_c1:
         update_course_info_dynamic(
+            campus_dynamic,
             first_course_id,
-            top_option_c1["building"],
-            top_option_c1["room"],
-            {"lat": top_option_c1["building_location"][0], "lon": top_option_c1["building_location"][1]},
-            updated_courses_info_dynamic,
-            building_loc
+            selected_option_c1.building,
+            selected_option_c1.room,
+            {"lat": selected_option_c1.building_location[0], "lon": selected_option_c1.building_location[1]}
         )
 
     # Iterate over the rest of the course list
@@ -306,432 +1493,344 @@ def reschedule(
             next_course_id = course_list[idx + 1]
 
             # Fetch original options for the next course (C_{i+1}) based on updated current course (C_i)
-            original_result = find_alternative_classrooms(
-                current_course_id, next_course_id, (updated_courses_info, room_timetable, building_loc), topk
-            )
-            original_options = original_result["alternatives"]
+            original_options = _find_alternatives(
+                current_course_id, next_course_id, campus, topk, cache=cache
+            )[2]
 
             # Fetch updated options for the next course (C_{i+1}) based on updated current course (C_i)
-            updated_result = find_alternative_classrooms(
-                current_course_id, next_course_id, (updated_courses_info_dynamic, room_timetable, building_loc), topk
-            )
-            updated_options = updated_result["alternatives"]
+            updated_options = _find_alternatives(
+                current_course_id, next_course_id, campus_dynamic, topk, cache=cache
+            )[2]
 
-            # Select the top-1 option for the next course (C_{i+1})
-            top_option_next = updated_options[0] if updated_options else None
+            # Select manually the option for the next course (C_{i+1})
+            selected_option_next = _selected_option(
+                current_course_id, next_course_id, campus_dynamic, updated_options, selection_indices[idx + 1], None, cache
+            )
 
             # Update the next course (C_{i+1}) in updated_courses_info_dynamic dynamically
-            if top_option_next:
+            if selected_option_next:
                 update_course_info_dynamic(
+                    campus_dynamic,
                     next_course_id,
-                    top_option_next["building"],
-                    top_option_next["room"],
-                    {"lat": top_option_next["building_location"][0], "lon": top_option_next["building_location"][1]},
-                    updated_courses_info_dynamic,
-                    building_loc
+                    selected_option_next.building,
+                    selected_option_next.room,
+                    {"lat": selected_option_next.building_location[0], "lon": selected_option_next.building_location[1]}
                 )
 
-            # Add information for the current course to the chain
-            course_chain[f"Course_{idx + 1}"] = {
+            # Information for the current course in the chain
+            yield f"Course_{idx + 1}", {
                 "id": idx + 1,
-                "original_current_course": next(course for course in updated_courses_info["courses"] if course["CourseNumb"] == current_course_id),
-                "original_next_course": next(course for course in updated_courses_info["courses"] if course["CourseNumb"] == next_course_id),
-                "original_options_for_next_course": [
-                    {
-                        **opt,
-                        "metrics": {
-                            "distance_saved": opt["distance_saved"],
-                            "time_saved": opt["time_saved"],
-                            "floors_saved": opt["floors_saved"],
-                            "occupancy_improved": opt["occupancy_improved"],
-                            "normalized": {
-                                "distance_saved_normalized": opt["distance_saved_normalized"],
-                                "time_saved_normalized": opt["time_saved_normalized"],
-                                "floors_saved_normalized": opt["floors_saved_normalized"],
-                                "occupancy_improved_normalized": opt["occupancy_improved_normalized"]
-                            }
-                        },
-                        "total_score": opt["total_score"]
-                    } for opt in original_options
-                ],
-                "updated_current_course": next(course for course in updated_courses_info_dynamic["courses"] if course["CourseNumb"] == current_course_id),
-                "updated_options_for_next_course": [
-                    {
-                        **opt,
-                        "metrics": {
-                            "distance_saved": opt["distance_saved"],
-                            "time_saved": opt["time_saved"],
-                            "floors_saved": opt["floors_saved"],
-                            "occupancy_improved": opt["occupancy_improved"],
-                            "normalized": {
-                                "distance_saved_normalized": opt["distance_saved_normalized"],
-                                "time_saved_normalized": opt["time_saved_normalized"],
-                                "floors_saved_normalized": opt["floors_saved_normalized"],
-                                "occupancy_improved_normalized": opt["occupancy_improved_normalized"]
-                            }
-                        },
-                        "total_score": opt["total_score"]
-                    } for opt in updated_options
-                ],
-                "updated_next_course": top_option_next
+                "original_current_course": campus.course(current_course_id),
+                "original_next_course": campus.course(next_course_id),
+                "original_options_for_next_course": _chain_options(original_options, nested_metrics),
+                "updated_current_course": campus_dynamic.course(current_course_id),
+                "updated_options_for_next_course": _chain_options(updated_options, nested_metrics),
+                "updated_next_course": selected_option_next.to_dict() if selected_option_next else None
             }
         else:
             # For the last course, add its information without "next course" details
-            last_result = find_alternative_classrooms(
-                current_course_id, current_course_id, (updated_courses_info_dynamic, room_timetable, building_loc), topk
-            )
-            last_options = last_result["alternatives"]
+            last_options = _find_alternatives(
+                current_course_id, current_course_id, campus_dynamic, topk, cache=cache
+            )[2]
 
-            course_chain[f"Course_{idx + 1}"] = {
+            yield f"Course_{idx + 1}", {
                 "id": idx + 1,
-                "original_current_course": next(course for course in updated_courses_info["courses"] if course["CourseNumb"] == current_course_id),
-                "original_options_for_current_course": [
-                    {
-                        **opt,
-                        "metrics": {
-                            "distance_saved": opt["distance_saved"],
-                            "time_saved": opt["time_saved"],
-                            "floors_saved": opt["floors_saved"],
-                            "occupancy_improved": opt["occupancy_improved"],
-                            "normalized": {
-                                "distance_saved_normalized": opt["distance_saved_normalized"],
-                                "time_saved_normalized": opt["time_saved_normalized"],
-                                "floors_saved_normalized": opt["floors_saved_normalized"],
-                                "occupancy_improved_normalized": opt["occupancy_improved_normalized"]
-                            }
-                        },
-                        "total_score": opt["total_score"]
-                    } for opt in last_options
-                ],
-                "updated_current_course": next(course for course in updated_courses_info_dynamic["courses"] if course["CourseNumb"] == current_course_id)
+                "original_current_course": campus.course(current_course_id),
+                "original_options_for_current_course": _chain_options(last_options, nested_metrics),
+                "updated_current_course": campus_dynamic.course(current_course_id)
             }
 
-    return course_chain
-
 
-def radar_charts(course_chain, subplots_per_row=5):
+def _chain_options(options, nested_metrics=True):
     """
-    Plot radar charts for the four metrics (distance_saved, time_saved, floors_saved, occupancy_improved)
-    for all the options of each course in the course chain, with adjustable subplots per row and enhanced visuals.
+    Alternative records as option dicts for a course_chain: each alternative followed by its metrics
+    again under `metrics`/`normalized`, or the alternatives alone when `nested_metrics` is False.
     """
-
-    # Metrics and their normalized counterparts
-    metrics = ["distance_saved", "time_saved", "floors_saved", "occupancy_improved"]
-    normalized_metrics = [f"{metric}_normalized" for metric in metrics]
-    num_metrics = len(normalized_metrics)
-    angles = np.linspace(0, 2 * np.pi, num_metrics, endpoint=False).tolist()
-    angles += angles[:1]  # Close the radar chart loop
-
-    # Define nicer labels for the metrics
-    metric_labels = {
-        "distance_saved_normalized": "Distance\nSaved",
-        "time_saved_normalized": "Time\nSaved",
-        "floors_saved_normalized": "Floors\nSaved",
-        "occupancy_improved_normalized": "Occupancy\nImproved"
-    }
-
-    # Define colors for better visual effect
-    color_palette = list(mcolors.TABLEAU_COLORS.values())
-
-    # Loop through each course in the chain, sorted by ID for consistency
-    for course_key in sorted(course_chain.keys(), key=lambda k: course_chain[k]["id"]):
-        course_data = course_chain[course_key]
-        # print(course_data)
-        # Ensure there are options available for radar plotting
-        if "updated_options_for_next_course" not in course_data or not course_data["updated_options_for_next_course"]:
-            continue
-
-        options = course_data["updated_options_for_next_course"]
-        num_options = len(options)
-        rows = (num_options + subplots_per_row - 1) // subplots_per_row
-        fig, axs = plt.subplots(rows, subplots_per_row, figsize=(subplots_per_row * 3, rows * 3), subplot_kw=dict(polar=True))
-        axs = axs.flatten() if num_options > 1 else [axs]
-
-        # Retrieve the course ID for the title
-        current_course_id = course_data["updated_next_course"]["course_number"]
-        start_time = course_data["original_next_course"]["StartTimeStr"]
-        end_time = course_data["original_next_course"]["EndTimeStr"]
-        for i, option in enumerate(options):
-            values = [option["metrics"]["normalized"].get(metric, 0) for metric in normalized_metrics]
-            values += values[:1]  # Close the radar chart loop
-            ax = axs[i]
-            ax.set_theta_offset(np.pi / 2)
-            ax.set_theta_direction(-1)
-
-            # Plot the radar chart for this option
-            ax.plot(angles, values, label=f"Room: {option['room']}", color=color_palette[i % len(color_palette)])
-            ax.fill(angles, values, alpha=0.25, color=color_palette[i % len(color_palette)])
-
-            # Add gridlines and labels
-            ax.set_yticks([0.25, 0.5, 0.75, 1])
-            ax.set_yticklabels(["0.25", "0.5", "0.75", "1"], fontsize=10)
-            ax.set_xticks(angles[:-1])
-            ax.set_xticklabels([metric_labels[m] for m in normalized_metrics], fontsize=10)
-            total_score = option.get("total_score", 0)
-            ax.set_title(
-                f"{option['building']}\nRoom: $\mathbf{{{option['room']}}}$\nTotal Score: $\mathbf{{{total_score:.2f}}}$",
-                va="bottom",
-                fontsize=10
-            )
-
-        # Add empty subplots if necessary
-        for j in range(num_options, len(axs)):
-            fig.delaxes(axs[j])  # Mark unused axes as empty
-
-
-        # Correctly set suptitle from the first course to the last
-        suptitle = f"Options of Course ID: $\mathbf{{{current_course_id}}}$\n{start_time} - {end_time}"
-        fig.suptitle(suptitle, fontsize=14)
-        plt.tight_layout()
-        plt.show()
+    return [option.to_dict(nested_metrics) for option in options]
 
 
-def dynamic_reschedule(
+def _selected_option(c1_id, c2_id, campus_dynamic, options, selection, origin_location, cache):
+    """
+    Resolve one entry of `selection_indices` against the top-k Alternative `options` for C2.
+    A (building, room) pair missing from `options` is looked up in the full ranking.
+    """
+    if selection is None:
+        return None
+    if not isinstance(selection, (tuple, list)):
+        return options[selection] if options and selection < len(options) else None
+
+    building, room = selection
+    for opt in options:
+        if opt.building == building and opt.room == room:
+            return opt
+    all_options = _find_alternatives(
+        c1_id, c2_id, campus_dynamic, None, origin_location=origin_location, cache=cache
+    )[2]
+    return next((opt for opt in all_options if opt.building == building and opt.room == room), None)
+
+
+def optimal_reschedule(
     course_list,
     data,
     origin_lat_lon,
     origin_building_name,
-    selection_indices, 
-    topk=3
+    topk=3,
+    k_best=1,
+    beam_width=None,
+    cache=None,
+    nested_metrics=True
 ):
     """
-    Dynamically reschedule courses starting from the origin, using manual input for selection
-    from the alternatives for each course in the list.
+    Choose a room for every course in the list so that the summed total_score of the hops
+    Origin -> C1 -> ... -> Cn is as high as possible, instead of taking the best option hop by hop.
+    Runs a Viterbi pass over the layered graph of (course, candidate room), keeping the `k_best`
+    best partial chains per room and, with `beam_width`, only that many rooms per course.
+    A course without a free room keeps its original room and adds 0 to the score.
+    Returns up to `k_best` dicts {"total_score", "course_chain"}, best first; each course_chain
+    is the dynamic_reschedule output for that choice of rooms with `topk` options listed per hop
+    (and `nested_metrics` passed on).
     """
-    updated_courses_info, room_timetable, building_loc = data
-
-    # Create a copy to dynamically record changes
-    updated_courses_info_dynamic = copy.deepcopy(updated_courses_info)
-
-    def update_course_info_dynamic(course_id, new_building, new_room, new_location, updated_courses_info_dynamic, building_loc):
-        """
-        Update the course information dynamically in updated_courses_info_dynamic.
-        Ensure all necessary elements are updated, including building details, room details, and capacities.
-        """
-        building_number = None
-
-        # Find the building number matching the new location
-        for key, value in building_loc.items():
-            if value["lat"] == new_location["lat"] and value["lon"] == new_location["lon"]:
-                building_number = key
-                break
+    campus = _as_campus(data)
+
+    # Placements of the previous course as distance-matrix rows (time rows including the way down
+    # from the placement's floor) and floors, starting at the origin
+    distance_rows, time_rows = campus.distances.origin_row(origin_lat_lon['lat'], origin_lat_lon['lon'])
+    distance_rows, time_rows = distance_rows[None, :], time_rows[None, :]
+    floors = np.ones((1, 1), dtype=np.int64)
+
+    # Scores of the k best partial chains ending in each placement; one (rooms, back-pointers) per course
+    scores = np.zeros((1, 1))
+    layers = []
+
+    for position, course_id in enumerate(course_list):
+        with METRICS.stage("optimal.layer"):
+            c2 = campus.course(course_id)
+            c2_building = campus.distances.index[str(int(c2['BuildingNumber']))]
+            candidates = _candidate_rooms(campus, c2)
+
+            if len(candidates) == 0:
+                # Nothing to move to: the course stays put and every partial chain carries over
+                rooms = [None]
+                hop_scores = np.zeros((len(scores), 1))
+                buildings = np.array([c2_building])
+                room_floors = np.array([room_floor(c2['RoomNumber'])])
+                room_verticals = campus.distances.vertical_minutes(buildings, room_floors)
+            else:
+                # One (previous placements x rooms) block of the score tensor, as _rank_alternatives would
+                # score each hop; the C1 -> C2 terms only shift each row and cancel in the normalization
+                c1_to_c2_floors = 0 if position == 0 else abs(floors - 1) + _c2_floor_term(c2)
+                c2_vertical = float(campus.distances.vertical_minutes(c2_building, room_floor(c2['RoomNumber'])))
+                hop_scores = _score_candidates(
+                    campus, candidates, c2, distance_rows, time_rows, floors,
+                    distance_rows[:, [c2_building]], time_rows[:, [c2_building]] + c2_vertical, c1_to_c2_floors
+                )[-1]
+                rooms = [campus.availability.room_keys[i] for i in candidates]
+                buildings = campus.room_building[candidates]
+                room_floors = campus.room_floor[candidates]
+                room_verticals = campus.room_vertical_min[candidates]
+
+            # Extend every kept partial chain by every room and keep the k best per room
+            previous_k = scores.shape[1]
+            totals = (scores[:, :, None] + hop_scores[:, None, :]).reshape(-1, hop_scores.shape[1])
+            back = np.argsort(-totals, axis=0, kind="stable")[:k_best].T
+            scores = np.take_along_axis(totals, back.T, axis=0).T
+
+            if beam_width and len(rooms) > beam_width:
+                keep = np.sort(np.argsort(-scores[:, 0], kind="stable")[:beam_width])
+                rooms = [rooms[i] for i in keep]
+                back, scores = back[keep], scores[keep]
+                buildings, room_floors, room_verticals = buildings[keep], room_floors[keep], room_verticals[keep]
+
+            layers.append((rooms, back, previous_k))
+            distance_rows = campus.distances.distance_km[buildings]
+            time_rows = campus.distances.walking_time_min[buildings] + room_verticals[:, None]
+            floors = room_floors[:, None]
+
+    # Walk the back-pointers of the k best complete chains
+    chains = []
+    for flat in np.argsort(-scores, axis=None, kind="stable")[:k_best]:
+        room_index, rank = divmod(int(flat), scores.shape[1])
+        total_score = float(scores[room_index, rank])
+
+        selections = []
+        for rooms, back, previous_k in reversed(layers):
+            selections.append(rooms[room_index])
+            room_index, rank = divmod(int(back[room_index, rank]), previous_k)
+        selections.reverse()
+
+        chains.append({
+            "total_score": total_score,
+            "course_chain": dynamic_reschedule(
+                course_list, campus, origin_lat_lon, origin_building_name, selections,
+                topk=topk, cache=cache, nested_metrics=nested_metrics
+            )
+        })
 
-        if building_number is None:
-            raise ValueError(f"Building location {new_location} not found in building_loc")
+    return chains
 
-        # Update the course information
-        for course in updated_courses_info_dynamic['courses']:
-            if course['CourseNumb'] == course_id:
-                course['RoomNumber'] = new_room
-                course['BuildingName'] = new_building
-                course['BuildingNumber'] = building_number
 
-                # Update related building attributes from `building_loc`
-                building_data = building_loc[building_number]
-                course['BldgAbbr'] = building_data.get("abbr", "N/A")  # Update building abbreviation
-                course['Region'] = building_data.get("region", "N/A")  # Update region if available
+def batch_reschedule(
+    requests,
+    campus,
+    topk=10,
+    origin_lat_lon=None,
+    origin_building_name="Origin",
+    cache=None,
+    nested_metrics=True
+):
+    """
+    Run dynamic_reschedule for many jobs against one loaded campus, yielding (job index, result)
+    as each job finishes so results can be streamed out. The result is {"course_chain": ...}, or
+    {"error": ...} for a malformed job, which does not stop the jobs after it.
+    Each job is a dict with `course_list` and optionally `origin` ({"lat", "lon"}), `origin_building_name`,
+    `selection_indices` (defaults to all zeros) and `topk`; missing values fall back to the arguments here.
+    All jobs share the campus's alternatives cache (or `cache`), so a course pair placed identically
+    in several jobs is ranked once. `nested_metrics` is passed on to dynamic_reschedule.
+    """
+    campus = _as_campus(campus)
+    if cache is None:
+        cache = campus.alternatives_cache
+
+    for index, job in enumerate(requests):
+        yield index, _batch_job_result(campus, job, topk, origin_lat_lon, origin_building_name, cache, nested_metrics)
+
+
+def _check_reschedule_job(campus, job):
+    # (course_list, selection_indices) of the job, or ValueError before any of it runs
+    course_list = job["course_list"]
+    if not isinstance(course_list, list) or not course_list:
+        raise ValueError("course_list must be a non-empty list of course ids")
+    for course_id in course_list:
+        campus.course(course_id)
+    selection_indices = job.get("selection_indices") or [0] * len(course_list)
+    if not isinstance(selection_indices, list) or len(selection_indices) != len(course_list):
+        raise ValueError(f"selection_indices must have one entry per course ({len(course_list)})")
+    return course_list, selection_indices
+
+
+def _run_reschedule_job(campus, job, topk, origin_lat_lon, origin_building_name, cache, nested_metrics=True):
+    course_list, selection_indices = _check_reschedule_job(campus, job)
+    METRICS.incr("batch.jobs")
+    with METRICS.stage("batch.job"):
+        return dynamic_reschedule(
+            course_list,
+            campus,
+            job.get("origin", origin_lat_lon),
+            job.get("origin_building_name", origin_building_name),
+            selection_indices,
+            topk=job.get("topk", topk),
+            cache=cache,
+            nested_metrics=nested_metrics
+        )
 
-                # Ensure capacity remains consistent
-                course['RoomCapacity'] = building_data.get("room_capacity", course.get('RoomCapacity', "N/A"))
 
-                # No change to other static attributes like `NumStudents`
-                break
+def _batch_job_result(campus, job, topk, origin_lat_lon, origin_building_name, cache, nested_metrics=True):
+    # {"course_chain": ...}, or {"error": ...} if the job is malformed
+    try:
+        return {"course_chain": _run_reschedule_job(campus, job, topk, origin_lat_lon, origin_building_name, cache, nested_metrics)}
+    except (KeyError, TypeError, ValueError) as e:
+        METRICS.incr("batch.errors")
+        return {"error": f"{type(e).__name__}: {e}"}
 
-    course_chain = {}
 
-    # Add origin to the chain
-    origin_info = {
-        "CourseNumb": "Origin",
-        "room": "N/A",
-        "building": origin_building_name,
-        "building_location": origin_lat_lon,
-        "start_time": "N/A",
-        "end_time": "N/A",
-        "floor": "N/A",
-        "room_capacity": "N/A",
-        "num_students": "N/A",
-        "occupancy_rate": "N/A"
-    }
-
-    # Fetch options for the first course (C1) from Origin
-    first_course_id = course_list[0]
-    origin_result = find_alternative_classrooms(
-        "Origin", first_course_id, (updated_courses_info_dynamic, room_timetable, building_loc), topk, origin_location=origin_lat_lon
-    )
-    origin_options = origin_result["alternatives"]
-
-    # Select manually the option for the first course (C1)
-    selected_index_c1 = selection_indices[0]
-    selected_option_c1 = origin_options[selected_index_c1] if origin_options and selected_index_c1 < len(origin_options) else None
+# Per-process state of parallel_batch_reschedule workers, set once by the pool initializer
+_worker_state = None
 
-    # Add Origin information to the chain
-    course_chain["Origin"] = {
-        "id": 0,
-        "original_current_course": origin_info,
-        "original_next_course": next(course for course in updated_courses_info["courses"] if course["CourseNumb"] == first_course_id),
-        "original_options_for_next_course": [
-            {
-                **opt,
-                "metrics": {
-                    "distance_saved": opt["distance_saved"],
-                    "time_saved": opt["time_saved"],
-                    "floors_saved": opt["floors_saved"],
-                    "occupancy_improved": opt["occupancy_improved"],
-                    "normalized": {
-                        "distance_saved_normalized": opt["distance_saved_normalized"],
-                        "time_saved_normalized": opt["time_saved_normalized"],
-                        "floors_saved_normalized": opt["floors_saved_normalized"],
-                        "occupancy_improved_normalized": opt["occupancy_improved_normalized"]
-                    }
-                },
-                "total_score": opt["total_score"]
-            } for opt in origin_options
-        ],
-        "updated_current_course": origin_info,
-        "updated_options_for_next_course": [
-            {
-                **opt,
-                "metrics": {
-                    "distance_saved": opt["distance_saved"],
-                    "time_saved": opt["time_saved"],
-                    "floors_saved": opt["floors_saved"],
-                    "occupancy_improved": opt["occupancy_improved"],
-                    "normalized": {
-                        "distance_saved_normalized": opt["distance_saved_normalized"],
-                        "time_saved_normalized": opt["time_saved_normalized"],
-                        "floors_saved_normalized": opt["floors_saved_normalized"],
-                        "occupancy_improved_normalized": opt["occupancy_improved_normalized"]
-                    }
-                },
-                "total_score": opt["total_score"]
-            } for opt in origin_options
-        ],
-        "updated_next_course": selected_option_c1
-    }
 
-    # Update C1 in updated_courses_info_dynamic based on the selected option
-    if selected_option_c1:
-        update_course_info_dynamic(
-            first_course_id,
-            selected_option_c1["building"],
-            selected_option_c1["room"],
-            {"lat": selected_option_c1["building_location"][0], "lon": selected_option_c1["building_location"][1]},
-            updated_courses_info_dynamic,
-            building_loc
+def _init_reschedule_worker(
+    data_dir, snapshot_dir, topk, origin_lat_lon, origin_building_name, cache_size, nested_metrics, walkways, travel_mode
+):
+    global _worker_state
+    campus = CampusIndex.load(data_dir, snapshot_dir, cache_size, walkways, travel_mode)
+    _worker_state = (campus, topk, origin_lat_lon, origin_building_name, campus.alternatives_cache, nested_metrics)
+
+
+def _reschedule_worker_job(job):
+    campus, topk, origin_lat_lon, origin_building_name, cache, nested_metrics = _worker_state
+    return _batch_job_result(campus, job, topk, origin_lat_lon, origin_building_name, cache, nested_metrics)
+
+
+def parallel_batch_reschedule(
+    requests,
+    data_dir="./data",
+    workers=None,
+    topk=10,
+    origin_lat_lon=None,
+    origin_building_name="Origin",
+    chunksize=16,
+    cache_size=4096,
+    snapshot_dir=None,
+    nested_metrics=True,
+    walkways=None,
+    travel_mode="walk"
+):
+    """
+    batch_reschedule fanned out over a process pool of `workers` processes (default: one per CPU).
+    Each worker loads the campus from `data_dir` (or the compiled `snapshot_dir`, whose pages the
+    workers share) once in its initializer, so only the small job dicts and the resulting chains
+    cross process boundaries. Results are yielded as (job index, result) in job order, as by batch_reschedule.
+    """
+    # Imported here: the process pool machinery is only needed for multi-worker batches
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_reschedule_worker,
+        initargs=(
+            data_dir, snapshot_dir, topk, origin_lat_lon, origin_building_name, cache_size, nested_metrics,
+            walkways, travel_mode
         )
+    ) as executor:
+        yield from enumerate(executor.map(_reschedule_worker_job, requests, chunksize=chunksize))
 
-    # Iterate over the rest of the course list
-    for idx in range(len(course_list)):
-        current_course_id = course_list[idx]
-        if idx < len(course_list) - 1:
-            next_course_id = course_list[idx + 1]
-
-            # Fetch original options for the next course (C_{i+1}) based on updated current course (C_i)
-            original_result = find_alternative_classrooms(
-                current_course_id, next_course_id, (updated_courses_info, room_timetable, building_loc), topk
-            )
-            original_options = original_result["alternatives"]
-
-            # Fetch updated options for the next course (C_{i+1}) based on updated current course (C_i)
-            updated_result = find_alternative_classrooms(
-                current_course_id, next_course_id, (updated_courses_info_dynamic, room_timetable, building_loc), topk
-            )
-            updated_options = updated_result["alternatives"]
 
-            # Select manually the option for the next course (C_{i+1})
-            selected_index_next = selection_indices[idx + 1]
-            selected_option_next = updated_options[selected_index_next] if updated_options and selected_index_next < len(updated_options) else None
-
-            # Update the next course (C_{i+1}) in updated_courses_info_dynamic dynamically
-            if selected_option_next:
-                update_course_info_dynamic(
-                    next_course_id,
-                    selected_option_next["building"],
-                    selected_option_next["room"],
-                    {"lat": selected_option_next["building_location"][0], "lon": selected_option_next["building_location"][1]},
-                    updated_courses_info_dynamic,
-                    building_loc
-                )
-
-            # Add information for the current course to the chain
-            course_chain[f"Course_{idx + 1}"] = {
-                "id": idx + 1,
-                "original_current_course": next(course for course in updated_courses_info["courses"] if course["CourseNumb"] == current_course_id),
-                "original_next_course": next(course for course in updated_courses_info["courses"] if course["CourseNumb"] == next_course_id),
-                "original_options_for_next_course": [
-                    {
-                        **opt,
-                        "metrics": {
-                            "distance_saved": opt["distance_saved"],
-                            "time_saved": opt["time_saved"],
-                            "floors_saved": opt["floors_saved"],
-                            "occupancy_improved": opt["occupancy_improved"],
-                            "normalized": {
-                                "distance_saved_normalized": opt["distance_saved_normalized"],
-                                "time_saved_normalized": opt["time_saved_normalized"],
-                                "floors_saved_normalized": opt["floors_saved_normalized"],
-                                "occupancy_improved_normalized": opt["occupancy_improved_normalized"]
-                            }
-                        },
-                        "total_score": opt["total_score"]
-                    } for opt in original_options
-                ],
-                "updated_current_course": next(course for course in updated_courses_info_dynamic["courses"] if course["CourseNumb"] == current_course_id),
-                "updated_options_for_next_course": [
-                    {
-                        **opt,
-                        "metrics": {
-                            "distance_saved": opt["distance_saved"],
-                            "time_saved": opt["time_saved"],
-                            "floors_saved": opt["floors_saved"],
-                            "occupancy_improved": opt["occupancy_improved"],
-                            "normalized": {
-                                "distance_saved_normalized": opt["distance_saved_normalized"],
-                                "time_saved_normalized": opt["time_saved_normalized"],
-                                "floors_saved_normalized": opt["floors_saved_normalized"],
-                                "occupancy_improved_normalized": opt["occupancy_improved_normalized"]
-                            }
-                        },
-                        "total_score": opt["total_score"]
-                    } for opt in updated_options
-                ],
-                "updated_next_course": selected_option_next
-            }
-        else:
-            # For the last course, add its information without "next course" details
-            last_result = find_alternative_classrooms(
-                current_course_id, current_course_id, (updated_courses_info_dynamic, room_timetable, building_loc), topk
-            )
-            last_options = last_result["alternatives"]
+def iter_batch_requests(path):
+    """
+    Read batch jobs from a JSON list, or lazily from an NDJSON file with one job object per line.
+    """
+    with open(path, 'r') as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == '[':
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_chain_records(hops, **fields):
+    """
+    One flat record per hop of a course chain (a dict or (key, hop) pairs): `fields`, then "hop" with the
+    hop key, then the hop itself.
+    """
+    for key, hop in (hops.items() if isinstance(hops, dict) else hops):
+        yield {**fields, "hop": key, **hop}
 
-            course_chain[f"Course_{idx + 1}"] = {
-                "id": idx + 1,
-                "original_current_course": next(course for course in updated_courses_info["courses"] if course["CourseNumb"] == current_course_id),
-                "original_options_for_current_course": [
-                    {
-                        **opt,
-                        "metrics": {
-                            "distance_saved": opt["distance_saved"],
-                            "time_saved": opt["time_saved"],
-                            "floors_saved": opt["floors_saved"],
-                            "occupancy_improved": opt["occupancy_improved"],
-                            "normalized": {
-                                "distance_saved_normalized": opt["distance_saved_normalized"],
-                                "time_saved_normalized": opt["time_saved_normalized"],
-                                "floors_saved_normalized": opt["floors_saved_normalized"],
-                                "occupancy_improved_normalized": opt["occupancy_improved_normalized"]
-                            }
-                        },
-                        "total_score": opt["total_score"]
-                    } for opt in last_options
-                ],
-                "updated_current_course": next(course for course in updated_courses_info_dynamic["courses"] if course["CourseNumb"] == current_course_id)
-            }
 
-    return course_chain
+def write_ndjson(records, out):
+    """
+    Write each record as one compact JSON line to the open file `out`, flushing after every line
+    so consumers can read results while later ones are still being computed.
+    """
+    for record in records:
+        out.write(json.dumps(record, separators=(",", ":")) + "\n")
+        out.flush()
 
 
-def main(course_list, origin_lat_lon, origin_building_name, selection_indices, topk=10):
+def main(
+    course_list,
+    origin_lat_lon,
+    origin_building_name,
+    selection_indices,
+    topk=10,
+    snapshot_dir=None,
+    nested_metrics=True,
+    walkways=None,
+    travel_mode="walk"
+):
     """
     Main function for dynamic classroom rescheduling.
     Args:
@@ -740,26 +1839,25 @@ def main(course_list, origin_lat_lon, origin_building_name, selection_indices, t
         origin_building_name: Name of the origin building.
         selection_indices: List of indices for manual selection.
         topk: Number of top alternatives to consider.
+        snapshot_dir: Compiled campus snapshot to load instead of the JSON files in ./data.
+        nested_metrics: False to list options without the copy of their metrics under `metrics`.
+        walkways: Walkway graph file to route travel over instead of straight lines.
+        travel_mode: "walk", "bicycle", "bus" or "mix" (the weighted mode mix).
     Returns:
         JSON-like dictionary containing the reschedule chain.
     """
 
-    with open('./data/courses_info.json', 'r') as f:
-        courses_info = json.load(f)
-    with open('./data/building_loc.json', 'r') as f:
-        building_loc = json.load(f)
-    with open('./data/room_timetable.json', 'r') as f:
-        room_timetable = json.load(f)
-
-    input_data = (courses_info, room_timetable, building_loc)
+    campus = CampusIndex.load('./data', snapshot_dir, walkways=walkways, travel_mode=travel_mode)
 
     dynamic_course_chain = dynamic_reschedule(
         course_list,
-        input_data,
+        campus,
         origin_lat_lon,
         origin_building_name,
         selection_indices,
-        topk=topk
+        topk=topk,
+        cache=campus.alternatives_cache,
+        nested_metrics=nested_metrics
     )
 
     return dynamic_course_chain
@@ -772,20 +1870,159 @@ if __name__ == '__main__':
     parser.add_argument("--origin_building_name", type=str, default="Nagle Hall", help="Name of the origin building.")
     parser.add_argument("--selection_indices", nargs="+", type=int, default=[0, 0, 0, 0, 0], help="Indices for manual selection.")
     parser.add_argument("--topk", type=int, default=10, help="Number of top alternatives to consider.")
+    parser.add_argument("--batch", type=str, default=None, help="JSON list or NDJSON file of reschedule jobs to run in one pass.")
+    parser.add_argument("--output", type=str, default=None, help="Output file (default: ./data/output.json, or stdout with --batch).")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for --batch (0 for one per CPU).")
+    parser.add_argument("--cache_size", type=int, default=4096, help="Maximum cached course-pair rankings per process.")
+    parser.add_argument("--format", type=str, choices=["json", "ndjson"], default="json", help="Single-run output: one indented JSON document, or one compact JSON line per hop (default: stdout).")
+    parser.add_argument("--compact_metrics", action="store_true", help="List options without the copy of their metrics nested under `metrics`.")
+    parser.add_argument("--snapshot", type=str, default=None, help="Compiled campus snapshot directory to load instead of ./data/*.json.")
+    parser.add_argument("--compile_data", action="store_true", help="Compile ./data/*.json into the snapshot directory (default ./data/snapshot) and exit.")
+    parser.add_argument("--serve", action="store_true", help="Run the HTTP reschedule service (see reschedule_service.py) instead of a single run.")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Address for --serve.")
+    parser.add_argument("--port", type=int, default=8000, help="Port for --serve.")
+    parser.add_argument("--max_concurrency", type=int, default=4, help="Requests computed at once by --serve.")
+    parser.add_argument("--occupancy_feed", type=str, default=None, help="With --serve, apply sensor readings from this NDJSON file or tcp://host:port (see occupancy_feed.py).")
+    parser.add_argument("--optimal", action="store_true", help="Pick the rooms that maximize the chain's summed total_score instead of using --selection_indices.")
+    parser.add_argument("--k_best", type=int, default=1, help="With --optimal, number of best chains to output.")
+    parser.add_argument("--beam_width", type=int, default=None, help="With --optimal, rooms kept per course (default: all).")
+    parser.add_argument("--student_id", type=str, default=None, help="Chain each day of this student's week from students_info.json instead of --course_list.")
+    parser.add_argument("--all_students", action="store_true", help="Weekly travel of every student in students_info.json, as NDJSON (see student_itineraries.py).")
+    parser.add_argument("--walkways", type=str, default=None, help="Walkway graph JSON file to route travel over instead of straight lines (see campus_travel.py).")
+    parser.add_argument("--travel_mode", type=str, choices=TRAVEL_MODES, default="walk", help="Travel speeds for distances and times: one mode, or mix for the weighted walk/bicycle/bus mix.")
+    parser.add_argument("--metrics", action="store_true", help="Collect stage timers and counters and print them to stderr at exit (parent process only with --workers).")
+    parser.add_argument("--metrics_format", type=str, choices=["json", "prometheus"], default="json", help="Format of the --metrics report.")
+    parser.add_argument("--profile", type=str, default=None, help="Profile the run into this file: collapsed stacks for *.collapsed / *.folded, cProfile stats otherwise.")
     args = parser.parse_args()
+    origin_lat_lon = {"lat": args.origin_lat, "lon": args.origin_lon}
+    nested_metrics = not args.compact_metrics
 
-    course_chain = main(
-        args.course_list,
-        {"lat": args.origin_lat, "lon": args.origin_lon},
-        args.origin_building_name,
-        args.selection_indices,
-        args.topk
-    )
+    if args.profile:
+        from campus_metrics import start_profiling
+
+        start_profiling(args.profile)
+    if args.metrics:
+        import atexit
+
+        METRICS.enable()
+        if args.metrics_format == "json":
+            atexit.register(lambda: print(json.dumps(METRICS.snapshot()), file=sys.stderr))
+        else:
+            atexit.register(lambda: sys.stderr.write(METRICS.prometheus()))
+
+    if args.compile_data:
+        manifest = compile_campus_snapshot('./data', args.snapshot)
+        print(json.dumps({table: info["rows"] for table, info in manifest["tables"].items()}))
+        sys.exit(0)
+
+    if args.serve:
+        from reschedule_service import serve
+
+        serve(
+            args.host, args.port, args.max_concurrency, './data', args.snapshot, args.cache_size,
+            walkways=args.walkways, travel_mode=args.travel_mode, occupancy_feed=args.occupancy_feed,
+            topk=args.topk, origin_lat_lon=origin_lat_lon, origin_building_name=args.origin_building_name
+        )
+        sys.exit(0)
+
+    if args.student_id is not None or args.all_students:
+        from student_itineraries import run
+
+        run(
+            args.student_id, args.output, './data', args.snapshot, args.cache_size,
+            walkways=args.walkways, travel_mode=args.travel_mode, origin_lat_lon=origin_lat_lon, origin_building_name=args.origin_building_name, topk=args.topk,
+            optimal=args.optimal, beam_width=args.beam_width, nested_metrics=nested_metrics
+        )
+        sys.exit(0)
+
+    if args.batch:
+        # One campus load per process; one JSON line per job, written in job order as results arrive
+        campus = None
+        if args.workers == 1:
+            campus = CampusIndex.load(
+                './data', args.snapshot, alternatives_cache_size=args.cache_size,
+                walkways=args.walkways, travel_mode=args.travel_mode
+            )
+            results = batch_reschedule(
+                iter_batch_requests(args.batch), campus, args.topk, origin_lat_lon, args.origin_building_name,
+                nested_metrics=nested_metrics
+            )
+        else:
+            results = parallel_batch_reschedule(
+                iter_batch_requests(args.batch), './data', args.workers or None,
+                args.topk, origin_lat_lon, args.origin_building_name, cache_size=args.cache_size,
+                snapshot_dir=args.snapshot, nested_metrics=nested_metrics,
+                walkways=args.walkways, travel_mode=args.travel_mode
+            )
+        out = open(args.output, "w") if args.output else sys.stdout
+        try:
+            write_ndjson(({"job": index, **result} for index, result in results), out)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if campus is not None:
+            print(json.dumps({"alternatives_cache": campus.alternatives_cache.stats()}), file=sys.stderr)
+        sys.exit(0)
+
+    if args.optimal or args.format == "ndjson":
+        campus = CampusIndex.load(
+            './data', args.snapshot, alternatives_cache_size=args.cache_size,
+            walkways=args.walkways, travel_mode=args.travel_mode
+        )
+    if args.optimal:
+        chains = optimal_reschedule(
+            args.course_list,
+            campus,
+            origin_lat_lon,
+            args.origin_building_name,
+            topk=args.topk,
+            k_best=args.k_best,
+            beam_width=args.beam_width,
+            cache=campus.alternatives_cache,
+            nested_metrics=nested_metrics
+        )
+
+    if args.format == "ndjson":
+        # One line per hop, written as soon as the hop is ranked; optimal chains are tagged with their rank
+        if args.optimal:
+            records = (
+                record
+                for rank, chain in enumerate(chains)
+                for record in iter_chain_records(chain["course_chain"], chain=rank, total_score=chain["total_score"])
+            )
+        else:
+            records = iter_chain_records(iter_dynamic_reschedule(
+                args.course_list, campus, origin_lat_lon, args.origin_building_name, args.selection_indices,
+                topk=args.topk, cache=campus.alternatives_cache, nested_metrics=nested_metrics
+            ))
+        out = open(args.output, "w") if args.output else sys.stdout
+        try:
+            write_ndjson(records, out)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        sys.exit(0)
+
+    if args.optimal:
+        # The best chain alone keeps the usual output; several are written as a ranked list
+        course_chain = chains[0]["course_chain"] if args.k_best == 1 else chains
+    else:
+        course_chain = main(
+            args.course_list,
+            origin_lat_lon,
+            args.origin_building_name,
+            args.selection_indices,
+            args.topk,
+            snapshot_dir=args.snapshot,
+            nested_metrics=nested_metrics,
+            walkways=args.walkways,
+            travel_mode=args.travel_mode
+        )
     # output = json.dumps(course_chain, indent=4)
     
     # print(output)
     # radar_charts(course_chain)
 
-    with open("./data/output.json", "w") as f:
+    with open(args.output or "./data/output.json", "w") as f:
         output = json.dump(course_chain, f, indent=4)
     
\ No newline at end of file
@@ -0,0 +1,348 @@
+"""
+Live room occupancy from sensor events, folded into a campus's room availability as they arrive.
+
+Start it next to the service with `python course_timetabling.py --serve --occupancy_feed SOURCE`, or replay
+a file on its own with `python occupancy_feed.py --source events.ndjson`. SOURCE is an NDJSON file
+(followed as it grows with --follow) or `tcp://host:port`, where clients send the same lines:
+    {"building": "Francis Hall", "room": "112", "DayOfWeek": "Mon", "time": "10:05", "occupied": true}
+An occupied reading in a room that is free at that time opens a sensed booking of `hold_min` minutes,
+later occupied readings extend it and a vacant reading ends it; readings during a timetabled booking
+change nothing. Sensed bookings block their room in availability only (never in room_timetable) and
+expire as the readings' clock passes their end or moves to another day. Readings wait in a bounded asyncio.Queue, so a full queue stops the reader (and, over
+TCP, the sender). The consumer takes up to `batch_size` readings at a time, coalesces them into at most
+one change per sensed booking and applies those with one CampusIndex.apply_booking_deltas call, which
+drops only the cached rankings the change affects.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from campus_metrics import METRICS
+from course_timetabling import CampusIndex, minutes_to_time, time_to_minutes
+
+
+# Sensed bookings end by midnight at the latest
+DAY_END_MIN = 24 * 60
+
+
+class OccupancyTracker:
+    """
+    The sensed bookings ({(building, room, day): (start, end)} in minutes) that readings have added to
+    `availability`, and the booking deltas that keep it in step with new readings. Sensed bookings stay
+    out of room_timetable (they do not recur weekly) and only last while they are current: the readings'
+    own DayOfWeek and time are the clock, a booking is removed once that clock passes its end, and all
+    of them when a reading comes from another day.
+    """
+
+    def __init__(self, availability, hold_min=15):
+        self.availability = availability
+        self.hold_min = hold_min
+        self.live = {}
+        # Day and latest minute of the readings so far
+        self.day = None
+        self.minute = -1
+
+    def state(self):
+        """
+        A copy of the sensed bookings and the clock, for restore().
+        """
+        return dict(self.live), self.day, self.minute
+
+    def restore(self, state):
+        """
+        Go back to a state() taken earlier, e.g. when the deltas of an update could not be applied.
+        """
+        live, self.day, self.minute = state
+        self.live = dict(live)
+
+    def _read(self, event):
+        # The reading's (building, room, day), minute and state; KeyError/ValueError if malformed
+        key = (event["building"], event["room"], event["DayOfWeek"])
+        if key[:2] not in self.availability.room_positions:
+            raise KeyError(f"Unknown room {key[:2]}")
+        return key, time_to_minutes(event["time"]), bool(event["occupied"])
+
+    def _advance(self, day, minute, before):
+        # Move the clock to a reading's time and drop the sensed bookings that have ended by then,
+        # recording their applied state in `before`
+        if day != self.day:
+            expired = list(self.live)
+            self.day, self.minute = day, minute
+        elif minute > self.minute:
+            self.minute = minute
+            expired = [key for key, (_, end) in self.live.items() if end <= minute]
+        else:
+            return
+        for key in expired:
+            before.setdefault(key, self.live.pop(key))
+
+    def _free(self, key, minute, applied):
+        # True if no timetabled booking holds the room at `minute`. The sensed booking applied before
+        # this update call may block it in `availability` although it has ended since.
+        if self.availability.is_free(key[:2], key[2], minute, minute + 1):
+            return True
+        if applied is None or not applied[0] <= minute < applied[1]:
+            return False
+        bookings = self.availability.bookings[key[:2]].get(key[2], [])
+        return not any(start <= minute < end for start, end in bookings if (start, end) != applied)
+
+    def update(self, events):
+        """
+        Fold readings into the sensed bookings. Returns (booking deltas, readings that changed
+        nothing, malformed readings); the deltas turn the sensed bookings as they were before into
+        those after all of `events`, so a room read many times in one call changes once.
+        """
+        before = {}
+        ignored = rejected = 0
+        for event in events:
+            try:
+                key, minute, occupied = self._read(event)
+            except (KeyError, TypeError, ValueError):
+                rejected += 1
+                continue
+            self._advance(key[2], minute, before)
+            current = self.live.get(key)
+            if current is not None and minute < current[0]:
+                updated = current  # Older than the sensed booking
+            elif not occupied:
+                updated = None
+            elif current is not None:
+                updated = (current[0], max(current[1], min(minute + self.hold_min, DAY_END_MIN)))
+            elif self._free(key, minute, before.get(key)):
+                updated = (minute, min(minute + self.hold_min, DAY_END_MIN))
+            else:
+                updated = None  # Timetabled
+
+            if updated == current:
+                ignored += 1
+                continue
+            before.setdefault(key, current)
+            if updated is None:
+                del self.live[key]
+            else:
+                self.live[key] = updated
+
+        deltas = []
+        for key, old in before.items():
+            new = self.live.get(key)
+            if old == new:
+                continue
+            building, room, day = key
+            for op, interval in (("remove", old), ("add", new)):
+                if interval is not None:
+                    deltas.append({
+                        "op": op,
+                        "building": building,
+                        "room": room,
+                        "DayOfWeek": day,
+                        "StartTime": minutes_to_time(interval[0]),
+                        "EndTime": minutes_to_time(interval[1]),
+                        "MeetingType": "Sensed",
+                        "timetable": False
+                    })
+        return deltas, ignored, rejected
+
+
+class OccupancyFeed:
+    """
+    Asyncio ingestion of occupancy readings into one campus: a reader (file or TCP) feeding a
+    bounded queue, and a consumer folding the readings into the campus in batches. Each batch is
+    turned into deltas and applied in one call of `exclusive(function, *args)`, which the service
+    sets to run it holding every request slot, so nothing else reads or changes the bookings
+    in between. Throughput, update latency (reading queued -> its batch applied), queue depth and
+    `state` ("starting", "running", "stopped" or "failed", with `error`) are kept in stats() and,
+    when enabled, in campus_metrics.METRICS.
+    """
+
+    def __init__(self, campus, exclusive=None, hold_min=15, batch_size=256, max_delay=0.05, maxsize=1024):
+        self.campus = campus
+        self.exclusive = exclusive or (lambda function, *args: function(*args))
+        self.state = "starting"
+        self.error = None
+        self.tracker = OccupancyTracker(campus.availability, hold_min)
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.maxsize = maxsize
+        self.queue = None  # Created in run(), inside the event loop
+        self.started = None
+        self.counts = {"events": 0, "rejected": 0, "ignored": 0, "batches": 0, "deltas": 0, "invalidated": 0}
+        self.max_queue_depth = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    async def _put(self, line):
+        line = line.strip()
+        if not line:
+            return
+        try:
+            event = json.loads(line)
+        except ValueError:
+            self.counts["rejected"] += 1
+            METRICS.incr("feed.rejected")
+            return
+        await self.queue.put((event, time.perf_counter()))  # Waits while the queue is full
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    async def read_file(self, path, follow=False, poll_interval=0.2):
+        """
+        Queue every line of an NDJSON file; with `follow`, keep waiting for appended lines.
+        """
+        with open(path, "r") as f:
+            while True:
+                line = f.readline()
+                if line:
+                    await self._put(line)
+                elif follow:
+                    await asyncio.sleep(poll_interval)
+                else:
+                    return
+
+    async def _read_client(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                await self._put(line.decode())
+        finally:
+            writer.close()
+
+    async def serve_tcp(self, host, port):
+        """
+        Accept TCP clients sending NDJSON readings until cancelled.
+        """
+        server = await asyncio.start_server(self._read_client, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def consume(self):
+        """
+        Apply queued readings in batches of up to `batch_size`, waiting at most `max_delay` seconds
+        to fill a batch, until the end-of-input marker (None) is taken off the queue.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), max(0.0, deadline - loop.time())))
+                    except asyncio.TimeoutError:
+                        break
+            done = batch[-1] is None
+            if done:
+                batch.pop()
+            if batch:
+                await self._apply_batch(batch)
+            if done:
+                return
+
+    def _update(self, events):
+        # Deltas from the readings, applied against the same bookings they were computed from. If the
+        # campus rejects them, the tracker goes back to where it was, so the two never disagree.
+        state = self.tracker.state()
+        deltas, ignored, rejected = self.tracker.update(events)
+        try:
+            report = self.campus.apply_booking_deltas(deltas) if deltas else {"invalidated": []}
+        except Exception:
+            self.tracker.restore(state)
+            raise
+        return deltas, ignored, rejected, report
+
+    async def _apply_batch(self, batch):
+        METRICS.incr("feed.events", len(batch))
+        METRICS.incr("feed.batches")
+        with METRICS.stage("feed.apply"):
+            # Off the event loop, so readers keep filling the queue while the index is updated
+            deltas, ignored, rejected, report = await asyncio.to_thread(
+                self.exclusive, self._update, [event for event, _ in batch]
+            )
+        applied = time.perf_counter()
+        self.counts["invalidated"] += len(report["invalidated"])
+
+        self.counts["events"] += len(batch)
+        self.counts["ignored"] += ignored
+        self.counts["rejected"] += rejected
+        self.counts["batches"] += 1
+        self.counts["deltas"] += len(deltas)
+        METRICS.incr("feed.deltas", len(deltas))
+        METRICS.incr("feed.rejected", rejected)
+        for _, queued in batch:
+            latency = applied - queued
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+            if METRICS.enabled:
+                METRICS.observe("feed.latency", latency)
+
+    async def _ingest(self, source, follow):
+        if source.startswith("tcp://"):
+            host, _, port = source[len("tcp://"):].rpartition(":")
+            await self.serve_tcp(host, int(port))
+        else:
+            await self.read_file(source, follow)
+        await self.queue.put(None)
+
+    async def run(self, source, follow=False):
+        """
+        Ingest from `source` (an NDJSON file path or "tcp://host:port") until the file ends
+        (never with `follow` or TCP), then apply what is still queued. If reading or applying
+        fails, the other side is stopped, `state` becomes "failed" and the exception propagates.
+        """
+        self.queue = asyncio.Queue(maxsize=self.maxsize)
+        self.started = time.perf_counter()
+        self.state = "running"
+        tasks = [asyncio.create_task(self.consume()), asyncio.create_task(self._ingest(source, follow))]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()  # Raises the first failure
+            self.state = "stopped"
+        except Exception as e:
+            self.state = "failed"
+            self.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self):
+        """
+        Counters, ingest throughput, update latency and queue depth so far.
+        """
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        events = self.counts["events"]
+        return {
+            "state": self.state,
+            "error": self.error,
+            **self.counts,
+            "sensed_bookings": len(self.tracker.live),
+            "events_per_s": events / elapsed if elapsed > 0 else 0.0,
+            "latency_mean_s": self.latency_total / events if events else 0.0,
+            "latency_max_s": self.latency_max,
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay occupancy readings into the campus availability and report ingest statistics.")
+    parser.add_argument("--source", type=str, required=True, help="NDJSON file of readings, or tcp://host:port to listen on.")
+    parser.add_argument("--follow", action="store_true", help="Keep reading lines appended to the file.")
+    parser.add_argument("--data_dir", type=str, default="./data", help="Directory with the campus JSON files.")
+    parser.add_argument("--snapshot", type=str, default=None, help="Compiled campus snapshot to load instead of the JSON files.")
+    parser.add_argument("--hold_min", type=int, default=15, help="Minutes an occupied reading keeps a room booked.")
+    parser.add_argument("--batch_size", type=int, default=256, help="Readings applied per index update.")
+    parser.add_argument("--queue_size", type=int, default=1024, help="Readings queued before the reader waits.")
+    args = parser.parse_args()
+
+    feed = OccupancyFeed(
+        CampusIndex.load(args.data_dir, args.snapshot), hold_min=args.hold_min,
+        batch_size=args.batch_size, maxsize=args.queue_size
+    )
+    try:
+        asyncio.run(feed.run(args.source, args.follow))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(feed.stats()))
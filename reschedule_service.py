@@ -0,0 +1,274 @@
+"""
+Long-running HTTP/JSON service around one warm CampusIndex.
+
+Start it with `python course_timetabling.py --serve`. Endpoints:
+    POST /reschedule    a batch job ({"course_list", "origin", "origin_building_name", "selection_indices",
+                        "topk", "compact_metrics"}) -> {"course_chain": ...}
+    POST /alternatives  {"c1_id", "c2_id", "topk", "origin"} -> find_alternative_classrooms result
+    POST /bookings      {"deltas": [...]} -> CampusIndex.apply_booking_deltas report; runs alone
+    GET  /health        cache counters and requests in flight
+    GET  /metrics       stage timers and counters (campus_metrics.METRICS) as Prometheus text, or JSON
+                        with ?format=json; collected only when started with --metrics
+Every response carries a Server-Timing header with the time spent queued, computing and serializing.
+With --occupancy_feed, sensor readings (see occupancy_feed.py) update the same campus in the background,
+each batch taking every slot like POST /bookings; the feed's throughput, latency and queue depth are
+reported with the other gauges at /metrics, and its state in /health, which says "degraded" once
+the feed has failed.
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from campus_metrics import METRICS
+from course_timetabling import CampusIndex, _run_reschedule_job, find_alternative_classrooms
+
+
+class RescheduleService(ThreadingHTTPServer):
+    """
+    Threaded HTTP server sharing one campus and its alternatives cache between request threads.
+    At most `max_concurrency` requests compute at once; a request that cannot start within
+    `queue_timeout` seconds is answered with 503. Booking changes take every slot, so no ranking
+    runs against a half-updated timetable or caches a result computed before the change.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        server_address,
+        campus,
+        max_concurrency=4,
+        queue_timeout=1.0,
+        topk=10,
+        origin_lat_lon=None,
+        origin_building_name="Origin"
+    ):
+        super().__init__(server_address, RescheduleRequestHandler)
+        self.campus = campus
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        # Requests taking several slots queue here, so two of them never hold part of the slots each
+        self._exclusive_lock = threading.Lock()
+        self.queue_timeout = queue_timeout
+        # Defaults for fields a /reschedule request leaves out, as for batch jobs
+        self.topk = topk
+        self.origin_lat_lon = origin_lat_lon
+        self.origin_building_name = origin_building_name
+        self.in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        self.feed = None  # OccupancyFeed updating the campus, when started with one
+
+    def acquire_slots(self, count):
+        """
+        Take `count` slots within queue_timeout; False (holding none) if they could not all be taken.
+        """
+        if count == 1:
+            return self.slots.acquire(timeout=self.queue_timeout)
+        deadline = time.monotonic() + self.queue_timeout
+        if not self._exclusive_lock.acquire(timeout=self.queue_timeout):
+            return False
+        try:
+            for taken in range(count):
+                if not self.slots.acquire(timeout=max(0, deadline - time.monotonic())):
+                    for _ in range(taken):
+                        self.slots.release()
+                    return False
+            return True
+        finally:
+            self._exclusive_lock.release()
+
+    def release_slots(self, count):
+        for _ in range(count):
+            self.slots.release()
+
+    def reschedule(self, request):
+        return {
+            "course_chain": _run_reschedule_job(
+                self.campus, request, self.topk, self.origin_lat_lon, self.origin_building_name,
+                self.campus.alternatives_cache, nested_metrics=not request.get("compact_metrics", False)
+            )
+        }
+
+    def alternatives(self, request):
+        return find_alternative_classrooms(
+            request["c1_id"],
+            request["c2_id"],
+            self.campus,
+            request.get("topk", self.topk),
+            origin_location=request.get("origin", self.origin_lat_lon),
+            cache=self.campus.alternatives_cache,
+            radius_m=request.get("radius_m"),
+            nearest_buildings=request.get("nearest_buildings")
+        )
+
+    def bookings(self, request):
+        return self.campus.apply_booking_deltas(request["deltas"])
+
+    def exclusive(self, function, *args):
+        """
+        Call `function(*args)` holding every slot, once they are all free, however long that takes:
+        the occupancy feed never drops readings, its queue fills up instead.
+        """
+        while not self.acquire_slots(self.max_concurrency):
+            pass
+        try:
+            return function(*args)
+        finally:
+            self.release_slots(self.max_concurrency)
+
+    def run_feed(self, source):
+        """
+        Run the occupancy feed until it stops; a failure is logged and left in the feed's state.
+        """
+        # Imported here: asyncio is only needed when the service is started with a feed
+        import asyncio
+
+        try:
+            asyncio.run(self.feed.run(source, follow=True))
+        except Exception as e:
+            print(f"Occupancy feed from {source} failed: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+
+    def health(self, request):
+        health = {
+            "status": "ok",
+            "in_flight": self.in_flight,
+            "alternatives_cache": self.campus.alternatives_cache.stats()
+        }
+        if self.feed is not None:
+            health["occupancy_feed"] = {"state": self.feed.state, "error": self.feed.error}
+            if self.feed.state == "failed":
+                health["status"] = "degraded"
+        return health
+
+    def metrics_gauges(self):
+        gauges = {"in_flight": self.in_flight}
+        gauges.update({f"alternatives_cache.{name}": value for name, value in self.campus.alternatives_cache.stats().items()})
+        if self.feed is not None:
+            stats = self.feed.stats()
+            # Gauges are numbers: the state becomes one 0/1 gauge per state
+            gauges.update({f"feed.{state}": int(stats["state"] == state) for state in ("running", "failed")})
+            gauges.update({f"feed.{name}": value for name, value in stats.items() if name not in ("state", "error")})
+        return gauges
+
+
+class RescheduleRequestHandler(BaseHTTPRequestHandler):
+    """
+    Routes requests to RescheduleService methods and writes compact JSON responses.
+    """
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, so clients can reuse one connection
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes; don't hold the body back
+    routes = {
+        ("POST", "/reschedule"): "reschedule",
+        ("POST", "/alternatives"): "alternatives",
+        ("POST", "/bookings"): "bookings",
+        ("GET", "/health"): "health",
+    }
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if path == "/metrics":
+            return self._metrics(parse_qs(query).get("format", ["prometheus"])[0])
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _handle(self, method):
+        received = time.perf_counter()
+        timings = []
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        route = self.routes.get((method, self.path.split("?", 1)[0]))
+        if route is None:
+            return self._respond(404, {"error": f"No route for {method} {self.path}"}, timings)
+
+        slots = self.server.max_concurrency if route == "bookings" else 1
+        if not self.server.acquire_slots(slots):
+            timings.append(("queue", time.perf_counter() - received))
+            return self._respond(503, {"error": "Too many concurrent requests"}, timings, {"Retry-After": "1"})
+        try:
+            started = time.perf_counter()
+            timings.append(("queue", started - received))
+            with self.server._in_flight_lock:
+                self.server.in_flight += 1
+            try:
+                request = json.loads(body) if body else {}
+                if not isinstance(request, dict):
+                    raise ValueError("Request body must be a JSON object")
+                with METRICS.stage(f"service.{route}"):
+                    status, payload = 200, getattr(self.server, route)(request)
+            except (KeyError, TypeError, ValueError) as e:
+                # Bad JSON, missing fields and unknown courses are client errors
+                status, payload = 400, {"error": f"{type(e).__name__}: {e}"}
+            except Exception as e:
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+            finally:
+                with self.server._in_flight_lock:
+                    self.server.in_flight -= 1
+            timings.append(("compute", time.perf_counter() - started))
+        finally:
+            self.server.release_slots(slots)
+        self._respond(status, payload, timings)
+
+    def _metrics(self, output_format):
+        gauges = self.server.metrics_gauges()
+        if output_format == "json":
+            return self._respond(200, METRICS.snapshot(gauges), [])
+        data = METRICS.prometheus(gauges).encode()
+        self._respond(200, None, [], content=(data, "text/plain; version=0.0.4"))
+
+    def _respond(self, status, payload, timings, headers=None, content=None):
+        METRICS.incr(f"service.responses.{status}")
+        started = time.perf_counter()
+        data, content_type = content or (json.dumps(payload, separators=(",", ":")).encode(), "application/json")
+        timings.append(("serialize", time.perf_counter() - started))
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Server-Timing", ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(
+    host="127.0.0.1",
+    port=8000,
+    max_concurrency=4,
+    data_dir="./data",
+    snapshot_dir=None,
+    cache_size=4096,
+    walkways=None,
+    travel_mode="walk",
+    occupancy_feed=None,
+    **options
+):
+    """
+    Load the campus once and run a RescheduleService on (host, port) until interrupted, with an
+    OccupancyFeed reading from `occupancy_feed` (a file followed as it grows, or tcp://host:port)
+    on a background thread if given.
+    The campus is loaded here rather than passed in so its classes are the ones this module's
+    functions check against, also when started from `python course_timetabling.py --serve`.
+    `options` go to RescheduleService.
+    """
+    campus = CampusIndex.load(data_dir, snapshot_dir, cache_size, walkways, travel_mode)
+    server = RescheduleService((host, port), campus, max_concurrency=max_concurrency, **options)
+    if occupancy_feed:
+        # Imported here: the feed is only needed when the service is started with one
+        from occupancy_feed import OccupancyFeed
+
+        server.feed = OccupancyFeed(campus, exclusive=server.exclusive)
+        threading.Thread(target=server.run_feed, args=(occupancy_feed,), daemon=True).start()
+    print(f"Serving on http://{host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
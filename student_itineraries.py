@@ -0,0 +1,274 @@
+"""
+Weekly itineraries driven by students_info.json.
+
+Start it with `python course_timetabling.py --student_id <id>` or `--all_students`. Every student's
+meetings are grouped by DayOfWeek and ordered by start time once, into a StudentIndex; each day then
+runs through the chain optimizer (the top option per hop, or optimal_reschedule with --optimal) from
+the origin, and the days are summed into weekly travel totals per student.
+"""
+import json
+import sys
+import time
+
+import numpy as np
+
+from campus_solver import meeting_columns, snapshot_meeting_columns
+from course_timetabling import (
+    CampusIndex,
+    CampusOverlay,
+    CampusSnapshot,
+    dynamic_reschedule,
+    optimal_reschedule,
+    time_to_minutes,
+    write_ndjson,
+)
+
+# Days are chained in this order; any other DayOfWeek values follow, sorted
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+class StudentIndex:
+    """
+    Every student's meetings sorted once by (student, weekday, start time), with each student's meetings
+    as one contiguous slice of the sorted columns, so a student's week is looked up without re-parsing.
+    """
+
+    def __init__(self, columns, student_ids):
+        self.student_ids = list(student_ids)
+        self.positions = {student_id: i for i, student_id in enumerate(self.student_ids)}
+
+        days, day_codes = np.unique(columns["day"], return_inverse=True)
+        day_ranks = np.array([
+            WEEKDAYS.index(day) if day in WEEKDAYS else len(WEEKDAYS) + i for i, day in enumerate(days.tolist())
+        ], dtype=np.int64)[day_codes]
+        order = np.lexsort((columns["start"], day_ranks, columns["student"]))
+        self.columns = {name: column[order] for name, column in columns.items()}
+        # Meetings of student i are self.columns[...][offsets[i]:offsets[i + 1]]
+        self.offsets = np.searchsorted(self.columns["student"], np.arange(len(self.student_ids) + 1))
+
+    @classmethod
+    def from_students_info(cls, students_info):
+        return cls(meeting_columns(students_info), students_info.keys())
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        strings = snapshot.strings.tobytes().decode().split("\0")
+        return cls(snapshot_meeting_columns(snapshot), [strings[code] for code in snapshot.table("students")["id"].tolist()])
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    def week(self, student_id):
+        """
+        The student's meetings as [(day, [meeting, ...]), ...] in weekday order, each day ordered by start
+        time; a meeting is a dict with the students_info keys (times in minutes).
+        """
+        i = self.positions[student_id]
+        start, end = self.offsets[i], self.offsets[i + 1]
+        rows = zip(*(self.columns[name][start:end].tolist() for name in ("day", "course", "start", "end", "building", "room")))
+        week = []
+        for day, course, start_minutes, end_minutes, building, room in rows:
+            if not week or week[-1][0] != day:
+                week.append((day, []))
+            week[-1][1].append({
+                "CourseNumb": course,
+                "StartTime": start_minutes,
+                "EndTime": end_minutes,
+                "BuildingNumber": building,
+                "RoomNumber": room
+            })
+        return week
+
+
+def chain_travel(course_chain, distances, origin_lat_lon):
+    """
+    Distance (km) and walking time (minutes) from the origin through every course of a course_chain,
+    for the original and the updated rooms, the savings, and how many courses changed room.
+    """
+    hops = [hop for key, hop in course_chain.items() if key != "Origin"]
+    origin_distance, origin_time = distances.origin_row(origin_lat_lon['lat'], origin_lat_lon['lon'])
+    travel = {}
+    for side in ("original", "updated"):
+        rows = np.array([
+            distances.index[str(int(float(hop[f"{side}_current_course"]['BuildingNumber'])))] for hop in hops
+        ], dtype=np.int64)
+        travel[side] = {
+            "distance_km": float(origin_distance[rows[0]] + distances.distance_km[rows[:-1], rows[1:]].sum()),
+            "walking_min": float(origin_time[rows[0]] + distances.walking_time_min[rows[:-1], rows[1:]].sum())
+        }
+    travel["saved"] = {name: travel["original"][name] - travel["updated"][name] for name in travel["original"]}
+    travel["moved_courses"] = sum(
+        (hop["original_current_course"]['BuildingName'], hop["original_current_course"]['RoomNumber'])
+        != (hop["updated_current_course"]['BuildingName'], hop["updated_current_course"]['RoomNumber'])
+        for hop in hops
+    )
+    return travel
+
+
+def _add_travel(total, travel):
+    for side in ("original", "updated", "saved"):
+        for name, value in travel[side].items():
+            total[side][name] = total[side].get(name, 0.0) + value
+    total["moved_courses"] += travel["moved_courses"]
+
+
+def _empty_travel():
+    return {"original": {}, "updated": {}, "saved": {}, "moved_courses": 0}
+
+
+class WeeklyPlanner:
+    """
+    Runs the chain optimizer over each day of a student's week on one loaded campus, sharing its
+    alternatives cache across students. Each course is pinned to the section the student actually
+    attends (matched on course, day, time and room in courses_info) through a CampusOverlay, since
+    the chain functions otherwise take the first catalogue record of a course number.
+    A course met twice on one day is chained at its first meeting only, and courses missing from
+    courses_info are left out; both are counted in `skipped_meetings`.
+    """
+
+    def __init__(
+        self,
+        campus,
+        index,
+        origin_lat_lon,
+        origin_building_name="Origin",
+        topk=10,
+        optimal=False,
+        beam_width=None,
+        nested_metrics=True
+    ):
+        self.campus = campus
+        self.index = index
+        self.origin_lat_lon = origin_lat_lon
+        self.origin_building_name = origin_building_name
+        self.topk = topk
+        self.optimal = optimal
+        self.beam_width = beam_width
+        self.nested_metrics = nested_metrics
+
+        # (course, day, start, end, building, room) -> course record, built once for every lookup
+        self.sections = {}
+        for course in campus.courses_info['courses']:
+            self.sections.setdefault((
+                str(course['CourseNumb']), course['DayOfWeek'], time_to_minutes(course['StartTimeStr']),
+                time_to_minutes(course['EndTimeStr']), str(int(course['BuildingNumber'])), course['RoomNumber']
+            ), course)
+
+    def day_chain(self, day, meetings):
+        """
+        (course_list, course_chain, skipped meetings) for one day of meetings ordered by start time.
+        """
+        student_campus = CampusOverlay(self.campus)
+        course_list = []
+        for meeting in meetings:
+            course_id = int(meeting['CourseNumb'])
+            if course_id in course_list or course_id not in self.campus.courses:
+                continue
+            course_list.append(course_id)
+            section = self.sections.get((
+                meeting['CourseNumb'], day, meeting['StartTime'], meeting['EndTime'],
+                meeting['BuildingNumber'], meeting['RoomNumber']
+            ))
+            if section is not None and section is not self.campus.course(course_id):
+                student_campus.apply(course_id, section)
+        if not course_list:
+            return course_list, None, len(meetings)
+
+        if self.optimal:
+            course_chain = optimal_reschedule(
+                course_list, student_campus, self.origin_lat_lon, self.origin_building_name, topk=self.topk,
+                beam_width=self.beam_width, cache=self.campus.alternatives_cache, nested_metrics=self.nested_metrics
+            )[0]["course_chain"]
+        else:
+            course_chain = dynamic_reschedule(
+                course_list, student_campus, self.origin_lat_lon, self.origin_building_name, [0] * len(course_list),
+                topk=self.topk, cache=self.campus.alternatives_cache, nested_metrics=self.nested_metrics
+            )
+        return course_list, course_chain, len(meetings) - len(course_list)
+
+    def student_week(self, student_id, include_chains=True):
+        """
+        {"student_id", "days": [{"day", "course_list", "travel", "course_chain"}], "weekly_travel", "skipped_meetings"}
+        for one student; `include_chains=False` leaves out the per-day course_chain.
+        """
+        days = []
+        weekly_travel = _empty_travel()
+        skipped_meetings = 0
+        for day, meetings in self.index.week(student_id):
+            course_list, course_chain, skipped = self.day_chain(day, meetings)
+            skipped_meetings += skipped
+            if course_chain is None:
+                continue
+            travel = chain_travel(course_chain, self.campus.distances, self.origin_lat_lon)
+            _add_travel(weekly_travel, travel)
+            entry = {"day": day, "course_list": course_list, "travel": travel}
+            if include_chains:
+                entry["course_chain"] = course_chain
+            days.append(entry)
+        return {
+            "student_id": student_id,
+            "days": days,
+            "weekly_travel": weekly_travel,
+            "skipped_meetings": skipped_meetings
+        }
+
+    def iter_weeks(self, student_ids=None, include_chains=False):
+        """
+        student_week for every student (or `student_ids`), in index order.
+        """
+        for student_id in self.index.student_ids if student_ids is None else student_ids:
+            yield self.student_week(student_id, include_chains)
+
+
+def run(
+    student_id=None,
+    output=None,
+    data_dir="./data",
+    snapshot_dir=None,
+    cache_size=4096,
+    walkways=None,
+    travel_mode="walk",
+    **options
+):
+    """
+    Load the campus and the student index once, then write one student's week with its day chains
+    (indented JSON to `output`, default ./data/output.json) or, without `student_id`, every student's
+    weekly travel as NDJSON (to `output` or stdout) followed by a population summary on stderr.
+    Loaded here rather than passed in, for the same reason as reschedule_service.serve.
+    `options` go to WeeklyPlanner.
+    """
+    started = time.perf_counter()
+    if snapshot_dir:
+        snapshot = CampusSnapshot(snapshot_dir)
+        campus = CampusIndex.from_snapshot(snapshot, cache_size, walkways, travel_mode)
+        index = StudentIndex.from_snapshot(snapshot)
+    else:
+        campus = CampusIndex.from_json(data_dir, cache_size, walkways, travel_mode)
+        with open(f"{data_dir}/students_info.json", "r") as f:
+            index = StudentIndex.from_students_info(json.load(f))
+    planner = WeeklyPlanner(campus, index, **options)
+
+    if student_id is not None:
+        with open(output or "./data/output.json", "w") as f:
+            json.dump(planner.student_week(student_id), f, indent=4)
+        return
+
+    population = _empty_travel()
+
+    def weeks():
+        for week in planner.iter_weeks():
+            _add_travel(population, week["weekly_travel"])
+            yield week
+
+    out = open(output, "w") if output else sys.stdout
+    try:
+        write_ndjson(weeks(), out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps({
+        "students": len(index),
+        "weekly_travel": population,
+        "wall_time_s": time.perf_counter() - started,
+        "alternatives_cache": campus.alternatives_cache.stats()
+    }), file=sys.stderr)
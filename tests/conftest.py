@@ -0,0 +1,25 @@
+"""
+Shared fixtures: the bundled campus in ./data, loaded fresh for every test since tests change it.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The modules live at the repository root, which is not a package
+sys.path.insert(0, ROOT)
+
+from course_timetabling import CampusIndex  # noqa: E402
+
+DATA_DIR = os.path.join(ROOT, "data")
+
+
+@pytest.fixture
+def campus():
+    return CampusIndex.from_json(DATA_DIR)
+
+
+@pytest.fixture
+def origin():
+    return {"lat": 30.61507082693666, "lon": -96.34047976538754}
@@ -0,0 +1,75 @@
+"""
+AlternativesCache: LRU order and counters, and invalidation when the timetable changes.
+"""
+import copy
+
+from course_timetabling import AlternativesCache, RoomAvailability, find_alternative_classrooms
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AlternativesCache(RoomAvailability({}), maxsize=2)
+    cache["a"] = 1
+    cache["b"] = 2
+
+    assert cache.get("a") == 1
+    cache["c"] = 3
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 3, "misses": 1, "evictions": 1, "invalidations": 0}
+
+
+def test_new_availability_version_empties_the_cache():
+    availability = RoomAvailability({})
+    cache = AlternativesCache(availability)
+    cache["a"] = 1
+    cache["b"] = 2
+
+    availability.load({})
+
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_invalidate_drops_matching_entries_only():
+    cache = AlternativesCache(RoomAvailability({}))
+    for key in range(6):
+        cache[key] = key * 10
+
+    dropped = cache.invalidate(lambda key, value: key % 2 == 0)
+
+    assert dropped == [(0, 0), (2, 20), (4, 40)]
+    assert [cache.get(key) for key in range(6)] == [None, 10, None, 30, None, 50]
+    assert cache.stats()["invalidations"] == 3
+
+
+def test_cached_rankings_match_uncached_ones(campus):
+    pairs = [(c1, c2) for c1 in sorted(campus.courses)[:4] for c2 in sorted(campus.courses)[:8] if c1 != c2]
+    cache = campus.alternatives_cache
+
+    first = [find_alternative_classrooms(c1, c2, campus, 5, cache=cache) for c1, c2 in pairs]
+    misses = cache.stats()["misses"]
+    second = [find_alternative_classrooms(c1, c2, campus, 5, cache=cache) for c1, c2 in pairs]
+
+    assert first == second == [find_alternative_classrooms(c1, c2, campus, 5) for c1, c2 in pairs]
+    assert cache.stats()["misses"] == misses
+    assert cache.stats()["hits"] >= len(pairs)
+
+
+def test_update_timetable_drops_rankings_computed_before_it(campus):
+    c1_id, c2_id = sorted(campus.courses)[:2]
+    before = find_alternative_classrooms(c1_id, c2_id, campus, 5, cache=campus.alternatives_cache)
+    top = before["alternatives"][0]
+    c2 = campus.course(c2_id)
+    room_timetable = copy.deepcopy(campus.room_timetable)
+    room_timetable[top["building"]][top["room"]].append({
+        "CourseNumber": 9999, "DayOfWeek": c2['DayOfWeek'], "StartTime": c2['StartTimeStr'], "EndTime": c2['EndTimeStr'],
+        "MeetingType": "Lecture", "NumStudents": 1
+    })
+
+    campus.update_timetable(room_timetable)
+
+    after = find_alternative_classrooms(c1_id, c2_id, campus, 5, cache=campus.alternatives_cache)
+    assert (top["building"], top["room"]) not in [(option["building"], option["room"]) for option in after["alternatives"]]
+    assert after == find_alternative_classrooms(c1_id, c2_id, campus, 5)
@@ -0,0 +1,55 @@
+"""
+batch_reschedule: each job gives the chain dynamic_reschedule would, and a malformed job gets an error
+record without stopping the jobs after it.
+"""
+import pytest
+
+from course_timetabling import batch_reschedule, dynamic_reschedule, parallel_batch_reschedule
+
+from conftest import DATA_DIR
+
+
+@pytest.fixture
+def jobs(campus):
+    course_ids = sorted(campus.courses)
+    return [
+        {"course_list": course_ids[:3], "selection_indices": [0, 1, 0]},
+        {"course_list": []},
+        {"course_list": course_ids[3:6], "selection_indices": [0, 1]},
+        {"course_list": [course_ids[0], -1]},
+        {"selection_indices": [0]},
+        {"course_list": course_ids[6:8], "topk": 5},
+    ]
+
+
+def test_jobs_match_dynamic_reschedule(campus, origin, jobs):
+    results = dict(batch_reschedule(jobs, campus, 10, origin))
+
+    for index in (0, 5):
+        job = jobs[index]
+        assert results[index] == {"course_chain": dynamic_reschedule(
+            job["course_list"], campus, origin, "Origin", job.get("selection_indices", [0] * len(job["course_list"])),
+            topk=job.get("topk", 10)
+        )}
+
+
+def test_malformed_jobs_get_an_error_and_the_batch_goes_on(campus, origin, jobs):
+    results = list(batch_reschedule(jobs, campus, 10, origin))
+
+    assert [index for index, _ in results] == list(range(len(jobs)))
+    errors = {index: result["error"] for index, result in results if "error" in result}
+    assert errors == {
+        1: "ValueError: course_list must be a non-empty list of course ids",
+        2: "ValueError: selection_indices must have one entry per course (3)",
+        3: "ValueError: Course -1 not found in courses_info",
+        4: "KeyError: 'course_list'",
+    }
+    assert "course_chain" in results[5][1]
+
+
+def test_parallel_batch_matches_the_in_process_one(campus, origin, jobs):
+    expected = list(batch_reschedule(jobs, campus, 10, origin))
+
+    results = list(parallel_batch_reschedule(jobs, DATA_DIR, workers=2, origin_lat_lon=origin, chunksize=1))
+
+    assert results == expected
@@ -0,0 +1,141 @@
+"""
+CampusIndex.apply_booking_deltas: cached rankings must match a campus rebuilt from the changed
+timetable, and an invalid list of deltas must change nothing.
+"""
+import copy
+
+import pytest
+
+from course_timetabling import CampusIndex, find_alternative_classrooms, time_to_minutes
+
+
+def _rank(campus, pairs, cached=True):
+    cache = campus.alternatives_cache if cached else None
+    return {pair: find_alternative_classrooms(pair[0], pair[1], campus, 10, cache=cache) for pair in pairs}
+
+
+def _pairs(campus):
+    course_ids = sorted(campus.courses)
+    return [(c1, c2) for c1 in course_ids[:6] for c2 in course_ids if c1 != c2]
+
+
+def _booking(campus, c2_id, building, room, op="add"):
+    c2 = campus.course(c2_id)
+    return {
+        "op": op,
+        "building": building,
+        "room": room,
+        "DayOfWeek": c2['DayOfWeek'],
+        "StartTime": c2['StartTimeStr'],
+        "EndTime": c2['EndTimeStr'],
+        "CourseNumber": 9999
+    }
+
+
+def _fresh(campus):
+    return CampusIndex(campus.courses_info, campus.room_timetable, campus.building_loc)
+
+
+def test_add_drops_rankings_recommending_the_room(campus):
+    pairs = _pairs(campus)
+    before = _rank(campus, pairs)
+    c1_id, c2_id = next(pair for pair in pairs if before[pair]["alternatives"])
+    top = before[(c1_id, c2_id)]["alternatives"][0]
+
+    report = campus.apply_booking_deltas([_booking(campus, c2_id, top["building"], top["room"])])
+
+    assert report["applied"] == 1
+    conflicts = [entry["conflicts"] for entry in report["invalidated"] if entry["c2_id"] == c2_id]
+    assert [{"rank": 0, "building": top["building"], "room": top["room"]}] in conflicts
+    # Every ranking, cached or recomputed, matches a campus rebuilt from the changed timetable
+    assert _rank(campus, pairs) == _rank(_fresh(campus), pairs, cached=False)
+
+
+def test_remove_restores_the_rankings(campus):
+    pairs = _pairs(campus)
+    before = _rank(campus, pairs, cached=False)
+    _rank(campus, pairs)
+    c1_id, c2_id = next(pair for pair in pairs if before[pair]["alternatives"])
+    top = before[(c1_id, c2_id)]["alternatives"][0]
+    timetable = copy.deepcopy(campus.room_timetable)
+
+    campus.apply_booking_deltas([_booking(campus, c2_id, top["building"], top["room"])])
+    assert _rank(campus, pairs)[(c1_id, c2_id)] != before[(c1_id, c2_id)]
+    campus.apply_booking_deltas([_booking(campus, c2_id, top["building"], top["room"], op="remove")])
+
+    assert campus.room_timetable == timetable
+    assert _rank(campus, pairs) == before
+
+
+def test_unrelated_booking_keeps_the_cache(campus):
+    pairs = _pairs(campus)
+    _rank(campus, pairs)
+    size = campus.alternatives_cache.stats()["size"]
+    building, room = campus.availability.room_keys[0]
+
+    # No course meets on Sunday, so no ranking can list the room then
+    report = campus.apply_booking_deltas([{
+        "op": "add", "building": building, "room": room, "DayOfWeek": "Sun", "StartTime": "03:00", "EndTime": "04:00"
+    }])
+
+    assert report["invalidated"] == []
+    assert campus.alternatives_cache.stats()["size"] == size
+
+
+def test_availability_only_delta_leaves_room_timetable(campus):
+    pairs = _pairs(campus)
+    before = _rank(campus, pairs)
+    c1_id, c2_id = next(pair for pair in pairs if before[pair]["alternatives"])
+    top = before[(c1_id, c2_id)]["alternatives"][0]
+    timetable = copy.deepcopy(campus.room_timetable)
+    delta = {**_booking(campus, c2_id, top["building"], top["room"]), "timetable": False}
+
+    campus.apply_booking_deltas([delta])
+    assert campus.room_timetable == timetable
+    assert not campus.availability.is_free(
+        (top["building"], top["room"]), delta["DayOfWeek"], time_to_minutes(delta["StartTime"]), time_to_minutes(delta["EndTime"])
+    )
+    assert all(
+        (option["building"], option["room"]) != (top["building"], top["room"])
+        for option in _rank(campus, pairs)[(c1_id, c2_id)]["alternatives"]
+    )
+
+    campus.apply_booking_deltas([{**delta, "op": "remove"}])
+    assert _rank(campus, pairs) == before
+
+
+@pytest.mark.parametrize("bad", [
+    {"room": "no such room"},
+    {"op": "remove", "StartTime": "01:00"},
+    {"op": "move"},
+    {"EndTime": "06:00"},
+    {"StartTime": "noon"},
+])
+def test_invalid_delta_changes_nothing(campus, bad):
+    pairs = _pairs(campus)
+    _rank(campus, pairs)
+    bookings = copy.deepcopy(campus.availability.bookings)
+    timetable = copy.deepcopy(campus.room_timetable)
+    stats = campus.alternatives_cache.stats()
+    building, room = campus.availability.room_keys[0]
+    good = {"op": "add", "building": building, "room": room, "DayOfWeek": "Mon", "StartTime": "07:00", "EndTime": "07:30"}
+
+    with pytest.raises(ValueError, match="Booking delta 1"):
+        campus.apply_booking_deltas([good, {**good, **bad}])
+
+    assert campus.availability.bookings == bookings
+    assert campus.room_timetable == timetable
+    assert campus.alternatives_cache.stats() == stats
+
+
+def test_remove_of_a_booking_added_earlier_in_the_list(campus):
+    building, room = campus.availability.room_keys[0]
+    bookings = copy.deepcopy(campus.availability.bookings)
+    add = {"op": "add", "building": building, "room": room, "DayOfWeek": "Mon", "StartTime": "06:00", "EndTime": "06:30"}
+
+    report = campus.apply_booking_deltas([add, {**add, "op": "remove"}])
+
+    assert report["applied"] == 2
+    assert {day: intervals for day, intervals in campus.availability.bookings[(building, room)].items() if intervals} == {
+        day: intervals for day, intervals in bookings[(building, room)].items() if intervals
+    }
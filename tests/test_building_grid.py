@@ -0,0 +1,69 @@
+"""
+BuildingGrid ring search against brute-force haversine distances to every building.
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+from course_timetabling import BuildingGrid, haversine_distance_array
+
+
+@pytest.fixture
+def buildings():
+    rng = np.random.default_rng(7)
+    # Clustered like a campus, with a few outliers far from the rest
+    lat = np.r_[30.615 + rng.normal(0, 0.004, 400), 30.70, 30.50]
+    lon = np.r_[-96.340 + rng.normal(0, 0.004, 400), -96.20, -96.45]
+    return lat, lon
+
+
+def _brute_force(lat, lon, query_lat, query_lon):
+    return np.sort(haversine_distance_array(query_lat, query_lon, lat, lon) * 1000)
+
+
+QUERIES = [(30.615, -96.340), (30.620, -96.335), (30.60, -96.36), (30.80, -96.10), (30.615, -96.5)]
+
+
+@pytest.mark.parametrize("cell_m", [50.0, 250.0, 2000.0])
+@pytest.mark.parametrize("query", QUERIES)
+def test_nearest_yields_every_building_nearest_first(buildings, cell_m, query):
+    lat, lon = buildings
+    grid = BuildingGrid(lat, lon, cell_m)
+
+    found = list(grid.nearest(*query))
+
+    assert sorted(row for row, _ in found) == list(range(len(lat)))
+    distances = [distance for _, distance in found]
+    assert distances == pytest.approx(_brute_force(lat, lon, *query).tolist())
+    # Each yielded distance is the building's own
+    rows = np.array([row for row, _ in found])
+    assert distances == pytest.approx((haversine_distance_array(query[0], query[1], lat[rows], lon[rows]) * 1000).tolist())
+
+
+@pytest.mark.parametrize("radius_m", [0.0, 100.0, 400.0, 1500.0, 50000.0])
+@pytest.mark.parametrize("query", QUERIES)
+def test_within_matches_brute_force(buildings, radius_m, query):
+    lat, lon = buildings
+    grid = BuildingGrid(lat, lon)
+
+    found = grid.within(*query, radius_m)
+
+    expected = _brute_force(lat, lon, *query)
+    assert [distance for _, distance in found] == pytest.approx(expected[expected <= radius_m].tolist())
+
+
+@pytest.mark.parametrize("k", [1, 5, 40])
+def test_first_k_are_the_k_nearest(buildings, k):
+    lat, lon = buildings
+    grid = BuildingGrid(lat, lon)
+
+    for query in QUERIES:
+        found = list(itertools.islice(grid.nearest(*query), k))
+        assert [distance for _, distance in found] == pytest.approx(_brute_force(lat, lon, *query)[:k].tolist())
+
+
+def test_empty_grid_yields_nothing():
+    grid = BuildingGrid([], [])
+
+    assert list(grid.nearest(30.615, -96.340)) == []
@@ -0,0 +1,98 @@
+"""
+CampusOverlay: course moves stay in the view that made them and never reach the shared campus.
+"""
+import copy
+
+import pytest
+
+from course_timetabling import (
+    CampusOverlay,
+    dynamic_reschedule,
+    find_alternative_classrooms,
+    optimal_reschedule,
+    update_course_info_dynamic,
+)
+
+
+def _move(overlay, course_id, room_key):
+    building_id = overlay.buildings[room_key[0]][0]
+    location = overlay.building_loc[building_id]
+    update_course_info_dynamic(overlay, course_id, room_key[0], room_key[1], {"lat": location['lat'], "lon": location['lon']})
+
+
+def _other_room(campus, course_id):
+    course = campus.course(course_id)
+    return next(
+        room_key for room_key in campus.availability.room_keys
+        if room_key[0] in campus.buildings and room_key[0] != course['BuildingName']
+    )
+
+
+def test_override_is_visible_in_the_view_only(campus):
+    course_id = sorted(campus.courses)[0]
+    base = copy.deepcopy(campus.course(course_id))
+    room_key = _other_room(campus, course_id)
+    overlay = CampusOverlay(campus)
+
+    _move(overlay, course_id, room_key)
+
+    moved = overlay.course(course_id)
+    assert (moved['BuildingName'], moved['RoomNumber']) == room_key
+    assert moved['NumStudents'] == base['NumStudents']
+    assert campus.course(course_id) == base
+
+
+def test_fork_and_discard_are_independent(campus):
+    first, second = sorted(campus.courses)[:2]
+    overlay = CampusOverlay(campus)
+    _move(overlay, first, _other_room(campus, first))
+
+    fork = overlay.fork()
+    _move(fork, second, _other_room(campus, second))
+
+    assert second not in overlay.overrides
+    assert fork.course(first) == overlay.course(first)
+    overlay.discard()
+    assert overlay.course(first) == campus.course(first)
+    assert fork.course(first) != campus.course(first)
+
+
+def test_reads_fall_through_to_the_campus(campus):
+    overlay = CampusOverlay(campus)
+
+    assert overlay.availability is campus.availability
+    assert overlay.room_capacity is campus.room_capacity
+    with pytest.raises(AttributeError):
+        overlay.no_such_attribute
+
+
+def test_unknown_course_is_rejected(campus):
+    overlay = CampusOverlay(campus)
+
+    with pytest.raises(ValueError, match="not found"):
+        overlay.apply(-1, {"RoomNumber": "101"})
+    assert overlay.overrides == {}
+
+
+def test_ranking_on_a_view_matches_a_campus_with_the_move_applied(campus):
+    c1_id, c2_id = sorted(campus.courses)[:2]
+    room_key = _other_room(campus, c1_id)
+    overlay = CampusOverlay(campus)
+    _move(overlay, c1_id, room_key)
+    moved = overlay.course(c1_id)
+
+    result = find_alternative_classrooms(c1_id, c2_id, overlay, 10)
+
+    # The same move written into the campus's own catalogue
+    campus.courses[c1_id] = moved
+    assert result == find_alternative_classrooms(c1_id, c2_id, campus, 10)
+
+
+def test_chains_leave_the_campus_catalogue_alone(campus, origin):
+    course_list = sorted(campus.courses)[:4]
+    courses = copy.deepcopy(campus.courses)
+
+    dynamic_reschedule(course_list, campus, origin, "Origin", [1] * len(course_list), topk=3)
+    optimal_reschedule(course_list, campus, origin, "Origin", topk=3, k_best=2)
+
+    assert campus.courses == courses
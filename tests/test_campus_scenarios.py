@@ -0,0 +1,98 @@
+"""
+ScenarioRunner: which bookings an edit displaces, and that a scenario leaves the shared campus alone.
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from campus_scenarios import BASELINE, ScenarioRunner, load_runner
+from campus_solver import meeting_columns
+
+from conftest import DATA_DIR
+
+
+@pytest.fixture(scope="module")
+def runner():
+    return load_runner(DATA_DIR)
+
+
+@pytest.fixture(scope="module")
+def columns():
+    with open(os.path.join(DATA_DIR, "students_info.json"), "r") as f:
+        return meeting_columns(json.load(f))
+
+
+def _scale(factor):
+    return {"name": f"x{factor}", "edits": [{"op": "scale_capacity", "factor": factor}]}
+
+
+@pytest.mark.parametrize("factor", [1.0, 0.999])
+def test_near_identity_edit_displaces_nothing(runner, factor):
+    baseline = runner.evaluate(BASELINE)
+
+    result = runner.evaluate(_scale(factor))
+
+    assert (result["relocated"], result["moved_bookings"]) == (0, 0)
+    for metric in ("student_km", "student_walking_min", "student_floors", "over_capacity", "unplaced"):
+        assert result[metric] == baseline[metric]
+
+
+def test_only_bookings_that_fit_before_the_edit_are_displaced(runner):
+    solver = runner.solver
+    capacity = runner.campus.room_capacity[solver.assignment]
+    fitted = solver.movable & (capacity >= solver.num_students) & (np.round(capacity * 0.8) < solver.num_students)
+    # Bookings already over capacity in the base timetable stay where they are
+    assert np.count_nonzero(solver.movable & (capacity < solver.num_students))
+
+    result = runner.evaluate(_scale(0.8))
+
+    assert result["relocated"] <= result["moved_bookings"] == np.count_nonzero(fitted)
+
+
+def test_closed_building_moves_all_its_bookings(runner):
+    solver = runner.solver
+    building = runner.campus.availability.room_keys[0][0]
+    held = np.count_nonzero(solver.movable & (runner.campus.room_building[solver.assignment] == runner.campus.room_building[0]))
+
+    result = runner.evaluate({"name": "closed", "edits": [{"op": "close_building", "building": building}]})
+
+    assert result["relocated"] + result["unplaced"] == held
+    assert result["moved_bookings"] == result["relocated"]
+
+
+def test_scenarios_leave_the_shared_campus_alone(runner):
+    eligible = runner.campus.room_eligible.copy()
+    capacity = runner.campus.room_capacity.copy()
+    assignment = runner.solver.assignment.copy()
+
+    runner.evaluate({"name": "edits", "edits": [
+        {"op": "scale_capacity", "factor": 0.5},
+        {"op": "close_building", "building": runner.campus.availability.room_keys[0][0]},
+    ]})
+
+    assert np.array_equal(runner.campus.room_eligible, eligible)
+    assert np.array_equal(runner.campus.room_capacity, capacity)
+    assert np.array_equal(runner.solver.assignment, assignment)
+    assert runner.evaluate(BASELINE)["moved_bookings"] == 0
+
+
+def test_invalid_edit_is_reported(runner):
+    result = runner.evaluate({"name": "bad", "edits": [{"op": "close_building", "building": "Nowhere"}]})
+
+    assert result == {"name": "bad", "error": "ValueError: Building 'Nowhere' not found in room_timetable"}
+
+
+def test_booking_in_an_unknown_room_counts_as_unplaced(campus, columns):
+    first = ScenarioRunner(campus, columns)
+    booking = next(i for i in range(len(first.solver.bookings)) if len(first.solver.neighbour_index[i]))
+    baseline = first.evaluate(BASELINE)
+    first.solver.bookings[booking]["records"][0]['BuildingName'] = "Nowhere"
+
+    result = ScenarioRunner(campus, columns).evaluate(BASELINE)
+
+    assert result["unplaced"] == baseline["unplaced"] + 1
+    # Its flows no longer count, instead of being priced from the last room's building
+    assert result["student_km"] < baseline["student_km"]
+    assert result["over_capacity"] <= baseline["over_capacity"]
@@ -0,0 +1,101 @@
+"""
+Compiled campus snapshots: a lossless round trip of the JSON files, and refusal once a source has changed.
+"""
+import json
+import os
+import shutil
+
+import pytest
+
+from course_timetabling import CampusIndex, CampusSnapshot, compile_campus_snapshot, find_alternative_classrooms
+
+from conftest import DATA_DIR
+
+SOURCES = ("courses_info", "room_timetable", "building_loc", "students_info")
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    # A copy of the bundled JSON files, so tests can change them
+    for name in SOURCES:
+        shutil.copy2(os.path.join(DATA_DIR, f"{name}.json"), tmp_path / f"{name}.json")
+    return str(tmp_path)
+
+
+@pytest.fixture
+def snapshot_dir(data_dir):
+    snapshot_dir = os.path.join(data_dir, "snapshot")
+    compile_campus_snapshot(data_dir, snapshot_dir)
+    return snapshot_dir
+
+
+def test_snapshot_decodes_to_the_json_files(data_dir, snapshot_dir):
+    snapshot = CampusSnapshot(snapshot_dir)
+
+    for name in SOURCES:
+        with open(os.path.join(data_dir, f"{name}.json"), "r") as f:
+            assert getattr(snapshot, name)() == json.load(f)
+
+
+def test_campus_from_snapshot_ranks_like_one_from_json(data_dir, snapshot_dir, origin):
+    from_json = CampusIndex.from_json(data_dir)
+    from_snapshot = CampusIndex.from_snapshot(CampusSnapshot(snapshot_dir))
+    course_ids = sorted(from_json.courses)
+
+    assert from_snapshot.availability.room_keys == from_json.availability.room_keys
+    for c1_id in ["Origin"] + course_ids[:3]:
+        for c2_id in course_ids[:10]:
+            if c1_id != c2_id:
+                assert find_alternative_classrooms(c1_id, c2_id, from_snapshot, 10, origin_location=origin) == (
+                    find_alternative_classrooms(c1_id, c2_id, from_json, 10, origin_location=origin)
+                )
+
+
+def test_changed_source_makes_the_snapshot_stale(data_dir, snapshot_dir):
+    path = os.path.join(data_dir, "building_loc.json")
+    with open(path, "r") as f:
+        building_loc = json.load(f)
+    next(iter(building_loc.values()))['lat'] += 0.001
+    with open(path, "w") as f:
+        json.dump(building_loc, f)
+
+    with pytest.raises(ValueError, match="older than building_loc"):
+        CampusSnapshot(snapshot_dir)
+
+    compile_campus_snapshot(data_dir, snapshot_dir)
+    assert CampusSnapshot(snapshot_dir).stale_sources() == []
+
+
+def test_touched_or_missing_source_is_not_stale(data_dir, snapshot_dir):
+    # Same contents under a new modification time, and a source that was moved away
+    path = os.path.join(data_dir, "courses_info.json")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    os.remove(os.path.join(data_dir, "students_info.json"))
+
+    assert CampusSnapshot(snapshot_dir).stale_sources() == []
+
+
+def test_other_data_dir_is_checked_on_request(data_dir, snapshot_dir, tmp_path_factory):
+    other = tmp_path_factory.mktemp("other")
+    for name in SOURCES:
+        shutil.copy2(os.path.join(data_dir, f"{name}.json"), other / f"{name}.json")
+    with open(other / "room_timetable.json", "w") as f:
+        json.dump({}, f)
+
+    snapshot = CampusSnapshot(snapshot_dir)
+
+    assert snapshot.stale_sources(str(other)) == ["room_timetable"]
+    assert snapshot.stale_sources() == []
+
+
+def test_unknown_format_is_refused(snapshot_dir):
+    path = os.path.join(snapshot_dir, "manifest.json")
+    with open(path, "r") as f:
+        manifest = json.load(f)
+    manifest["format"] += 1
+    with open(path, "w") as f:
+        json.dump(manifest, f)
+
+    with pytest.raises(ValueError, match="snapshot format"):
+        CampusSnapshot(snapshot_dir)
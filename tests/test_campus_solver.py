@@ -0,0 +1,108 @@
+"""
+RoomReassignmentSolver: move, swap and best-move deltas against the full objective, and bookings
+in a room missing from the campus.
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from campus_solver import RoomReassignmentSolver, meeting_columns
+
+from conftest import DATA_DIR
+
+
+@pytest.fixture(scope="module")
+def columns():
+    with open(os.path.join(DATA_DIR, "students_info.json"), "r") as f:
+        return meeting_columns(json.load(f))
+
+
+@pytest.fixture
+def solver(campus, columns):
+    return RoomReassignmentSolver(campus, None, columns=columns)
+
+
+def _moves(solver, count, seed=0):
+    # Random feasible (booking, room) moves to a room in another building
+    rng = np.random.default_rng(seed)
+    movable = np.flatnonzero(solver.movable)
+    moves = []
+    while len(moves) < count:
+        booking, room = int(rng.choice(movable)), int(rng.choice(solver.target_rooms))
+        if solver.campus.room_building[room] != solver.campus.room_building[solver.assignment[booking]] and solver.fits(booking, room):
+            moves.append((booking, room))
+    return moves
+
+
+def test_move_delta_matches_the_objective(solver):
+    for booking, room in _moves(solver, 100):
+        before = solver.objective()
+        delta = solver.move_delta(booking, room)
+        solver._assign(booking, room)
+        assert solver.objective() - before == pytest.approx(delta, abs=1e-9)
+
+
+def test_swap_delta_matches_the_objective(solver):
+    rng = np.random.default_rng(1)
+    movable = np.flatnonzero(solver.movable)
+    # Neighbouring pairs price the flow between them, which a swap must leave out
+    pairs = [(int(booking), int(solver.neighbour_index[booking][0])) for booking in movable if len(solver.neighbour_index[booking])][:40]
+    pairs += [tuple(int(booking) for booking in rng.choice(movable, 2, replace=False)) for _ in range(60)]
+    for booking1, booking2 in pairs:
+        before = solver.objective()
+        delta = solver.swap_delta(booking1, booking2)
+        room1, room2 = solver.assignment[booking1], solver.assignment[booking2]
+        solver._assign(booking1, room2)
+        solver._assign(booking2, room1)
+        assert solver.objective() - before == pytest.approx(delta, abs=1e-9)
+
+
+def test_best_move_is_the_cheapest_feasible_move(solver):
+    for booking in np.flatnonzero(solver.movable)[:20].tolist():
+        move = solver.best_move(booking)
+        feasible = [
+            solver.move_delta(booking, room) for room in solver.target_rooms.tolist()
+            if room != solver.assignment[booking] and solver.fits(booking, room)
+        ]
+        assert (move is None) == (not feasible)
+        if move is not None:
+            assert move[1] == pytest.approx(min(feasible), abs=1e-9)
+
+
+def test_anneal_ends_on_its_recomputed_objective(solver):
+    result = solver.anneal(iterations=2000, seed=3, log_every=500)
+
+    assert result["objective"] <= result["objective_before"] + 1e-9
+    assert result["objective"] == pytest.approx(min(entry["best_objective"] for entry in result["history"]))
+
+
+def test_booking_in_an_unknown_room_is_unplaced(campus, columns, solver):
+    # The booking with the most neighbours, its room renamed to one the campus does not have
+    booking = max(range(len(solver.bookings)), key=lambda i: len(solver.neighbour_index[i]))
+    record = solver.bookings[booking]["records"][0]
+    src, dst, weight = solver.flow_src, solver.flow_dst, solver.flow_weight
+    buildings = campus.room_building[solver.assignment]
+    kept = (src != booking) & (dst != booking)
+    expected = float(np.sum(weight[kept] * campus.distances.distance_km[buildings[src[kept]], buildings[dst[kept]]]))
+    record['BuildingName'] = "Nowhere"
+
+    unplaced = RoomReassignmentSolver(campus, None, columns=columns)
+
+    assert unplaced.assignment[booking] == -1
+    assert not unplaced.movable[booking]
+    assert unplaced.booking_buildings()[booking] == -1
+    # Its flows have no length, instead of the last room's building standing in for its own
+    assert unplaced.objective() == pytest.approx(expected)
+    neighbour = int(unplaced.neighbour_index[booking][0])
+    for room in unplaced.target_rooms.tolist():
+        if unplaced.campus.room_building[room] != unplaced.booking_buildings()[neighbour] and unplaced.fits(neighbour, room):
+            before = unplaced.objective()
+            delta = unplaced.move_delta(neighbour, room)
+            unplaced._assign(neighbour, room)
+            assert unplaced.objective() - before == pytest.approx(delta, abs=1e-9)
+            break
+    with pytest.raises(ValueError, match="not held in a room"):
+        unplaced.move_delta(booking, int(unplaced.target_rooms[0]))
+    assert record in unplaced.reassigned_courses_info()["courses"]
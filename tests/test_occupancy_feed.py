@@ -0,0 +1,188 @@
+"""
+OccupancyTracker coalescing and expiry, and OccupancyFeed batching end to end.
+"""
+import asyncio
+import copy
+import json
+import random
+
+import pytest
+
+from course_timetabling import CampusIndex, minutes_to_time
+from occupancy_feed import OccupancyFeed, OccupancyTracker
+
+
+def _reading(room_key, minute, occupied=True, day="Mon"):
+    return {"building": room_key[0], "room": room_key[1], "DayOfWeek": day, "time": minutes_to_time(minute), "occupied": occupied}
+
+
+def _free_room(campus, day="Mon", start=540, end=720):
+    return next(room_key for room_key in campus.availability.room_keys if campus.availability.is_free(room_key, day, start, end))
+
+
+def _timetabled(campus, day="Mon"):
+    return next(
+        (room_key, intervals[0]) for room_key in campus.availability.room_keys
+        for intervals in [campus.availability.bookings[room_key].get(day, [])] if intervals
+    )
+
+
+def _bookings(campus):
+    # Availability without the empty day lists that removals leave behind
+    return {
+        room_key: {day: intervals for day, intervals in days.items() if intervals}
+        for room_key, days in campus.availability.bookings.items()
+    }
+
+
+def _apply(campus, tracker, events):
+    deltas, ignored, rejected = tracker.update(events)
+    if deltas:
+        campus.apply_booking_deltas(deltas)
+    return deltas, ignored, rejected
+
+
+def test_readings_of_one_room_coalesce_into_one_change(campus):
+    room_key = _free_room(campus)
+    tracker = OccupancyTracker(campus.availability, hold_min=15)
+
+    deltas, ignored, rejected = _apply(campus, tracker, [_reading(room_key, 600), _reading(room_key, 605), _reading(room_key, 610)])
+
+    assert (ignored, rejected) == (0, 0)
+    assert [(delta["op"], delta["StartTime"], delta["EndTime"]) for delta in deltas] == [("add", "10:00", "10:25")]
+    assert tracker.live == {room_key + ("Mon",): (600, 625)}
+    assert not campus.availability.is_free(room_key, "Mon", 620, 621)
+
+
+def test_vacant_reading_ends_the_booking(campus):
+    room_key = _free_room(campus)
+    tracker = OccupancyTracker(campus.availability)
+    bookings = _bookings(campus)
+    _apply(campus, tracker, [_reading(room_key, 600)])
+
+    deltas, _, _ = _apply(campus, tracker, [_reading(room_key, 605, occupied=False)])
+
+    assert [delta["op"] for delta in deltas] == ["remove"]
+    assert tracker.live == {}
+    assert _bookings(campus) == bookings
+
+
+def test_readings_during_a_timetabled_booking_change_nothing(campus):
+    room_key, (start, _) = _timetabled(campus)
+    tracker = OccupancyTracker(campus.availability)
+
+    deltas, ignored, _ = tracker.update([_reading(room_key, start + 1), _reading(room_key, start + 2, occupied=False)])
+
+    assert (deltas, ignored) == ([], 2)
+
+
+def test_malformed_readings_are_rejected(campus):
+    room_key = _free_room(campus)
+    tracker = OccupancyTracker(campus.availability)
+
+    _, _, rejected = tracker.update([
+        {"building": "Nowhere", "room": "1", "DayOfWeek": "Mon", "time": "10:00", "occupied": True},
+        {**_reading(room_key, 600), "time": "ten"},
+        {"room": room_key[1]},
+    ])
+
+    assert rejected == 3
+    assert tracker.live == {}
+
+
+def test_sensed_bookings_expire_and_stay_out_of_room_timetable(campus):
+    first, second = [room_key for room_key in campus.availability.room_keys if campus.availability.is_free(room_key, "Mon", 540, 720)][:2]
+    tracker = OccupancyTracker(campus.availability, hold_min=15)
+    timetable = copy.deepcopy(campus.room_timetable)
+    bookings = _bookings(campus)
+
+    _apply(campus, tracker, [_reading(first, 600)])
+    # Readings elsewhere move the clock past the first booking's end
+    deltas, _, _ = _apply(campus, tracker, [_reading(second, 630)])
+    assert ("remove", first[0], first[1]) in [(delta["op"], delta["building"], delta["room"]) for delta in deltas]
+    assert campus.availability.is_free(first, "Mon", 600, 615)
+
+    # A reading from another day ends every sensed booking of the previous one
+    _apply(campus, tracker, [_reading(first, 300, occupied=False, day="Tue")])
+    assert tracker.live == {}
+    assert _bookings(campus) == bookings
+    assert campus.room_timetable == timetable
+
+
+def _stream(campus, count=4000, seed=3):
+    rng = random.Random(seed)
+    rooms = campus.availability.room_keys[:40]
+    lines = []
+    for day in ("Mon", "Tue"):
+        for minute in range(480, 480 + count // 6):
+            room_key = rng.choice(rooms)
+            lines.append(json.dumps(_reading(room_key, minute, rng.random() < 0.8, day)))
+            lines.append(json.dumps(_reading(rng.choice(rooms), minute - rng.randrange(5), rng.random() < 0.8, day)))
+            lines.append(json.dumps(_reading(rng.choice(rooms), minute, True, day)))
+    return "\n".join(lines) + "\n"
+
+
+def test_batch_size_does_not_change_the_result(tmp_path, campus):
+    source = tmp_path / "events.ndjson"
+    source.write_text(_stream(campus))
+    results = []
+    for batch_size in (1, 7, 500):
+        fresh = CampusIndex(campus.courses_info, copy.deepcopy(campus.room_timetable), campus.building_loc)
+        feed = OccupancyFeed(fresh, batch_size=batch_size)
+        asyncio.run(feed.run(str(source)))
+        assert feed.state == "stopped"
+        results.append((_bookings(fresh), feed.tracker.live, feed.counts["ignored"], feed.counts["rejected"]))
+
+    assert results[0] == results[1] == results[2]
+    # Only the current sensed bookings are in availability
+    assert sum(len(intervals) for days in results[0][0].values() for intervals in days.values()) == (
+        sum(len(intervals) for days in _bookings(campus).values() for intervals in days.values()) + len(results[0][1])
+    )
+
+
+def test_failed_update_marks_the_feed_failed(tmp_path, campus):
+    source = tmp_path / "events.ndjson"
+    source.write_text(_stream(campus, count=600))
+
+    def fail(function, *args):
+        raise RuntimeError("index unavailable")
+
+    feed = OccupancyFeed(campus, exclusive=fail, maxsize=4)
+    with pytest.raises(RuntimeError):
+        # Following the file would never end on its own; the failure must stop the reader too
+        asyncio.run(asyncio.wait_for(feed.run(str(source), follow=True), timeout=10))
+
+    assert feed.state == "failed"
+    assert feed.error == "RuntimeError: index unavailable"
+
+
+def test_missing_source_marks_the_feed_failed(tmp_path, campus):
+    feed = OccupancyFeed(campus)
+
+    with pytest.raises(OSError):
+        asyncio.run(feed.run(str(tmp_path / "missing.ndjson")))
+
+    assert feed.state == "failed"
+
+
+def test_rejected_deltas_leave_the_tracker_as_it_was(campus, monkeypatch):
+    first, second = [room_key for room_key in campus.availability.room_keys if campus.availability.is_free(room_key, "Mon", 540, 720)][:2]
+    feed = OccupancyFeed(campus)
+    feed._update([_reading(first, 600)])
+    state = feed.tracker.state()
+    bookings = _bookings(campus)
+
+    def reject(deltas):
+        raise ValueError("Booking delta 0: rejected")
+
+    monkeypatch.setattr(campus, "apply_booking_deltas", reject)
+    with pytest.raises(ValueError):
+        feed._update([_reading(second, 630), _reading(first, 631, occupied=False)])
+    monkeypatch.undo()
+
+    assert feed.tracker.state() == state
+    assert _bookings(campus) == bookings
+    # The same readings apply cleanly once the campus takes them
+    deltas, _, _, _ = feed._update([_reading(second, 630), _reading(first, 631, occupied=False)])
+    assert [(delta["op"], delta["room"]) for delta in deltas] == [("remove", first[1]), ("add", second[1])]
+    assert feed.tracker.live == {second + ("Mon",): (630, 645)}
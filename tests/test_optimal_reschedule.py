@@ -0,0 +1,89 @@
+"""
+optimal_reschedule against brute force: every combination of candidate rooms is scored hop by hop
+with find_alternative_classrooms on an overlay holding the previous course's room.
+"""
+import pytest
+
+from course_timetabling import (
+    CampusOverlay,
+    _candidate_rooms,
+    dynamic_reschedule,
+    find_alternative_classrooms,
+    optimal_reschedule,
+    update_course_info_dynamic,
+)
+
+
+def _hop_scores(campus, c1_id, c2_id, placement, origin):
+    # {(building, room): (total_score, building_location)} of every candidate for C2, C1 placed at `placement`
+    overlay = CampusOverlay(campus)
+    if c1_id == "Origin":
+        result = find_alternative_classrooms("Origin", c2_id, overlay, None, origin_location=origin)
+    else:
+        building, room, location = placement
+        update_course_info_dynamic(overlay, c1_id, building, room, {"lat": location[0], "lon": location[1]})
+        result = find_alternative_classrooms(c1_id, c2_id, overlay, None)
+    return {
+        (option["building"], option["room"]): (option["total_score"], option["building_location"])
+        for option in result["alternatives"]
+    }
+
+
+def _brute_force_totals(campus, course_list, origin):
+    # Summed total_score of every choice of one candidate room per course, best first
+    first = _hop_scores(campus, "Origin", course_list[0], None, origin)
+    chains = [(score, [(room_key, location)]) for room_key, (score, location) in first.items()]
+    for c1_id, c2_id in zip(course_list, course_list[1:]):
+        extended = []
+        for score, rooms in chains:
+            (building, room), location = rooms[-1]
+            hops = _hop_scores(campus, c1_id, c2_id, (building, room, location), origin)
+            extended.extend((score + hop, rooms + [(room_key, hop_location)]) for room_key, (hop, hop_location) in hops.items())
+        chains = extended
+    return sorted((score for score, _ in chains), reverse=True)
+
+
+@pytest.fixture
+def course_list(campus):
+    # Courses with a handful of free rooms each, so every combination can be enumerated
+    counts = {course_id: len(_candidate_rooms(campus, campus.course(course_id))) for course_id in sorted(campus.courses)}
+    return [course_id for course_id, count in counts.items() if 3 <= count <= 6][:4]
+
+
+def test_best_chain_matches_brute_force(campus, origin, course_list):
+    assert len(course_list) == 4
+    best = _brute_force_totals(campus, course_list, origin)[0]
+
+    chains = optimal_reschedule(course_list, campus, origin, "Origin", topk=3)
+
+    assert chains[0]["total_score"] == pytest.approx(best)
+
+
+def test_k_best_chains_match_brute_force(campus, origin, course_list):
+    totals = _brute_force_totals(campus, course_list, origin)
+
+    chains = optimal_reschedule(course_list, campus, origin, "Origin", topk=3, k_best=5)
+
+    assert [chain["total_score"] for chain in chains] == pytest.approx(totals[:5])
+
+
+def test_chain_rooms_add_up_to_the_score(campus, origin, course_list):
+    chain = optimal_reschedule(course_list, campus, origin, "Origin", topk=3)[0]
+
+    # Replaying the chosen rooms through dynamic_reschedule scores each hop the same way
+    hops = [hop for key, hop in chain["course_chain"].items() if "updated_next_course" in hop]
+    assert sum(hop["updated_next_course"]["total_score"] for hop in hops) == pytest.approx(chain["total_score"])
+
+
+def test_beam_never_beats_the_exact_search(campus, origin, course_list):
+    exact = optimal_reschedule(course_list, campus, origin, "Origin", topk=3)[0]["total_score"]
+
+    for beam_width in (1, 2):
+        assert optimal_reschedule(course_list, campus, origin, "Origin", topk=3, beam_width=beam_width)[0]["total_score"] <= exact + 1e-9
+
+
+def test_greedy_chain_is_no_better(campus, origin, course_list):
+    greedy = dynamic_reschedule(course_list, campus, origin, "Origin", [0] * len(course_list), topk=3)
+    greedy_total = sum(hop["updated_next_course"]["total_score"] for hop in greedy.values() if "updated_next_course" in hop)
+
+    assert greedy_total <= optimal_reschedule(course_list, campus, origin, "Origin", topk=3)[0]["total_score"] + 1e-9
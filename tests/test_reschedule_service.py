@@ -0,0 +1,62 @@
+"""
+RescheduleService over HTTP: malformed requests are client errors, answered before anything runs.
+"""
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from reschedule_service import RescheduleService
+
+
+@pytest.fixture
+def service(campus, origin):
+    server = RescheduleService(("127.0.0.1", 0), campus, origin_lat_lon=origin)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _post(server, route, request):
+    url = f"http://127.0.0.1:{server.server_address[1]}/{route}"
+    try:
+        with urllib.request.urlopen(url, data=json.dumps(request).encode()) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_reschedule_returns_the_chain(service, campus):
+    course_list = sorted(campus.courses)[:3]
+
+    status, payload = _post(service, "reschedule", {"course_list": course_list, "selection_indices": [0, 1, 0]})
+
+    assert status == 200
+    assert list(payload["course_chain"]) == ["Origin", "Course_1", "Course_2", "Course_3"]
+
+
+@pytest.mark.parametrize("request_body, message", [
+    ({"course_list": []}, "course_list must be a non-empty list"),
+    ({"course_list": 325}, "course_list must be a non-empty list"),
+    ({"course_list": "FIRST", "selection_indices": [0]}, "course_list must be a non-empty list"),
+    ({"course_list": [-1]}, "Course -1 not found"),
+    ({"selection_indices": [0]}, "KeyError"),
+])
+def test_malformed_course_list_is_a_client_error(service, request_body, message):
+    status, payload = _post(service, "reschedule", request_body)
+
+    assert status == 400
+    assert message in payload["error"]
+
+
+def test_short_selection_indices_is_a_client_error(service, campus):
+    course_list = sorted(campus.courses)[:3]
+
+    status, payload = _post(service, "reschedule", {"course_list": course_list, "selection_indices": [0, 1]})
+
+    assert status == 400
+    assert payload["error"] == "ValueError: selection_indices must have one entry per course (3)"
@@ -0,0 +1,113 @@
+"""
+RoomAvailability free/busy checks against a brute-force scan of room_timetable.
+"""
+import json
+import os
+import random
+
+import pytest
+
+from course_timetabling import RoomAvailability, minutes_to_time, time_to_minutes
+
+from conftest import DATA_DIR
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+@pytest.fixture
+def room_timetable():
+    with open(os.path.join(DATA_DIR, "room_timetable.json"), "r") as f:
+        return json.load(f)
+
+
+def _brute_force_free(room_timetable, room_key, day, start, end):
+    return not any(
+        schedule['DayOfWeek'] == day
+        and time_to_minutes(schedule['StartTime']) < end and start < time_to_minutes(schedule['EndTime'])
+        for schedule in room_timetable[room_key[0]][room_key[1]]
+    )
+
+
+def _windows(room_timetable, count=3000, seed=0):
+    rng = random.Random(seed)
+    room_keys = [(building, room) for building, rooms in room_timetable.items() for room in rooms]
+    windows = []
+    for _ in range(count):
+        start = rng.randrange(420, 1320)
+        windows.append((rng.choice(room_keys), rng.choice(DAYS), start, start + rng.choice([1, 10, 50, 75, 180])))
+    # Windows ending where a booking starts or starting where one ends do not overlap it
+    for building, rooms in room_timetable.items():
+        for room, schedules in rooms.items():
+            for schedule in schedules:
+                start, end = time_to_minutes(schedule['StartTime']), time_to_minutes(schedule['EndTime'])
+                windows += [((building, room), schedule['DayOfWeek'], start - 30, start), ((building, room), schedule['DayOfWeek'], end, end + 30)]
+    return windows
+
+
+def test_is_free_matches_brute_force(room_timetable):
+    availability = RoomAvailability(room_timetable)
+
+    for room_key, day, start, end in _windows(room_timetable):
+        assert availability.is_free(room_key, day, start, end) == _brute_force_free(room_timetable, room_key, day, start, end)
+
+
+def test_free_rooms_and_free_mask_agree(room_timetable):
+    availability = RoomAvailability(room_timetable)
+
+    for day, start, end in [("Mon", 540, 590), ("Tue", 560, 635), ("Fri", 780, 830), ("Sun", 600, 660)]:
+        expected = [room_key for room_key in availability.room_keys if _brute_force_free(room_timetable, room_key, day, start, end)]
+        assert availability.free_rooms(day, start, end) == expected
+        assert [room_key for room_key, free in zip(availability.room_keys, availability.free_mask(day, start, end)) if free] == expected
+
+
+def test_room_keys_keep_room_timetable_order(room_timetable):
+    availability = RoomAvailability(room_timetable)
+
+    assert availability.room_keys == [(building, room) for building, rooms in room_timetable.items() for room in rooms]
+    assert all(availability.room_positions[room_key] == i for i, room_key in enumerate(availability.room_keys))
+
+
+def test_added_and_removed_bookings_match_a_rebuilt_index(room_timetable):
+    availability = RoomAvailability(room_timetable)
+    version = availability.version
+    rng = random.Random(1)
+    room_keys = availability.room_keys[:10]
+    added = []
+    for _ in range(40):
+        room_key, day, start = rng.choice(room_keys), rng.choice(DAYS[:5]), rng.randrange(420, 1200)
+        end = start + rng.choice([30, 50, 75])
+        availability.add_booking(room_key, day, start, end)
+        added.append((room_key, day, start, end))
+        room_timetable[room_key[0]][room_key[1]].append({
+            "DayOfWeek": day, "StartTime": minutes_to_time(start), "EndTime": minutes_to_time(end)
+        })
+    for booking in added[::2]:
+        availability.remove_booking(*booking)
+        room_timetable[booking[0][0]][booking[0][1]].pop(
+            next(i for i, schedule in enumerate(room_timetable[booking[0][0]][booking[0][1]])
+                 if (schedule['DayOfWeek'], time_to_minutes(schedule['StartTime']), time_to_minutes(schedule['EndTime'])) == booking[1:])
+        )
+
+    rebuilt = RoomAvailability(room_timetable)
+    for room_key, day, start, end in _windows(room_timetable, count=2000, seed=2):
+        assert availability.is_free(room_key, day, start, end) == rebuilt.is_free(room_key, day, start, end)
+    # Single bookings leave the version alone; callers invalidate what they cached themselves
+    assert availability.version == version
+
+
+def test_remove_of_a_missing_booking_raises(room_timetable):
+    availability = RoomAvailability(room_timetable)
+    room_key = availability.room_keys[0]
+
+    with pytest.raises(ValueError, match="No booking"):
+        availability.remove_booking(room_key, "Sun", 100, 200)
+
+
+def test_load_bumps_the_version(room_timetable):
+    availability = RoomAvailability(room_timetable)
+    version = availability.version
+
+    availability.load({})
+
+    assert availability.version == version + 1
+    assert availability.room_keys == []
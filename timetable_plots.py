@@ -0,0 +1,85 @@
+"""
+Plotting helpers for course chains. Kept out of course_timetabling so that importing it
+(CLI runs, batch workers, the reschedule service) does not import matplotlib.
+"""
+import numpy as np
+import matplotlib.pyplot as plt
+import matplotlib.colors as mcolors
+
+
+def radar_charts(course_chain, subplots_per_row=5):
+    """
+    Plot radar charts for the four metrics (distance_saved, time_saved, floors_saved, occupancy_improved)
+    for all the options of each course in the course chain, with adjustable subplots per row and enhanced visuals.
+    """
+
+    # Metrics and their normalized counterparts
+    metrics = ["distance_saved", "time_saved", "floors_saved", "occupancy_improved"]
+    normalized_metrics = [f"{metric}_normalized" for metric in metrics]
+    num_metrics = len(normalized_metrics)
+    angles = np.linspace(0, 2 * np.pi, num_metrics, endpoint=False).tolist()
+    angles += angles[:1]  # Close the radar chart loop
+
+    # Define nicer labels for the metrics
+    metric_labels = {
+        "distance_saved_normalized": "Distance\nSaved",
+        "time_saved_normalized": "Time\nSaved",
+        "floors_saved_normalized": "Floors\nSaved",
+        "occupancy_improved_normalized": "Occupancy\nImproved"
+    }
+
+    # Define colors for better visual effect
+    color_palette = list(mcolors.TABLEAU_COLORS.values())
+
+    # Loop through each course in the chain, sorted by ID for consistency
+    for course_key in sorted(course_chain.keys(), key=lambda k: course_chain[k]["id"]):
+        course_data = course_chain[course_key]
+        # Ensure there are options available for radar plotting
+        if "updated_options_for_next_course" not in course_data or not course_data["updated_options_for_next_course"]:
+            continue
+
+        options = course_data["updated_options_for_next_course"]
+        num_options = len(options)
+        rows = (num_options + subplots_per_row - 1) // subplots_per_row
+        fig, axs = plt.subplots(rows, subplots_per_row, figsize=(subplots_per_row * 3, rows * 3), subplot_kw=dict(polar=True))
+        axs = axs.flatten() if num_options > 1 else [axs]
+
+        # Retrieve the course ID for the title
+        current_course_id = course_data["updated_next_course"]["course_number"]
+        start_time = course_data["original_next_course"]["StartTimeStr"]
+        end_time = course_data["original_next_course"]["EndTimeStr"]
+        for i, option in enumerate(options):
+            # Options listed with nested_metrics=False carry the normalized values flat
+            normalized = option["metrics"]["normalized"] if "metrics" in option else option
+            values = [normalized.get(metric, 0) for metric in normalized_metrics]
+            values += values[:1]  # Close the radar chart loop
+            ax = axs[i]
+            ax.set_theta_offset(np.pi / 2)
+            ax.set_theta_direction(-1)
+
+            # Plot the radar chart for this option
+            ax.plot(angles, values, label=f"Room: {option['room']}", color=color_palette[i % len(color_palette)])
+            ax.fill(angles, values, alpha=0.25, color=color_palette[i % len(color_palette)])
+
+            # Add gridlines and labels
+            ax.set_yticks([0.25, 0.5, 0.75, 1])
+            ax.set_yticklabels(["0.25", "0.5", "0.75", "1"], fontsize=10)
+            ax.set_xticks(angles[:-1])
+            ax.set_xticklabels([metric_labels[m] for m in normalized_metrics], fontsize=10)
+            total_score = option.get("total_score", 0)
+            ax.set_title(
+                f"{option['building']}\nRoom: $\\mathbf{{{option['room']}}}$\nTotal Score: $\\mathbf{{{total_score:.2f}}}$",
+                va="bottom",
+                fontsize=10
+            )
+
+        # Add empty subplots if necessary
+        for j in range(num_options, len(axs)):
+            fig.delaxes(axs[j])  # Mark unused axes as empty
+
+
+        # Correctly set suptitle from the first course to the last
+        suptitle = f"Options of Course ID: $\\mathbf{{{current_course_id}}}$\n{start_time} - {end_time}"
+        fig.suptitle(suptitle, fontsize=14)
+        plt.tight_layout()
+        plt.show()